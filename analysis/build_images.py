@@ -0,0 +1,129 @@
+# analysis/build_images.py
+# Dérivés des images de cartes : miniatures + taille d'affichage en WebP/JPEG,
+# noms de fichiers hashés (cache long côté navigateur).
+
+import argparse
+import hashlib
+import io
+import json
+from pathlib import Path
+
+from PIL import Image
+
+from analysis import corpus
+
+HERE = Path(__file__).resolve().parent                   # analysis/
+ROOT = HERE.parent                                      # repo root
+
+CARDS_DIR = ROOT / "assets" / "Cards"                   # images référencées par la colonne `img`
+KAGGLE_DIR = ROOT / "data" / "Tarot_Deck_Kaggle_Daria_Chemkaeva"
+SOURCE_DIRS = (CARDS_DIR, KAGGLE_DIR / "Cards")        # tout ce que card_sources() peut retenir
+DECK_XLSX, CORPUS = corpus.DECKS["en"]                  # corpus EN : colonnes `img` et `kaggle_img`
+
+OUT_DIR = ROOT / "static" / "cards"                     # servi par app.py sur /img/ (cache immuable)
+MANIFEST = OUT_DIR / "manifest.json"
+
+SIZES = {"thumb": 120, "display": 300}                  # largeurs en pixels
+FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 6},
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}
+
+def card_sources() -> dict:
+    """
+    {img: chemin source} pour chaque carte du deck. Les images de assets/Cards sont prioritaires ;
+    à défaut, le scan Kaggle correspondant (jointure faite par le corpus unifié).
+    """
+    deck = corpus.load_corpus(CORPUS) if CORPUS.exists() else corpus.build_corpus(DECK_XLSX, "en")
+    columns = deck["columns"]
+
+    sources = {}
+    for card, img, kaggle_img in zip(columns["card"], columns["img"], columns["kaggle_img"]):
+        img = str(img).strip()
+        candidates = [CARDS_DIR / img]
+        if kaggle_img:
+            candidates.append(KAGGLE_DIR / "Cards" / kaggle_img)
+        found = next((p for p in candidates if p.exists()), None)
+        if found is None:
+            print(f"Image introuvable pour {card} ({img})")
+            continue
+        sources[img] = found
+    return sources
+
+def encode(image: Image.Image, fmt: str) -> bytes:
+    buf = io.BytesIO()
+    image.save(buf, **FORMATS[fmt])
+    return buf.getvalue()
+
+def write_hashed(data: bytes, stem: str, suffix: str) -> str:
+    # nom = contenu : une URL ne change que si l'image change
+    name = f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}.{suffix}"
+    path = OUT_DIR / name
+    if not path.exists():
+        path.write_bytes(data)
+    return name
+
+def resize_to_width(image: Image.Image, width: int) -> Image.Image:
+    if image.width <= width:
+        return image.copy()
+    height = round(image.height * width / image.width)
+    return image.resize((width, height), Image.LANCZOS)
+
+def build_card(img: str, source: Path) -> dict:
+    stem = Path(img).stem
+    with Image.open(source) as im:
+        im = im.convert("RGB")
+        entry = {"source_hash": hashlib.sha256(source.read_bytes()).hexdigest()}
+        for size, width in SIZES.items():
+            resized = resize_to_width(im, width)
+            entry[size] = {"width": resized.width, "height": resized.height}
+            for fmt, suffix in (("webp", "webp"), ("jpeg", "jpg")):
+                entry[size][fmt] = write_hashed(encode(resized, fmt), f"{stem}.{size}", suffix)
+    return entry
+
+def load_manifest() -> dict:
+    try:
+        with open(MANIFEST, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def build_images(force: bool = False) -> dict:
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    previous = load_manifest()
+    params = {"sizes": SIZES, "formats": FORMATS}
+    reuse = not force and previous.get("params") == json.loads(json.dumps(params))
+
+    cards, built = {}, 0
+    for img, source in card_sources().items():
+        prev = previous.get("cards", {}).get(img)
+        source_hash = hashlib.sha256(source.read_bytes()).hexdigest()
+        if (reuse and prev and prev.get("source_hash") == source_hash
+                and all((OUT_DIR / prev[s][f]).exists() for s in SIZES for f in ("webp", "jpeg"))):
+            cards[img] = prev
+            continue
+        cards[img] = build_card(img, source)
+        built += 1
+
+    manifest = {"params": params, "cards": cards}
+
+    # suppression des dérivés qui ne sont plus référencés
+    referenced = {MANIFEST.name}
+    referenced |= {c[s][f] for c in cards.values() for s in SIZES for f in ("webp", "jpeg")}
+    for path in OUT_DIR.iterdir():
+        if path.is_file() and path.name not in referenced:
+            path.unlink()
+
+    with open(MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    print(f"Images : {built} carte(s) régénérée(s), {len(cards) - built} inchangée(s) -> {OUT_DIR}")
+    return manifest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère les dérivés d'images des cartes (WebP/JPEG)")
+    parser.add_argument("--force", action="store_true", help="tout régénérer")
+    args = parser.parse_args(argv)
+    build_images(force=args.force)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# analysis/corpus.py
+# Corpus unifié par langue : deck Excel nettoyé (FR/EN) + fiche Kaggle de chaque carte (mots-clés,
+# fortune_telling, light/shadow, couleur, numéro…), joints sur l'identité de la carte et enregistrés
+# en colonnes dans un JSON relu en quelques millisecondes — pd.read_excel (openpyxl) n'est plus
+# appelé qu'ici, à la construction.
+
+import argparse
+import json
+import math
+import re
+from pathlib import Path
+
+from analysis.pipeline import sha256_file
+
+HERE = Path(__file__).resolve().parent                   # analysis/
+ROOT = HERE.parent                                      # repo root
+
+DATA_DIR = ROOT / "data" / "Tarot_Deck_cleaned"
+KAGGLE_JSON = ROOT / "data" / "Tarot_Deck_Kaggle_Daria_Chemkaeva" / "tarot-images.json"
+OUTPUTS_DIR = ROOT / "analysis" / "outputs"
+CORPUS_VERSION = 1
+
+DECKS = {
+    "fr": (DATA_DIR / "tarot_description_FR.xlsx", OUTPUTS_DIR / "corpus_fr.json"),
+    "en": (DATA_DIR / "tarot_description_EN.xlsx", OUTPUTS_DIR / "corpus_en.json"),
+}
+
+# champs Kaggle -> colonnes du corpus (listes conservées telles quelles)
+KAGGLE_FIELDS = {
+    "number": "number",
+    "suit": "suit",
+    "img": "kaggle_img",
+    "keywords": "kaggle_keywords",
+    "fortune_telling": "fortune_telling",
+    "Archetype": "archetype",
+    "Elemental": "elemental",
+    "Astrology": "astrology",
+    "Hebrew Alphabet": "hebrew_alphabet",
+    "Numerology": "numerology",
+    "Mythical/Spiritual": "mythical_spiritual",
+    "Affirmation": "affirmation",
+    "Questions to Ask": "questions",
+}
+MEANING_FIELDS = {"light": "light", "shadow": "shadow"}   # meanings.light / meanings.shadow
+
+
+def card_key(name) -> str:
+    # clé de jointure tolérante : "The Wheel of Fortune" (deck FR) == "Wheel of Fortune" (Kaggle, deck EN)
+    name = re.sub(r"\s+", " ", str(name)).strip().lower()
+    return name[4:] if name.startswith("the ") else name
+
+
+def _cell(value):
+    # cellules Excel : NaN -> None, entiers numpy -> int, textes nettoyés
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, str):
+        return value.strip()
+    return value.item() if hasattr(value, "item") else value
+
+
+def read_deck(xlsx_path) -> tuple:
+    """(colonnes, lignes) du deck Excel, dans l'ordre du fichier."""
+    import pandas as pd
+
+    df = pd.read_excel(xlsx_path)
+    return list(df.columns), [[_cell(v) for v in row] for row in df.itertuples(index=False, name=None)]
+
+
+def read_kaggle(json_path=KAGGLE_JSON) -> dict:
+    """{clé de carte: fiche Kaggle}."""
+    with open(json_path, encoding="utf-8") as f:
+        return {card_key(c["name"]): c for c in json.load(f)["cards"]}
+
+
+def build_corpus(xlsx_path, lang: str, kaggle_path=KAGGLE_JSON) -> dict:
+    """
+    Corpus en colonnes : celles du deck (dans son ordre), puis les champs Kaggle. La colonne `card`
+    reprend le nom Kaggle quand la jointure réussit : même identifiant de carte en FR et en EN.
+    """
+    deck_columns, rows = read_deck(xlsx_path)
+    kaggle = read_kaggle(kaggle_path)
+    columns = {name: [] for name in deck_columns}
+    extra = list(KAGGLE_FIELDS.values()) + list(MEANING_FIELDS.values())
+    columns.update({name: [] for name in extra if name not in columns})
+    unmatched = []
+
+    card_col = deck_columns.index("card")
+    for row in rows:
+        entry = kaggle.get(card_key(row[card_col]))
+        if entry is None:
+            unmatched.append(row[card_col])
+            entry = {}
+        elif row[card_col] != entry["name"]:
+            row[card_col] = entry["name"]
+        for name, value in zip(deck_columns, row):
+            columns[name].append(value)
+        for field, name in KAGGLE_FIELDS.items():
+            columns[name].append(entry.get(field))
+        for field, name in MEANING_FIELDS.items():
+            columns[name].append(entry.get("meanings", {}).get(field))
+
+    return {
+        "version": CORPUS_VERSION,
+        "lang": lang,
+        "sources": {
+            "deck": {"path": Path(xlsx_path).name, "sha256": sha256_file(xlsx_path)},
+            "kaggle": {"path": Path(kaggle_path).name, "sha256": sha256_file(kaggle_path)},
+        },
+        "rows": len(rows),
+        "unmatched": unmatched,
+        "columns": columns,
+    }
+
+
+def save_corpus(corpus: dict, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(corpus, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_corpus(path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def corpus_frame(corpus: dict):
+    """DataFrame pandas du corpus (colonnes déjà typées : aucune analyse de fichier)."""
+    import pandas as pd
+
+    return pd.DataFrame(corpus["columns"])
+
+
+def load_frame(path):
+    return corpus_frame(load_corpus(path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Corpus unifié (deck Excel + Kaggle) par langue")
+    parser.add_argument("--lang", choices=sorted(DECKS), action="append", help="langue(s) (défaut : toutes)")
+    args = parser.parse_args(argv)
+    for lang in args.lang or list(DECKS):
+        xlsx_path, out_path = DECKS[lang]
+        corpus = build_corpus(xlsx_path, lang)
+        save_corpus(corpus, out_path)
+        missing = f", sans fiche Kaggle : {', '.join(corpus['unmatched'])}" if corpus["unmatched"] else ""
+        print(f"Corpus {lang} : {corpus['rows']} cartes -> {out_path}{missing}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,248 @@
+# analysis/graph_artifact.py
+# Format compact du graphe sémantique : arêtes en tableaux d'indices (int32) + poids (float32)
+# et coordonnées du layout dans un .npz, attributs des nœuds dans une table annexe (JSON en colonnes).
+# Le graphe NetworkX n'est construit qu'à la demande (algorithmes de graphe) ; l'export
+# node-link JSON reste disponible pour l'interopérabilité.
+# Les métriques (centralités, communautés, plus courts chemins) sont précalculées dans un
+# second .npz, aligné sur l'ordre des nœuds : chaque lecture côté app est en O(1).
+
+import argparse
+import hashlib
+import io
+import json
+import threading
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+from analysis.pipeline import sha256_file
+
+FORMAT_VERSION = 1
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)   # date fixe des entrées zip : même contenu -> mêmes octets
+
+
+def nodes_table_path(path) -> Path:
+    # tarot_graph_fr.npz -> tarot_graph_fr.nodes.json
+    path = Path(path)
+    return path.with_name(f"{path.stem}.nodes.json")
+
+
+def graph_hash(npz_sha, nodes_sha) -> str:
+    # empreinte d'un graphe compact : arêtes (.npz) et table des nœuds, qui fixe l'ordre des indices
+    return hashlib.sha256(f"{npz_sha}:{nodes_sha}".encode("ascii")).hexdigest()
+
+
+def graph_file_hash(path) -> str:
+    return graph_hash(sha256_file(path), sha256_file(nodes_table_path(path)))
+
+
+def save_npz(path, arrays):
+    """Comme np.savez, mais reproductible (np.savez date chaque entrée de l'heure d'écriture)."""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as zf:
+        for name, array in arrays.items():
+            buf = io.BytesIO()
+            np.lib.format.write_array(buf, np.asanyarray(array), allow_pickle=False)
+            zf.writestr(zipfile.ZipInfo(f"{name}.npy", date_time=ZIP_EPOCH), buf.getvalue())
+
+
+class GraphArtifact:
+    """
+    Graphe non orienté en lecture seule : `nodes` (identifiants), `node_attrs` (colonnes),
+    `src`/`dst`/`weight` (une entrée par arête), `positions` ((n, 2) float32 ou None).
+    Seul le poids est conservé comme attribut d'arête.
+    """
+
+    __slots__ = ("nodes", "node_attrs", "index", "src", "dst", "weight", "positions", "_nx", "_lock")
+
+    def __init__(self, nodes, src, dst, weight, node_attrs=None, positions=None):
+        self.nodes = tuple(nodes)
+        self.node_attrs = node_attrs or {}
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.src = np.asarray(src, dtype=np.int32)
+        self.dst = np.asarray(dst, dtype=np.int32)
+        self.weight = np.asarray(weight, dtype=np.float32)
+        self.positions = None if positions is None else np.asarray(positions, dtype=np.float32)
+        for arr in (self.src, self.dst, self.weight, self.positions):
+            if arr is not None:
+                arr.setflags(write=False)
+        self._nx = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def empty(cls):
+        return cls((), (), (), ())
+
+    # --- conversions ---
+    @classmethod
+    def from_node_link(cls, data, positions=None):
+        """Depuis un node-link JSON (clé "links") ; `positions` : {nœud: (x, y)} complet, sinon ignoré."""
+        nodes = [n["id"] for n in data.get("nodes", [])]
+        index = {node: i for i, node in enumerate(nodes)}
+        attr_names = sorted({k for n in data.get("nodes", []) for k in n if k != "id"})
+        node_attrs = {k: [n.get(k) for n in data["nodes"]] for k in attr_names}
+        links = data.get("links", [])
+        src = [index[link["source"]] for link in links]
+        dst = [index[link["target"]] for link in links]
+        weight = [link.get("weight", 1.0) for link in links]
+        coords = None
+        if positions and all(node in positions for node in nodes):
+            coords = np.array([positions[node] for node in nodes], dtype=np.float32).reshape(len(nodes), 2)
+        return cls(nodes, src, dst, weight, node_attrs, coords)
+
+    def to_node_link(self) -> dict:
+        """Export node-link (même schéma que nx.node_link_data(..., edges="links"))."""
+        nodes = [{**{k: v[i] for k, v in self.node_attrs.items()}, "id": node} for i, node in enumerate(self.nodes)]
+        links = [{"weight": float(w), "source": self.nodes[s], "target": self.nodes[t]}
+                 for s, t, w in zip(self.src.tolist(), self.dst.tolist(), self.weight.tolist())]
+        return {"directed": False, "multigraph": False, "graph": {}, "nodes": nodes, "links": links}
+
+    def to_networkx(self):
+        """Graphe NetworkX gelé, construit au premier appel puis partagé."""
+        if self._nx is None:
+            with self._lock:
+                if self._nx is None:
+                    import networkx as nx
+
+                    G = nx.Graph()
+                    G.add_nodes_from((node, {k: v[i] for k, v in self.node_attrs.items()})
+                                     for i, node in enumerate(self.nodes))
+                    G.add_weighted_edges_from((self.nodes[s], self.nodes[t], w) for s, t, w in
+                                              zip(self.src.tolist(), self.dst.tolist(), self.weight.tolist()))
+                    self._nx = nx.freeze(G)
+        return self._nx
+
+    # --- accès ---
+    def number_of_nodes(self):
+        return len(self.nodes)
+
+    def number_of_edges(self):
+        return len(self.src)
+
+    # --- fichiers ---
+    def save(self, path):
+        """Écrit `path` (.npz) et sa table de nœuds (.nodes.json)."""
+        path = Path(path)
+        arrays = {"src": self.src, "dst": self.dst, "weight": self.weight}
+        if self.positions is not None:
+            arrays["positions"] = self.positions
+        save_npz(path, arrays)
+        table = {"version": FORMAT_VERSION, "columns": {"id": list(self.nodes), **self.node_attrs}}
+        with open(nodes_table_path(path), "w", encoding="utf-8") as f:
+            json.dump(table, f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path):
+        with open(nodes_table_path(path), encoding="utf-8") as f:
+            columns = json.load(f)["columns"]
+        nodes = columns.pop("id")
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(nodes, arrays["src"], arrays["dst"], arrays["weight"], columns,
+                       arrays["positions"] if "positions" in arrays.files else None)
+
+    def export_json(self, path, indent=2):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_node_link(), f, indent=indent, ensure_ascii=False)
+
+
+class GraphMetrics:
+    """
+    Métriques précalculées d'un GraphArtifact (mêmes indices de nœuds) : `degree` et `betweenness`
+    (centralités normalisées), `community` (0 = la plus grande), `distance` (nombre de sauts, -1 si
+    non connectés) et `next_hop[i, j]` (voisin de i sur un plus court chemin vers j, -1 sinon).
+    """
+
+    __slots__ = ("graph_hash", "degree", "betweenness", "community", "distance", "next_hop")
+
+    def __init__(self, graph_hash, degree, betweenness, community, distance, next_hop):
+        self.graph_hash = str(graph_hash)
+        self.degree = np.asarray(degree, dtype=np.float32)
+        self.betweenness = np.asarray(betweenness, dtype=np.float32)
+        self.community = np.asarray(community, dtype=np.int32)
+        self.distance = np.asarray(distance)
+        self.next_hop = np.asarray(next_hop)
+        for arr in (self.degree, self.betweenness, self.community, self.distance, self.next_hop):
+            arr.setflags(write=False)
+
+    @classmethod
+    def compute(cls, graph, graph_hash="", seed=42):
+        """Centralités et communautés (NetworkX), chemins par BFS depuis chaque nœud (scipy, non pondéré)."""
+        import networkx as nx
+        import scipy.sparse as sp
+        from scipy.sparse.csgraph import shortest_path
+
+        n = graph.number_of_nodes()
+        G = graph.to_networkx()
+        degree = nx.degree_centrality(G) if n > 1 else {}
+        betweenness = nx.betweenness_centrality(G)
+        communities = nx.community.louvain_communities(G, weight="weight", seed=seed) if n else []
+        community = np.zeros(n, dtype=np.int32)
+        ordered = sorted(communities, key=lambda c: (-len(c), min(graph.index[v] for v in c)))
+        for label, members in enumerate(ordered):
+            community[[graph.index[v] for v in members]] = label
+
+        adjacency = sp.coo_matrix((np.ones(graph.number_of_edges()), (graph.src, graph.dst)), shape=(n, n))
+        dist, pred = shortest_path(adjacency.tocsr(), method="D", directed=False, unweighted=True,
+                                   return_predecessors=True)
+        small = np.int16 if n < np.iinfo(np.int16).max else np.int32
+        distance = np.where(np.isinf(dist), -1, dist).astype(small)
+        # graphe non orienté : le prédécesseur de i sur le chemin j -> i est le successeur de i vers j
+        next_hop = np.where(pred.T < 0, -1, pred.T).astype(small)
+        return cls(graph_hash,
+                   [degree.get(v, 0.0) for v in graph.nodes],
+                   [betweenness.get(v, 0.0) for v in graph.nodes],
+                   community, distance, next_hop)
+
+    def path(self, source: int, target: int) -> list:
+        """Indices des nœuds d'un plus court chemin (vide si non connectés), un saut par lecture de table."""
+        if self.distance[source, target] < 0:
+            return []
+        path = [source]
+        while path[-1] != target:
+            path.append(int(self.next_hop[path[-1], target]))
+        return path
+
+    def save(self, path):
+        save_npz(path, {"graph_hash": np.array(self.graph_hash), "degree": self.degree,
+                        "betweenness": self.betweenness, "community": self.community,
+                        "distance": self.distance, "next_hop": self.next_hop})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(arrays["graph_hash"].item(), arrays["degree"], arrays["betweenness"], arrays["community"],
+                       arrays["distance"], arrays["next_hop"])
+
+
+def write_graph_metrics(graph_npz, out_path, seed=42):
+    """Métriques du graphe compact `graph_npz` ; son hash (.npz + nœuds) permet à l'app d'écarter des métriques périmées."""
+    GraphMetrics.compute(GraphArtifact.load(graph_npz), graph_file_hash(graph_npz), seed=seed).save(out_path)
+
+
+def write_compact_graph(graph_path, layout_path, out_path):
+    """node-link JSON + layout (run_analysis.py) -> .npz compact ; le layout n'est repris que s'il correspond au graphe."""
+    raw = Path(graph_path).read_bytes()
+    positions = None
+    try:
+        with open(layout_path, encoding="utf-8") as f:
+            layout = json.load(f)
+        if layout.get("graph_hash") == hashlib.sha256(raw).hexdigest():
+            positions = layout.get("positions")
+    except (OSError, ValueError):
+        pass
+    GraphArtifact.from_node_link(json.loads(raw), positions).save(out_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export node-link JSON d'un graphe compact (.npz)")
+    parser.add_argument("npz", type=Path)
+    parser.add_argument("out", type=Path, help="fichier JSON à écrire")
+    args = parser.parse_args(argv)
+    graph = GraphArtifact.load(args.npz)
+    graph.export_json(args.out)
+    print(f"{graph.number_of_nodes()} nœuds, {graph.number_of_edges()} arêtes -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
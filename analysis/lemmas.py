@@ -0,0 +1,110 @@
+# analysis/lemmas.py
+# Lemmatisation spaCy (FR/EN) par lots avec nlp.pipe, filtrée par catégorie grammaticale, et cache
+# par hash de texte : une relance ne repasse dans spaCy que les textes nouveaux ou modifiés.
+# Le modèle (nom@version) est résolu avant l'exécution et fait partie de la clé de l'étape : sans modèle
+# installé, l'étape échoue au lieu de produire des tokens bruts enregistrés comme des lemmes.
+
+import json
+import os
+from pathlib import Path
+
+from analysis.semantic_utils import text_hash
+
+# modèles essayés dans l'ordre ; le premier installé est retenu
+SPACY_MODELS = {
+    "fr": ("fr_core_news_sm", "fr_core_news_md", "fr_core_news_lg"),
+    "en": ("en_core_web_sm", "en_core_web_md", "en_core_web_lg"),
+}
+KEEP_POS = ("NOUN", "PROPN", "ADJ", "VERB")   # mots de contenu
+DISABLE = ("parser", "ner")                   # inutiles pour lemmes + POS
+
+
+def installed_model(lang):
+    """"nom@version" du premier modèle spaCy installé pour `lang` (sans le charger), sinon None."""
+    try:
+        import spacy.util
+    except ImportError:
+        return None
+    for name in SPACY_MODELS.get(lang, ()):
+        if spacy.util.is_package(name):
+            return f"{name}@{spacy.util.get_package_version(name)}"
+    return None
+
+
+def load_nlp(model_key):
+    """Pipeline spaCy du modèle `model_key` ("nom@version") ; erreur s'il n'est plus celui installé."""
+    import spacy
+
+    name = model_key.partition("@")[0]
+    nlp = spacy.load(name, disable=DISABLE)
+    loaded = f"{name}@{nlp.meta.get('version', '?')}"
+    if loaded != model_key:
+        raise RuntimeError(f"Modèle spaCy {loaded} chargé, {model_key} attendu : relancer l'analyse")
+    return nlp
+
+
+def load_lemma_cache(path, model_key):
+    # lemmes déjà calculés, indexés par hash de texte (vide si modèle ou filtre différent)
+    try:
+        with open(path, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("model") != model_key or cache.get("pos") != list(KEEP_POS):
+        return {}
+    return cache.get("entries", {})
+
+
+def save_lemma_cache(path, model_key, entries):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"model": model_key, "pos": list(KEEP_POS), "entries": entries}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def doc_lemmas(doc):
+    return [t.lemma_.lower() for t in doc if t.pos_ in KEEP_POS and t.is_alpha]
+
+
+class Lemmatizer:
+    """
+    Analyseur par lots pour build_term_frequencies : `lemmatizer(textes)` -> une liste de lemmes par texte,
+    stopwords et mots d'une lettre exclus. `model_key` vient de installed_model(lang) ; None (aucun modèle
+    installé) fait échouer l'appel.
+    """
+
+    def __init__(self, lang, model_key, cache_path, stopwords=frozenset(), batch_size=64, n_process=1):
+        self.lang = lang
+        self.model_key = model_key
+        self.cache_path = cache_path
+        self.stopwords = stopwords
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.stats = {}
+
+    @property
+    def name(self):
+        # consigné dans les fréquences de termes : quel analyseur les a produites
+        return f"lemmas:{self.model_key}"
+
+    def __call__(self, texts):
+        if self.model_key is None:
+            raise RuntimeError(f"Aucun modèle spaCy installé pour {self.lang!r} "
+                               f"({', '.join(SPACY_MODELS.get(self.lang, ()))}) : python -m spacy download …")
+        texts = [t if isinstance(t, str) else "" for t in texts]
+        hashes = [text_hash(t) for t in texts]
+        cached = load_lemma_cache(self.cache_path, self.model_key)
+        todo = sorted({h: i for i, h in enumerate(hashes) if h not in cached}.values())
+        entries = {h: cached[h] for h in hashes if h in cached}
+        if todo:
+            # le modèle n'est chargé que s'il reste des textes à analyser
+            nlp = load_nlp(self.model_key)
+            docs = nlp.pipe((texts[i] for i in todo), batch_size=self.batch_size, n_process=self.n_process)
+            for i, doc in zip(todo, docs):
+                entries[hashes[i]] = doc_lemmas(doc)
+        # seuls les textes courants sont conservés : le cache ne grossit pas d'une version à l'autre
+        save_lemma_cache(self.cache_path, self.model_key, entries)
+        self.stats = {"model": self.model_key, "lemmatized": len(todo), "reused": len(set(hashes)) - len(todo)}
+        return [[w for w in entries[h] if len(w) > 1 and w not in self.stopwords] for h in hashes]
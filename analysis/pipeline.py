@@ -0,0 +1,145 @@
+# analysis/pipeline.py
+# Mini-orchestrateur : DAG d'étapes exécutées en parallèle (pool de processus),
+# chaque étape étant sautée si ses entrées (hash) et paramètres n'ont pas changé.
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def sha256_path(path: Path) -> str:
+    # fichier, ou dossier (noms relatifs + contenu de chaque fichier, dans un ordre stable)
+    path = Path(path)
+    if not path.is_dir():
+        return sha256_file(path)
+    h = hashlib.sha256()
+    for child in sorted(p for p in path.rglob("*") if p.is_file()):
+        h.update(f"{child.relative_to(path).as_posix()}:{sha256_file(child)}|".encode("utf-8"))
+    return h.hexdigest()
+
+
+class Stage:
+    """Une étape du DAG : `func(**kwargs)` lit `inputs` (fichiers ou dossiers) et écrit `outputs`."""
+
+    __slots__ = ("name", "func", "kwargs", "inputs", "outputs", "params", "deps")
+
+    def __init__(self, name, func, kwargs, inputs, outputs, params=None, deps=()):
+        self.name = name
+        self.func = func            # fonction de niveau module (picklable)
+        self.kwargs = kwargs
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+        self.deps = list(deps)
+
+
+def _rel(path, root):
+    try:
+        return str(Path(path).resolve().relative_to(root))
+    except ValueError:
+        return str(path)
+
+
+def stage_key(stage, root):
+    # calculée au moment de l'ordonnancement : les entrées produites par une étape amont existent déjà
+    input_hashes = {_rel(p, root): sha256_path(p) for p in stage.inputs}
+    payload = json.dumps({"inputs": input_hashes, "params": stage.params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest(), input_hashes
+
+
+def _timed_call(func, kwargs):
+    t0 = time.perf_counter()
+    func(**kwargs)
+    return time.perf_counter() - t0
+
+
+def run_pipeline(stages, previous=None, root=Path("."), jobs=None, force=False, log=print):
+    """
+    Exécute le DAG et retourne {nom_étape: enregistrement} pour le manifest.
+
+    `previous` : enregistrements du manifest précédent (clé d'entrée par étape).
+    `jobs` : taille du pool (1 = exécution dans le processus courant).
+    """
+    previous = previous or {}
+    root = Path(root).resolve()
+    pending = {s.name: s for s in stages}
+    records = {}
+    running = {}
+    jobs = jobs or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+
+    def finish(stage, record):
+        records[stage.name] = record
+        log(f"[{stage.name}] {record['status']} ({record['seconds']:.2f}s)")
+
+    try:
+        while pending or running:
+            # 1) lancer (ou sauter) toutes les étapes dont les dépendances sont résolues
+            progressed = True
+            while progressed:
+                progressed = False
+                for name, stage in list(pending.items()):
+                    if not all(d in records for d in stage.deps):
+                        continue
+                    del pending[name]
+                    progressed = True
+                    base = {"params": stage.params, "outputs": [_rel(p, root) for p in stage.outputs]}
+
+                    if any(records[d]["status"] == "failed" for d in stage.deps):
+                        finish(stage, {**base, "status": "failed", "error": "dépendance en échec", "seconds": 0.0})
+                        continue
+
+                    try:
+                        key, input_hashes = stage_key(stage, root)
+                    except OSError as e:
+                        # entrée absente ou illisible : l'étape (et ses dépendantes) échoue, le run continue
+                        finish(stage, {**base, "status": "failed", "error": f"entrée illisible : {e}", "seconds": 0.0})
+                        continue
+                    base.update({"key": key, "inputs": input_hashes})
+                    prev = previous.get(name, {})
+                    if (not force and prev.get("key") == key and prev.get("status") != "failed"
+                            and all(Path(p).exists() for p in stage.outputs)):
+                        finish(stage, {**base, "status": "skipped", "seconds": 0.0,
+                                       "build_seconds": prev.get("build_seconds", prev.get("seconds", 0.0))})
+                        continue
+
+                    if pool is None:
+                        try:
+                            seconds = _timed_call(stage.func, stage.kwargs)
+                        except Exception as e:
+                            finish(stage, {**base, "status": "failed", "error": repr(e), "seconds": 0.0})
+                        else:
+                            finish(stage, {**base, "status": "built", "seconds": seconds, "build_seconds": seconds})
+                    else:
+                        running[pool.submit(_timed_call, stage.func, stage.kwargs)] = (stage, base)
+
+            if not running:
+                if pending:
+                    raise RuntimeError(f"Dépendances introuvables ou cycliques : {sorted(pending)}")
+                break
+
+            # 2) attendre qu'au moins une étape se termine
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, base = running.pop(future)
+                try:
+                    seconds = future.result()
+                except Exception as e:
+                    finish(stage, {**base, "status": "failed", "error": repr(e), "seconds": 0.0})
+                else:
+                    finish(stage, {**base, "status": "built", "seconds": seconds, "build_seconds": seconds})
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return records
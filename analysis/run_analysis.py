@@ -1,14 +1,28 @@
 # analysis/run_analysis.py
 # Script indépendant de Dash : calcule graphe + stats + wordclouds FR/EN
+# Les étapes forment un DAG par langue, exécuté en parallèle ; une étape dont les
+# entrées et paramètres n'ont pas changé depuis le dernier manifest est sautée.
 
+import argparse
 import json
-import re
+import os
+import sys
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 
-import pandas as pd
-from wordcloud import WordCloud, STOPWORDS
+import networkx as nx
 
-from semantic_utils import build_graph, compute_embeddings
+if __package__ in (None, ""):  # lancé en script (python analysis/run_analysis.py) : racine du dépôt importable
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analysis import build_images, corpus, lemmas, waite_index
+from analysis.graph_artifact import nodes_table_path, write_compact_graph, write_graph_metrics
+from analysis.pipeline import Stage, run_pipeline, sha256_file
+from analysis.semantic_utils import EMBEDDING_MODEL, build_graph, compute_embeddings
+from analysis.text_frequencies import (STOPWORDS_BY_LANG, SUBSETS, build_term_frequencies, card_terms,
+                                       load_term_frequencies, render_subset_wordcloud, save_term_frequencies,
+                                       wordcloud_path)
 
 # --- chemins ---
 HERE = Path(__file__).resolve().parent                   # analysis/
@@ -29,133 +43,250 @@ GRAPH_FR = OUTPUTS_DIR / "tarot_graph_fr.json"
 GRAPH_EN = OUTPUTS_DIR / "tarot_graph_en.json"
 STATS_FR = OUTPUTS_DIR / "stats_summary_fr.json"
 STATS_EN = OUTPUTS_DIR / "stats_summary_en.json"
-WC_FR = ASSETS_DIR / "wordcloud_fr.png"
+LAYOUT_FR = OUTPUTS_DIR / "tarot_layout_fr.json"
+LAYOUT_EN = OUTPUTS_DIR / "tarot_layout_en.json"
+GRAPH_NPZ_FR = OUTPUTS_DIR / "tarot_graph_fr.npz"   # arêtes + layout (+ table tarot_graph_fr.nodes.json)
+GRAPH_NPZ_EN = OUTPUTS_DIR / "tarot_graph_en.npz"
+METRICS_FR = OUTPUTS_DIR / "tarot_graph_fr.metrics.npz"   # centralités, communautés, plus courts chemins
+METRICS_EN = OUTPUTS_DIR / "tarot_graph_en.metrics.npz"
+EMB_FR = OUTPUTS_DIR / "embeddings_fr.npy"   # + index embeddings_fr.json (carte, hash du texte)
+EMB_EN = OUTPUTS_DIR / "embeddings_en.npy"
+CORPUS_FR = OUTPUTS_DIR / "corpus_fr.json"          # deck Excel + fiches Kaggle, en colonnes
+CORPUS_EN = OUTPUTS_DIR / "corpus_en.json"
+TF_FR = OUTPUTS_DIR / "term_freqs_fr.json"          # tokens normalisés + fréquences par carte/champ
+TF_EN = OUTPUTS_DIR / "term_freqs_en.json"
+WC_FR = ASSETS_DIR / "wordcloud_fr.png"             # + wordcloud_fr_<sous-ensemble>.png
 WC_EN = ASSETS_DIR / "wordcloud_en.png"
+WC_CACHE_DIR = OUTPUTS_DIR / "wordclouds"           # hash des fréquences de chaque image rendue
+LEMMA_CACHE_DIR = OUTPUTS_DIR / "lemmas"            # lemmes spaCy par hash de texte (lemmas_fr.json…)
 MANIFEST = OUTPUTS_DIR / "manifest.json"
 
-# --- stopwords FR additionnels ---
-STOP_FR_EXTRA = {
-    "les","des","pour","avec","sans","dans","entre","ainsi","comme","plus",
-    "aussi","afin","sous","sur","vers","chez","dont","cette","cet","cela",
-    "celles","ceux","celui","celles-ci","ceci","lors","tandis","alors","être",
-    "tout","toute","toutes","tous","lorsque","car","par","au","aux","du",
-    "de","la","le","un","une","et","ou","se","sa","son","ses","leur","leurs",
-    "elle","il","ils","elles","on","que","qui","quand", "à", "ton", "par", "te",
-    "carte","symbolise","évoque","représente","invite","parle","indique",
-    "en","vers","est","c’est","peut","souvent","met","après","tu","incarne","envers"
-}
+def write_layout(graph_path: Path, out_path: Path, seed: int = 42):
+    # Positions calculées une fois ici plutôt qu'à chaque affichage de la page /graph ;
+    # le hash du graphe permet à l'app d'ignorer un layout périmé.
+    with open(graph_path, encoding="utf-8") as f:
+        G = nx.node_link_graph(json.load(f), edges="links")
+    pos = nx.spring_layout(G, seed=seed)
+    layout = {
+        "graph_hash": sha256_file(graph_path),
+        "seed": seed,
+        "positions": {node: [round(float(x), 6), round(float(y), 6)] for node, (x, y) in pos.items()},
+    }
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(layout, f, ensure_ascii=False)
 
-STOP_EN_EXTRA = {
-    "card","reversed","shows","suggests","indicates","means",
-    "represents","symbolize","bring","warns","message","tells",
-    "this","that","can","often"
+# --- paramètres des étapes (inclus dans leur clé de cache) ---
+# termes de contenu communs (stopwords exclus) : au moins 1, en gardant les 5 voisins les plus forts
+GRAPH_PARAMS = {"text_col": "description", "metric": "overlap", "threshold": 1, "top_k": 5}
+LAYOUT_PARAMS = {"seed": 42}
+METRICS_PARAMS = {"seed": 42}   # graine de Louvain (communautés reproductibles)
+# "tokens" (expressions régulières) ou "lemmas" (spaCy, --lemmas) : le graphe et les wordclouds suivent
+TERMS_PARAMS = {"analyzer": "tokens"}
+EMBEDDING_PARAMS = {"model_name": EMBEDDING_MODEL}
+
+LANGUAGES = {
+    "fr": {"label": "FR", "xlsx": DATA_FR, "corpus": CORPUS_FR, "terms": TF_FR, "graph": GRAPH_FR, "layout": LAYOUT_FR, "graph_npz": GRAPH_NPZ_FR,
+           "graph_metrics": METRICS_FR, "stats": STATS_FR, "embeddings": EMB_FR, "wordcloud": WC_FR},
+    "en": {"label": "EN", "xlsx": DATA_EN, "corpus": CORPUS_EN, "terms": TF_EN, "graph": GRAPH_EN, "layout": LAYOUT_EN, "graph_npz": GRAPH_NPZ_EN,
+           "graph_metrics": METRICS_EN, "stats": STATS_EN, "embeddings": EMB_EN, "wordcloud": WC_EN},
 }
 
-def normalize_text(s: str) -> str:
-    if not isinstance(s, str):
-        return ""
-    s = re.sub(r"http\S+", " ", s)                       # URLs
-    s = re.sub(r"[^\w’'\- ]+", " ", s, flags=re.UNICODE) # ponctuation
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
-
-def gather_corpus(df: pd.DataFrame) -> str:
-    # Concatène description + mots-clés si présents
-    cols = [c for c in df.columns if c.lower() in {
-        "description","keywords_general","keywords_upright","keywords_reversed","reversed_meaning","upright_meaning"
-    }]
-    if cols:
-        parts = [df[c].astype(str) for c in cols]
-        all_text = " . ".join([" ".join(p) for p in parts])
-    else:
-        all_text = " ".join(df.astype(str).fillna("").agg(" ".join, axis=1))
-    return normalize_text(all_text)
-
-def make_wordcloud(text: str, lang_code: str, out_path: Path):
-    # 1) normalisation légère
-    if not isinstance(text, str):
-        text = ""
-    # normaliser apostrophes typographiques et minuscules
-    text = text.replace("’", "'").lower()
-
-    # 2) contractions spécifiques
-    if lang_code.lower() == "fr":
-        # enlever formes contractées FR communes
-        for x in ["d'", "l'", "qu'", "n'", "s'", "j'", "t'", "m'", "c'"]:
-            text = text.replace(x, " ")
-    else:
-        # enlever le possessif anglais
-        text = text.replace("'s ", " ")
-
-    # 3) stopwords
-    sw = set(STOPWORDS)
-    if lang_code.lower() == "en":
-        sw |= STOP_EN_EXTRA
-    elif lang_code.lower() == "fr":
-        sw |= STOP_FR_EXTRA
-
-    # 4) génération
-    wc = WordCloud(
-        width=1600,
-        height=1000,
-        background_color="white",
-        stopwords=sw,
-        collocations=True,   # conserve certaines bigrammes utiles
-        max_words=300,
-        random_state=42      # reproductible
-        # font_path="assets/DejaVuSans.ttf",  # ← décommente si accents mal rendus
-    ).generate(text)
-
-    # 5) export
-    wc.to_file(str(out_path))
-
-def process_language(lang_label: str, xlsx_path: Path, out_graph: Path, out_stats: Path, out_wc: Path):
-    print(f"[{lang_label}] Lecture :", xlsx_path)
-    df = pd.read_excel(xlsx_path)
-
-    # Wordcloud
-    corpus = gather_corpus(df)
-    print(f"[{lang_label}] Génération du wordcloud -> {out_wc}")
-    make_wordcloud(corpus, lang_label.lower(), out_wc)
-
-    # Graphe + stats
-    print(f"[{lang_label}] Calcul du graphe + stats …")
-    graph = build_graph(df)
-    stats = compute_embeddings(df)
-
-    print(f"[{lang_label}] Sauvegarde -> {out_graph}, {out_stats}")
+# le code des étapes fait partie de leurs entrées : le modifier invalide les sorties
+CODE_FILES = [HERE / "run_analysis.py", HERE / "corpus.py", HERE / "semantic_utils.py", HERE / "text_frequencies.py"]
+
+# --- étapes (fonctions de niveau module : exécutées dans un pool de processus) ---
+# seule l'étape corpus lit le fichier Excel ; les suivantes relisent le corpus en colonnes
+def stage_corpus(lang: str, xlsx_path: Path, kaggle_path: Path, out_corpus: Path):
+    corpus.save_corpus(corpus.build_corpus(xlsx_path, lang, kaggle_path), out_corpus)
+
+def stage_terms(lang: str, corpus_path: Path, out_terms: Path, params: dict, cache_dir: Path, n_process: int = 1):
+    df = corpus.load_frame(corpus_path)
+    analyzer = None
+    if params["analyzer"] == "lemmas":
+        analyzer = lemmas.Lemmatizer(lang, params["model"], Path(cache_dir) / f"lemmas_{lang}.json",
+                                     STOPWORDS_BY_LANG[lang], n_process=n_process)
+    save_term_frequencies(build_term_frequencies(df, lang, analyzer), out_terms)
+    if analyzer is not None and analyzer.stats:
+        print(f"[{lang}/terms] {analyzer.stats['model']} : {analyzer.stats['lemmatized']} textes lemmatisés, "
+              f"{analyzer.stats['reused']} repris du cache")
+
+def stage_wordcloud(terms_path: Path, subset: str, assets_dir: Path, cache_dir: Path):
+    render_subset_wordcloud(load_term_frequencies(terms_path), subset, assets_dir, cache_dir)
+
+def stage_graph(corpus_path: Path, terms_path: Path, out_graph: Path, params: dict):
+    df = corpus.load_frame(corpus_path)
+    tokens = card_terms(load_term_frequencies(terms_path), params["text_col"])
+    graph = build_graph(df, tokens=tokens, **params)
     with open(out_graph, "w", encoding="utf-8") as f:
         json.dump(graph, f, indent=2, ensure_ascii=False)
+
+def stage_layout(graph_path: Path, out_layout: Path, params: dict):
+    write_layout(graph_path, out_layout, **params)
+
+def stage_graph_npz(graph_path: Path, layout_path: Path, out_npz: Path):
+    write_compact_graph(graph_path, layout_path, out_npz)
+
+def stage_graph_metrics(graph_npz: Path, out_metrics: Path, params: dict):
+    write_graph_metrics(graph_npz, out_metrics, **params)
+
+def stage_stats(corpus_path: Path, out_stats: Path):
+    # statistiques du corpus seules : pas d'encodeur, l'étape ne dépend pas du réseau
+    stats = compute_embeddings(corpus.load_frame(corpus_path))
     with open(out_stats, "w", encoding="utf-8") as f:
         json.dump(stats, f, indent=2, ensure_ascii=False)
 
-def main():
+def stage_embeddings(corpus_path: Path, out_emb: Path, params: dict):
+    stats = compute_embeddings(corpus.load_frame(corpus_path), out_emb, **params)
+    print(f"[embeddings] {stats['embedding_model']} : {stats['encoded']} textes encodés, {stats['reused']} repris")
+
+def language_stages(lang: str, paths: dict = None, terms_params: dict = None, n_process: int = 1) -> list:
+    # `paths` : chemins d'entrée/sortie de la langue (LANGUAGES[lang] par défaut, ex. dossier temporaire)
+    # `n_process` : processus spaCy de l'étape terms (hors clé de cache : le résultat n'en dépend pas)
+    paths = paths or LANGUAGES[lang]
+    terms_params = terms_params or TERMS_PARAMS
+    if terms_params["analyzer"] == "lemmas" and "model" not in terms_params:
+        # modèle résolu avant le calcul de la clé : changer (ou retirer) le modèle relance l'étape
+        terms_params = {**terms_params, "model": lemmas.installed_model(lang)}
+    assets_dir = paths.get("assets_dir", ASSETS_DIR)
+    cache_dir = paths.get("wordcloud_cache", WC_CACHE_DIR)
+    kaggle_path = paths.get("kaggle", corpus.KAGGLE_JSON)
+    return [
+        Stage(f"{lang}/corpus", stage_corpus,
+              {"lang": lang, "xlsx_path": paths["xlsx"], "kaggle_path": kaggle_path, "out_corpus": paths["corpus"]},
+              inputs=[paths["xlsx"], kaggle_path, *CODE_FILES], outputs=[paths["corpus"]]),
+        Stage(f"{lang}/terms", stage_terms,
+              {"lang": lang, "corpus_path": paths["corpus"], "out_terms": paths["terms"], "params": terms_params,
+               "cache_dir": paths.get("lemma_cache", LEMMA_CACHE_DIR), "n_process": n_process},
+              inputs=[paths["corpus"], HERE / "lemmas.py", *CODE_FILES], outputs=[paths["terms"]],
+              params=terms_params, deps=[f"{lang}/corpus"]),
+        # corpus complet + sous-ensembles standard (arcanes, couleurs, endroit/envers), rendus en parallèle
+        *(
+            Stage(f"{lang}/wordcloud" + ("" if subset == "all" else f"_{subset}"), stage_wordcloud,
+                  {"terms_path": paths["terms"], "subset": subset, "assets_dir": assets_dir, "cache_dir": cache_dir},
+                  inputs=[paths["terms"], *CODE_FILES], outputs=[wordcloud_path(assets_dir, lang, subset)],
+                  params={"subset": subset}, deps=[f"{lang}/terms"])
+            for subset in SUBSETS
+        ),
+        Stage(f"{lang}/graph", stage_graph,
+              {"corpus_path": paths["corpus"], "terms_path": paths["terms"], "out_graph": paths["graph"],
+               "params": GRAPH_PARAMS},
+              inputs=[paths["corpus"], paths["terms"], *CODE_FILES], outputs=[paths["graph"]],
+              params=GRAPH_PARAMS, deps=[f"{lang}/terms"]),
+        Stage(f"{lang}/layout", stage_layout,
+              {"graph_path": paths["graph"], "out_layout": paths["layout"], "params": LAYOUT_PARAMS},
+              inputs=[paths["graph"], *CODE_FILES], outputs=[paths["layout"]], params=LAYOUT_PARAMS,
+              deps=[f"{lang}/graph"]),
+        Stage(f"{lang}/graph_npz", stage_graph_npz,
+              {"graph_path": paths["graph"], "layout_path": paths["layout"], "out_npz": paths["graph_npz"]},
+              inputs=[paths["graph"], paths["layout"], HERE / "graph_artifact.py", *CODE_FILES],
+              outputs=[paths["graph_npz"], nodes_table_path(paths["graph_npz"])],
+              deps=[f"{lang}/graph", f"{lang}/layout"]),
+        Stage(f"{lang}/graph_metrics", stage_graph_metrics,
+              {"graph_npz": paths["graph_npz"], "out_metrics": paths["graph_metrics"], "params": METRICS_PARAMS},
+              inputs=[paths["graph_npz"], nodes_table_path(paths["graph_npz"]), HERE / "graph_artifact.py", *CODE_FILES],
+              outputs=[paths["graph_metrics"]], params=METRICS_PARAMS, deps=[f"{lang}/graph_npz"]),
+        Stage(f"{lang}/stats", stage_stats,
+              {"corpus_path": paths["corpus"], "out_stats": paths["stats"]},
+              inputs=[paths["corpus"], *CODE_FILES], outputs=[paths["stats"]], deps=[f"{lang}/corpus"]),
+        Stage(f"{lang}/embeddings", stage_embeddings,
+              {"corpus_path": paths["corpus"], "out_emb": paths["embeddings"], "params": EMBEDDING_PARAMS},
+              inputs=[paths["corpus"], *CODE_FILES], outputs=[paths["embeddings"]],
+              params=EMBEDDING_PARAMS, deps=[f"{lang}/corpus"]),
+    ]
+
+def stage_images():
+    build_images.build_images()
+
+def stage_waite():
+    # le pipeline a déjà comparé les hash (PDF + code) : reconstruction inconditionnelle
+    waite_index.ingest(force=True)
+
+def shared_stages(langs=()) -> list:
+    # étapes indépendantes de la langue ; les images suivent le corpus EN s'il est reconstruit ici.
+    # Les sources de chaque carte ne sont résolues qu'à l'exécution (corpus à jour) : la clé couvre
+    # le corpus et les dossiers d'images entiers, hashés au moment de l'ordonnancement.
+    return [
+        Stage("images/build", stage_images, {},
+              inputs=[build_images.CORPUS, HERE / "build_images.py", *build_images.SOURCE_DIRS],
+              outputs=[build_images.MANIFEST], deps=["en/corpus"] if "en" in langs else []),
+        Stage("waite/index", stage_waite, {},
+              inputs=[waite_index.PDF_PATH, HERE / "waite_index.py"],
+              outputs=[waite_index.OUT_DIR / name for name in waite_index.INDEX_FILES]),
+    ]
+
+def process_language(lang_label: str, force: bool = True, jobs: int = 1, paths: dict = None) -> dict:
+    # Toutes les étapes d'une langue, dans le processus courant (sans cache par défaut)
+    return run_pipeline(language_stages(lang_label.lower(), paths), root=ROOT, jobs=jobs, force=force)
+
+def load_manifest() -> dict:
+    try:
+        with open(MANIFEST, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse Tarot (FR/EN) : graphe, layout, embeddings, wordclouds")
+    parser.add_argument("--lang", choices=sorted(LANGUAGES), action="append",
+                        help="langue(s) à traiter (défaut : toutes)")
+    parser.add_argument("--jobs", type=int, default=None, help="taille du pool de processus (1 = séquentiel)")
+    parser.add_argument("--force", action="store_true", help="reconstruire même si les entrées n'ont pas changé")
+    parser.add_argument("--lemmas", action="store_true",
+                        help="graphe et wordclouds sur les lemmes spaCy (noms, adjectifs, verbes) plutôt que les tokens")
+    parser.add_argument("--nlp-procs", type=int, default=1, help="processus spaCy par langue (nlp.pipe n_process)")
+    args = parser.parse_args(argv)
+
     print("=== Lancement de l'analyse Tarot (FR/EN) ===")
+    t0 = time.perf_counter()
+    langs = args.lang or list(LANGUAGES)
+    previous = load_manifest()
+    # artefacts publiés par groupe d'étapes (une entrée du manifest par groupe)
+    groups = {
+        lang: {key: paths[key] for key in ("corpus", "terms", "graph", "layout", "graph_npz", "graph_metrics",
+                                        "stats", "embeddings", "wordcloud")}
+        for lang, paths in LANGUAGES.items()
+    }
+    groups["images"] = {"manifest": build_images.MANIFEST}
+    groups["waite"] = {"index": waite_index.OUT_DIR / waite_index.META}
+    previous_stages = {
+        f"{group}/{name}": record
+        for group in groups
+        for name, record in previous.get(group, {}).get("stages", {}).items()
+    }
+
+    terms_params = {**TERMS_PARAMS, "analyzer": "lemmas"} if args.lemmas else TERMS_PARAMS
+    stages = [stage for lang in langs for stage in language_stages(lang, terms_params=terms_params,
+                                                                     n_process=args.nlp_procs)]
+    stages += shared_stages(langs)
+    records = run_pipeline(stages, previous_stages, root=ROOT, jobs=args.jobs, force=args.force)
 
-    # FR
-    process_language("FR", DATA_FR, GRAPH_FR, STATS_FR, WC_FR)
-
-    # EN
-    process_language("EN", DATA_EN, GRAPH_EN, STATS_EN, WC_EN)
-
-    # Manifest récapitulatif (pratique pour l’app)
-    manifest = {
-        "fr": {
-            "graph": str(GRAPH_FR.relative_to(ROOT)),
-            "stats": str(STATS_FR.relative_to(ROOT)),
-            "wordcloud": str(WC_FR.relative_to(ROOT)),
-        },
-        "en": {
-            "graph": str(GRAPH_EN.relative_to(ROOT)),
-            "stats": str(STATS_EN.relative_to(ROOT)),
-            "wordcloud": str(WC_EN.relative_to(ROOT)),
-        },
+    # Manifest récapitulatif (pratique pour l’app) : chemins + hash d'entrée et durée de chaque étape
+    manifest = {}
+    for group, artifacts in groups.items():
+        entry = {key: str(path.relative_to(ROOT)) for key, path in artifacts.items()}
+        entry["stages"] = dict(previous.get(group, {}).get("stages", {}))
+        entry["stages"].update({
+            name.split("/", 1)[1]: record for name, record in records.items() if name.startswith(f"{group}/")
+        })
+        manifest[group] = entry
+    manifest["build"] = {
+        "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "total_seconds": round(time.perf_counter() - t0, 3),
+        "jobs": args.jobs or os.cpu_count(),
+        "built": sorted(n for n, r in records.items() if r["status"] == "built"),
+        "skipped": sorted(n for n, r in records.items() if r["status"] == "skipped"),
+        "failed": sorted(n for n, r in records.items() if r["status"] == "failed"),
     }
     with open(MANIFEST, "w", encoding="utf-8") as f:
         json.dump(manifest, f, indent=2, ensure_ascii=False)
 
-    print("✅ Analyse terminée.")
+    failed = manifest["build"]["failed"]
+    if failed:
+        for name in failed:
+            print(f"❌ {name} : {records[name].get('error')}")
+    print("✅ Analyse terminée." if not failed else "⚠️ Analyse terminée avec des erreurs.")
     print("Manifest :", MANIFEST)
+    return 1 if failed else 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,20 +1,167 @@
-import networkx as nx
+import hashlib
+import json
+import os
+from pathlib import Path
+
 import numpy as np
 
-def build_graph(df):
+# modèle multilingue : FR et EN partagent le même espace vectoriel (référence unique, lue aussi
+# par semantic_search.py : networkx et scipy ne sont importés que par les fonctions de graphe)
+EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+EMBEDDING_FIELDS = ("description", "keywords_general", "keywords_upright", "keywords_reversed")
+
+def tokenize(text):
+    return str(text).split()
+
+def document_term_matrix(texts, tokenizer=tokenize):
+    # matrice documents x termes binaire (CSR), chaque texte n'est tokenisé qu'une fois
+    import scipy.sparse as sp
+
+    vocab = {}
+    indices, indptr = [], [0]
+    for text in texts:
+        indices.extend({vocab.setdefault(tok, len(vocab)) for tok in tokenizer(text)})
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.int32)
+    X = sp.csr_matrix((data, np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)),
+                      shape=(len(texts), len(vocab)))
+    return X, vocab
+
+def pairwise_similarity(X, metric="overlap"):
+    # toutes les paires en un seul produit creux ; ne garde que le triangle supérieur (i < j)
+    import scipy.sparse as sp
+
+    overlap = sp.triu(X @ X.T, k=1).tocoo()
+    rows, cols = overlap.row, overlap.col
+    weights = overlap.data.astype(np.float64)
+    if metric == "jaccard":
+        sizes = np.asarray(X.sum(axis=1)).ravel()
+        weights = weights / (sizes[rows] + sizes[cols] - weights)
+    elif metric != "overlap":
+        raise ValueError(f"Métrique inconnue : {metric!r} (attendu 'overlap' ou 'jaccard')")
+    return rows, cols, weights
+
+def top_k_mask(rows, cols, weights, n, k):
+    # une arête est conservée si elle fait partie des k plus fortes de l'une de ses extrémités
+    src = np.concatenate([rows, cols])
+    w = np.concatenate([weights, weights])
+    order = np.lexsort((-w, src))
+    starts = np.searchsorted(src[order], np.arange(n))
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order)) - np.repeat(starts, np.diff(np.append(starts, len(order))))
+    keep = rank < k
+    return keep[:len(rows)] | keep[len(rows):]
+
+def build_graph(df, text_col="description", metric="overlap", threshold=3, top_k=None, tokens=None):
+    # relier par cooccurrence de mots (>= threshold mots communs par défaut) ;
+    # `tokens` : termes déjà normalisés par carte (text_frequencies), sinon simple découpage du texte
+    import networkx as nx
+
     G = nx.Graph()
-    for _, row in df.iterrows():
-        G.add_node(row["card"], meaning=row["description"])
-    # exemple simplifié : relier par cooccurrence de mots
-    for i, r1 in df.iterrows():
-        for j, r2 in df.iterrows():
-            if i < j and len(set(r1["description"].split()) & set(r2["description"].split())) > 2:
-                G.add_edge(r1["card"], r2["card"])
-    return nx.node_link_data(G)
-
-def compute_embeddings(df):
-    return {
+    cards = df["card"].tolist()
+    for card, meaning in zip(cards, df[text_col]):
+        G.add_node(card, meaning=meaning)
+
+    if tokens is not None:
+        X, _ = document_term_matrix(tokens, tokenizer=list)
+    else:
+        X, _ = document_term_matrix(df[text_col].fillna("").tolist())
+    rows, cols, weights = pairwise_similarity(X, metric)
+    keep = weights >= threshold
+    rows, cols, weights = rows[keep], cols[keep], weights[keep]
+    if top_k is not None:
+        keep = top_k_mask(rows, cols, weights, len(cards), top_k)
+        rows, cols, weights = rows[keep], cols[keep], weights[keep]
+
+    G.add_weighted_edges_from(
+        (cards[i], cards[j], round(float(w), 6)) for i, j, w in zip(rows.tolist(), cols.tolist(), weights)
+    )
+    return nx.node_link_data(G, edges="links")
+
+def card_texts(df, fields=EMBEDDING_FIELDS):
+    # description + mots-clés, concaténés dans un seul texte par carte
+    cols = [c for c in fields if c in df.columns]
+    return [
+        " . ".join(str(v) for v in row if isinstance(v, str) and v.strip())
+        for row in df[cols].itertuples(index=False, name=None)
+    ]
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def embedding_index_path(npy_path):
+    # index des lignes (carte + hash du texte) à côté de la matrice : embeddings_fr.npy -> embeddings_fr.json
+    return Path(npy_path).with_suffix(".json")
+
+def load_embedding_cache(npy_path, model_name):
+    # vecteurs déjà calculés, indexés par hash de texte (vide si modèle différent ou fichiers absents)
+    try:
+        with open(embedding_index_path(npy_path), encoding="utf-8") as f:
+            index = json.load(f)
+        matrix = np.load(npy_path, mmap_mode="r")
+    except (OSError, ValueError):
+        return {}
+    if index.get("model") != model_name or len(index.get("rows", [])) != len(matrix):
+        return {}
+    return {row["hash"]: np.array(matrix[i]) for i, row in enumerate(index["rows"])}
+
+def save_embeddings(npy_path, matrix, cards, hashes, model_name):
+    # écriture atomique : l'app peut avoir la matrice précédente ouverte en mmap
+    npy_path = Path(npy_path)
+    tmp = npy_path.with_name(npy_path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, matrix)
+    os.replace(tmp, npy_path)
+    index = {
+        "model": model_name,
+        "dim": int(matrix.shape[1]),
+        "normalized": True,
+        "rows": [{"card": c, "hash": h} for c, h in zip(cards, hashes)],
+    }
+    tmp = npy_path.with_name(npy_path.name + ".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, embedding_index_path(npy_path))
+
+def compute_embeddings(df, out_path=None, model_name=EMBEDDING_MODEL, batch_size=32, model=None):
+    stats = {
         "num_cards": len(df),
         "avg_length": np.mean(df["description"].str.len())
     }
+    if out_path is None:
+        return stats
+
+    texts = card_texts(df)
+    hashes = [text_hash(t) for t in texts]
+    cached = load_embedding_cache(out_path, model_name)
+    todo = [i for i, h in enumerate(hashes) if h not in cached]
+
+    vectors = dict(cached)
+    if todo:
+        if model is None:
+            # import tardif : torch n'est chargé que s'il reste des textes à encoder
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_name, device="cpu")
+        encoded = model.encode(
+            [texts[i] for i in todo],
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        for i, vec in zip(todo, encoded):
+            vectors[hashes[i]] = vec
+
+    dim = len(next(iter(vectors.values()))) if vectors else 0
+    matrix = np.empty((len(texts), dim), dtype=np.float32)
+    for i, h in enumerate(hashes):
+        matrix[i] = vectors[h]
+    save_embeddings(out_path, matrix, df["card"].tolist(), hashes, model_name)
 
+    stats.update({
+        "embedding_model": model_name,
+        "embedding_dim": dim,
+        "encoded": len(todo),
+        "reused": len(texts) - len(todo),
+    })
+    return stats
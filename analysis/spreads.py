@@ -0,0 +1,268 @@
+# analysis/spreads.py
+# Simulation Monte Carlo de tirages (une carte, trois cartes, fer à cheval, croix celtique) :
+# échantillonnage vectorisé NumPy par blocs (mémoire bornée), graine reproductible, et agrégats
+# calculés par opérations sur tableaux — fréquences, cooccurrences, équilibre couleurs/arcanes,
+# liens du graphe symbolique et similarité sémantique moyenne au sein d'un tirage.
+# `python -m analysis.spreads --lang fr --spread celtic_cross -n 1000000` écrit un rapport JSON.
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+
+HERE = Path(__file__).resolve().parent                   # analysis/
+OUTPUTS_DIR = HERE / "outputs"
+
+SPREADS = {"single": 1, "three": 3, "horseshoe": 7, "celtic_cross": 10}
+SUITS = ("major", "cups", "wands", "swords", "pentacles")
+DEFAULT_CHUNK = 1 << 16                                   # tirages par bloc
+SIMILARITY_BINS = np.linspace(-1.0, 1.0, 41)             # histogramme des similarités moyennes
+
+
+def suit_code(suit) -> int:
+    # colonne `suit` du corpus (fiches Kaggle) : "Trump" pour les arcanes majeurs
+    suit = str(suit or "").strip().lower()
+    return SUITS.index(suit) if suit in SUITS else 0
+
+
+def spread_size(spread) -> int:
+    if isinstance(spread, int):
+        return spread
+    if spread not in SPREADS:
+        raise ValueError(f"Tirage inconnu : {spread!r} (attendu : {', '.join(SPREADS)})")
+    return SPREADS[spread]
+
+
+def sample_spreads(rng, n: int, n_cards: int, size: int) -> np.ndarray:
+    """(n, size) indices de cartes, sans remise dans chaque tirage, dans un ordre aléatoire."""
+    if not 0 < size <= n_cards:
+        raise ValueError(f"Tirage de {size} cartes impossible sur {n_cards}")
+    # clés aléatoires : les `size` plus petites désignent les cartes, leur rang donne les positions
+    keys = rng.random((n, n_cards), dtype=np.float32)
+    picked = np.argpartition(keys, size - 1, axis=1)[:, :size]
+    order = np.argsort(np.take_along_axis(keys, picked, axis=1), axis=1)
+    return np.take_along_axis(picked, order, axis=1).astype(np.int16)
+
+
+class SpreadStats:
+    """Agrégats cumulés bloc après bloc : aucun tableau ne dépend du nombre total de tirages."""
+
+    def __init__(self, n_cards: int, size: int):
+        self.n_cards = n_cards
+        self.size = size
+        self.spreads = 0
+        self.card_counts = np.zeros(n_cards, dtype=np.int64)
+        self.reversed_counts = np.zeros(n_cards, dtype=np.int64)
+        self.position_counts = np.zeros((size, n_cards), dtype=np.int64)
+        self.pair_counts = np.zeros(n_cards * n_cards, dtype=np.int64)   # triangle supérieur (i < j)
+        self.suit_totals = np.zeros(len(SUITS), dtype=np.int64)
+        self.major_hist = np.zeros(size + 1, dtype=np.int64)             # tirages par nombre d'arcanes majeurs
+        self.edge_hist = np.zeros(size * (size - 1) // 2 + 1, dtype=np.int64)
+        self.edge_weight_sum = 0.0
+        self.similarity_sum = 0.0
+        self.similarity_sumsq = 0.0
+        self.similarity_hist = np.zeros(len(SIMILARITY_BINS) - 1, dtype=np.int64)
+
+    def cooccurrence(self) -> np.ndarray:
+        """Matrice symétrique (n_cards, n_cards) : nombre de tirages contenant chaque paire."""
+        upper = self.pair_counts.reshape(self.n_cards, self.n_cards)
+        return upper + upper.T
+
+    def to_dict(self, names, top: int = 20) -> dict:
+        n = max(self.spreads, 1)
+        pairs = self.pair_counts.reshape(self.n_cards, self.n_cards)
+        best = np.argsort(pairs, axis=None)[::-1][:top]
+        report = {
+            "spreads": self.spreads,
+            "size": self.size,
+            # "positions" : nombre de sorties de la carte à chaque position du tirage
+            "cards": {names[i]: {"count": int(c), "reversed": int(r), "positions": p.tolist()}
+                      for i, (c, r, p) in enumerate(zip(self.card_counts, self.reversed_counts,
+                                                        self.position_counts.T))},
+            "top_pairs": [{"cards": [names[i], names[j]], "count": int(pairs[i, j]), "rate": pairs[i, j] / n}
+                          for i, j in zip(*np.unravel_index(best, pairs.shape)) if pairs[i, j]],
+            "suits": dict(zip(SUITS, (self.suit_totals / (n * self.size)).round(6).tolist())),
+            "major_arcana_per_spread": self.major_hist.tolist(),
+        }
+        if self.size > 1:
+            n_pairs = n * self.size * (self.size - 1) // 2
+            report["graph"] = {"edges_per_spread": self.edge_hist.tolist(),
+                               "mean_edge_weight_per_pair": self.edge_weight_sum / n_pairs}
+            if self.similarity_hist.any():
+                mean = self.similarity_sum / n
+                report["similarity"] = {
+                    "mean": mean,
+                    "std": max(self.similarity_sumsq / n - mean * mean, 0.0) ** 0.5,
+                    "bins": SIMILARITY_BINS.round(3).tolist(),
+                    "hist": self.similarity_hist.tolist(),
+                }
+        return report
+
+
+class SpreadSimulator:
+    """
+    Tirages sur une collection de cartes. `adjacency` : poids des arêtes du graphe symbolique
+    (n, n), 0 sans arête ; `similarity` : similarités cosinus (n, n), ou None si pas d'embeddings.
+    """
+
+    def __init__(self, cards, suits=None, adjacency=None, similarity=None):
+        self.cards = list(cards)
+        n = len(self.cards)
+        self.suits = np.zeros(n, dtype=np.int8) if suits is None else np.asarray([suit_code(s) for s in suits], np.int8)
+        self.adjacency = np.zeros((n, n), np.float32) if adjacency is None else np.asarray(adjacency, np.float32)
+        self.similarity = None if similarity is None else np.asarray(similarity, np.float32)
+
+    @classmethod
+    def from_artifacts(cls, cards, suits=None, graph=None, embeddings=None, embedding_cards=()):
+        """Depuis un GraphArtifact (arêtes indexées) et une matrice d'embeddings normalisés, réalignés sur `cards`."""
+        cards = list(cards)
+        index = {c: i for i, c in enumerate(cards)}
+        adjacency = np.zeros((len(cards), len(cards)), np.float32)
+        if graph is not None and graph.number_of_edges():
+            # indices du graphe -> indices de la collection (-1 : nœud absent du corpus)
+            remap = np.array([index.get(node, -1) for node in graph.nodes], dtype=np.int64)
+            s, d = remap[graph.src], remap[graph.dst]
+            keep = (s >= 0) & (d >= 0)
+            adjacency[s[keep], d[keep]] = graph.weight[keep]
+            adjacency[d[keep], s[keep]] = graph.weight[keep]
+        similarity = None
+        rows = {c: i for i, c in enumerate(embedding_cards)}
+        if embeddings is not None and all(c in rows for c in cards):
+            vectors = np.asarray(embeddings, np.float32)[[rows[c] for c in cards]]
+            similarity = vectors @ vectors.T
+        return cls(cards, suits, adjacency, similarity)
+
+    # --- tirages ---
+    def _chunks(self, n: int, size: int, seed, p_reversed: float, chunk_size: int):
+        # blocs (cartes (m, size) int16, renversées (m, size) bool) : un flux aléatoire indépendant par
+        # bloc (SeedSequence.spawn), si bien que (seed, chunk_size) fixent exactement les tirages
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size doit être positif : {chunk_size}")
+        n_chunks = -(-n // chunk_size) if n > 0 else 0
+        for k, child in enumerate(np.random.SeedSequence(seed).spawn(n_chunks)):
+            rng = np.random.default_rng(child)
+            m = min(chunk_size, n - k * chunk_size)
+            yield sample_spreads(rng, m, len(self.cards), size), rng.random((m, size)) < p_reversed
+
+    def draw(self, n: int, spread="three", seed=None, p_reversed: float = 0.5,
+             chunk_size: int = DEFAULT_CHUNK):
+        """(cartes (n, size) int16, renversées (n, size) bool) : N tirages, générés par blocs."""
+        size = spread_size(spread)
+        cards = np.empty((max(n, 0), size), np.int16)
+        reversed_ = np.empty((max(n, 0), size), bool)
+        for k, (c, r) in enumerate(self._chunks(n, size, seed, p_reversed, chunk_size)):
+            cards[k * chunk_size:k * chunk_size + len(c)] = c
+            reversed_[k * chunk_size:k * chunk_size + len(r)] = r
+        return cards, reversed_
+
+    def read(self, n: int, spread="three", seed=None, p_reversed: float = 0.5,
+             chunk_size: int = DEFAULT_CHUNK) -> list:
+        """N tirages lisibles (cartes, orientation, liens du graphe, similarité moyenne), générés par blocs."""
+        readings = []
+        for cards, reversed_ in self._chunks(n, spread_size(spread), seed, p_reversed, chunk_size):
+            edges, weight, similarity = self._pair_scores(cards)
+            readings.extend(
+                {
+                    "cards": [{"card": self.cards[c], "reversed": bool(r)} for c, r in zip(row, rev)],
+                    "graph_edges": None if edges is None else int(edges[k]),
+                    "graph_weight": None if weight is None else float(weight[k]),
+                    "similarity": None if similarity is None else float(similarity[k]),
+                }
+                for k, (row, rev) in enumerate(zip(cards.tolist(), reversed_.tolist()))
+            )
+        return readings
+
+    def simulate(self, n: int, spread="three", seed=None, p_reversed: float = 0.5,
+                 chunk_size: int = DEFAULT_CHUNK) -> SpreadStats:
+        """Agrégats sur `n` tirages, générés par blocs de `chunk_size` (mêmes tirages que `read`)."""
+        size = spread_size(spread)
+        stats = SpreadStats(len(self.cards), size)
+        for cards, reversed_ in self._chunks(n, size, seed, p_reversed, chunk_size):
+            self._accumulate(stats, cards, reversed_)
+        return stats
+
+    # --- agrégats vectorisés ---
+    def _pairs(self, cards):
+        # (m, P) indices (petit, grand) de chaque paire de positions i < j
+        i, j = np.triu_indices(cards.shape[1], k=1)
+        a, b = cards[:, i].astype(np.int64), cards[:, j].astype(np.int64)
+        return np.minimum(a, b), np.maximum(a, b)
+
+    def _pair_scores(self, cards):
+        # par tirage : arêtes du graphe entre ses cartes, poids moyen par paire, similarité moyenne
+        if cards.shape[1] < 2:
+            return None, None, None
+        lo, hi = self._pairs(cards)
+        weights = self.adjacency[lo, hi]
+        similarity = None if self.similarity is None else self.similarity[lo, hi].mean(axis=1)
+        return (weights > 0).sum(axis=1), weights.mean(axis=1), similarity
+
+    def _accumulate(self, stats, cards, reversed_):
+        n_cards, (m, size) = stats.n_cards, cards.shape
+        flat = cards.ravel().astype(np.int64)
+        stats.spreads += m
+        stats.card_counts += np.bincount(flat, minlength=n_cards)
+        stats.reversed_counts += np.bincount(flat, weights=reversed_.ravel(), minlength=n_cards).astype(np.int64)
+        stats.position_counts += np.bincount((np.arange(size) * n_cards + cards).ravel(),
+                                             minlength=size * n_cards).reshape(size, n_cards)
+        suits = self.suits[cards]
+        stats.suit_totals += np.bincount(suits.ravel(), minlength=len(SUITS))
+        stats.major_hist += np.bincount((suits == 0).sum(axis=1), minlength=size + 1)
+        if size < 2:
+            return
+        lo, hi = self._pairs(cards)
+        stats.pair_counts += np.bincount((lo * n_cards + hi).ravel(), minlength=n_cards * n_cards)
+        weights = self.adjacency[lo, hi]
+        stats.edge_hist += np.bincount((weights > 0).sum(axis=1), minlength=len(stats.edge_hist))
+        stats.edge_weight_sum += float(weights.sum(dtype=np.float64))
+        if self.similarity is not None:
+            mean = self.similarity[lo, hi].mean(axis=1, dtype=np.float64)
+            stats.similarity_sum += float(mean.sum())
+            stats.similarity_sumsq += float((mean * mean).sum())
+            stats.similarity_hist += np.histogram(mean, bins=SIMILARITY_BINS)[0]
+
+
+def load_simulator(lang: str, outputs_dir=OUTPUTS_DIR) -> SpreadSimulator:
+    """Simulateur sur les artefacts de run_analysis.py (corpus, graphe compact, embeddings s'ils existent)."""
+    from analysis.corpus import load_corpus
+    from analysis.graph_artifact import GraphArtifact
+
+    columns = load_corpus(outputs_dir / f"corpus_{lang}.json")["columns"]
+    graph = GraphArtifact.load(outputs_dir / f"tarot_graph_{lang}.npz")
+    embeddings, embedding_cards = None, ()
+    try:
+        with open(outputs_dir / f"embeddings_{lang}.json", encoding="utf-8") as f:
+            embedding_cards = [row["card"] for row in json.load(f)["rows"]]
+        embeddings = np.load(outputs_dir / f"embeddings_{lang}.npy", mmap_mode="r")
+    except (OSError, ValueError, KeyError):
+        print(f"Embeddings {lang} absents : similarité sémantique non calculée")
+    return SpreadSimulator.from_artifacts(columns["card"], columns.get("suit"), graph, embeddings, embedding_cards)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulation Monte Carlo de tirages de tarot")
+    parser.add_argument("--lang", choices=("fr", "en"), default="fr")
+    parser.add_argument("--spread", choices=sorted(SPREADS), default="three")
+    parser.add_argument("-n", type=int, default=1_000_000, help="nombre de tirages")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--p-reversed", type=float, default=0.5, help="probabilité qu'une carte soit renversée")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK, help="tirages par bloc (mémoire bornée)")
+    parser.add_argument("--out", type=Path, help="rapport JSON (défaut : sortie standard)")
+    args = parser.parse_args(argv)
+
+    simulator = load_simulator(args.lang)
+    stats = simulator.simulate(args.n, args.spread, args.seed, args.p_reversed, args.chunk_size)
+    report = {"lang": args.lang, "spread": args.spread, "seed": args.seed, "p_reversed": args.p_reversed,
+              "chunk_size": args.chunk_size, **stats.to_dict(simulator.cards)}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        args.out.write_text(text, encoding="utf-8")
+        print(f"{stats.spreads} tirages ({args.spread}) -> {args.out}")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
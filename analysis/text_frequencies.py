@@ -0,0 +1,169 @@
+# analysis/text_frequencies.py
+# Couche commune de tokenisation / fréquences de termes, calculée une fois par langue
+# et persistée : le graphe et les wordclouds (globaux ou par sous-ensemble) en dérivent.
+
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from pathlib import Path
+
+from wordcloud import STOPWORDS, WordCloud
+
+# --- stopwords FR additionnels ---
+STOP_FR_EXTRA = {
+    "les","des","pour","avec","sans","dans","entre","ainsi","comme","plus",
+    "aussi","afin","sous","sur","vers","chez","dont","cette","cet","cela",
+    "celles","ceux","celui","celles-ci","ceci","lors","tandis","alors","être",
+    "tout","toute","toutes","tous","lorsque","car","par","au","aux","du",
+    "de","la","le","un","une","et","ou","se","sa","son","ses","leur","leurs",
+    "elle","il","ils","elles","on","que","qui","quand", "à", "ton", "par", "te",
+    "carte","symbolise","évoque","représente","invite","parle","indique",
+    "en","vers","est","c’est","peut","souvent","met","après","tu","incarne","envers"
+}
+
+STOP_EN_EXTRA = {
+    "card","reversed","shows","suggests","indicates","means",
+    "represents","symbolize","bring","warns","message","tells",
+    "this","that","can","often"
+}
+
+STOPWORDS_BY_LANG = {
+    "fr": frozenset(STOPWORDS) | frozenset(w.replace("’", "'") for w in STOP_FR_EXTRA),
+    "en": frozenset(STOPWORDS) | frozenset(STOP_EN_EXTRA),
+}
+
+FR_ELISIONS = re.compile(r"\b(?:d|l|qu|n|s|j|t|m|c)'")
+WORD = re.compile(r"[^\W\d_][\w'\-]*[^\W_]|[^\W\d_]", re.UNICODE)
+
+# champs textuels par carte, et sous-ensembles de champs
+FIELDS = ("description", "keywords_general", "keywords_upright", "keywords_reversed",
+          "upright_meaning", "reversed_meaning")
+FIELD_GROUPS = {
+    "upright": ("keywords_upright", "upright_meaning"),
+    "reversed": ("keywords_reversed", "reversed_meaning"),
+}
+SUITS = ("cups", "wands", "swords", "pentacles")
+SUBSETS = ("all", "major", "minor", *SUITS, "upright", "reversed")
+
+def normalize_text(s: str) -> str:
+    if not isinstance(s, str):
+        return ""
+    s = re.sub(r"http\S+", " ", s)                       # URLs
+    s = re.sub(r"[^\w’'\- ]+", " ", s, flags=re.UNICODE) # ponctuation
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+def tokenize(text: str, lang: str) -> list:
+    # minuscules, apostrophes typographiques, contractions, stopwords
+    text = normalize_text(text).replace("’", "'").lower()
+    if lang == "fr":
+        text = FR_ELISIONS.sub(" ", text)
+    else:
+        text = text.replace("'s ", " ")
+    stop = STOPWORDS_BY_LANG.get(lang, STOPWORDS_BY_LANG["en"])
+    return [t.strip("-'") for t in WORD.findall(text) if len(t) > 1 and t not in stop]
+
+def card_suit(card: str) -> str:
+    # nom anglais (identifiant commun FR/EN) : "Five of Wands" -> "wands" ; arcanes majeurs -> "major"
+    name = card.lower()
+    return next((s for s in SUITS if name.endswith(f" of {s}")), "major")
+
+def build_term_frequencies(df, lang: str, analyzer=None) -> dict:
+    """
+    Fréquences par carte et par champ : {"lang", "analyzer", "cards": [{"card", "suit", "fields": {champ: {terme: n}}}]}.
+    `analyzer(textes)` -> une liste de termes par texte, appelé une seule fois sur tous les champs de toutes
+    les cartes (ex. lemmas.Lemmatizer, qui traite les textes par lots) ; par défaut : tokenize().
+    """
+    fields = [f for f in FIELDS if f in df.columns]
+    rows = df.to_dict("records")  # une entrée par ligne : alignée sur df (cf. build_graph)
+    texts = [row.get(f) for row in rows for f in fields]
+    terms = analyzer(texts) if analyzer is not None else [tokenize(t, lang) for t in texts]
+    cards = []
+    for r, row in enumerate(rows):
+        card = str(row.get("card", "")).strip()
+        cards.append({
+            "card": card,
+            "suit": card_suit(card),
+            "fields": {f: dict(Counter(terms[r * len(fields) + j])) for j, f in enumerate(fields)},
+        })
+    return {"lang": lang, "analyzer": getattr(analyzer, "name", "tokens"), "fields": fields, "cards": cards}
+
+def save_term_frequencies(tf: dict, path: Path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(tf, f, ensure_ascii=False)
+
+def load_term_frequencies(path: Path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def card_terms(tf: dict, field: str = "description") -> list:
+    # termes distincts d'un champ, dans l'ordre des cartes (entrée du graphe)
+    return [list(c["fields"].get(field, {})) for c in tf["cards"]]
+
+def subset_frequencies(tf: dict, subset: str = "all") -> Counter:
+    """Fréquences agrégées d'un sous-ensemble : all, major, minor, une couleur, upright, reversed."""
+    if subset not in SUBSETS:
+        raise ValueError(f"Sous-ensemble inconnu : {subset!r} (attendu : {', '.join(SUBSETS)})")
+    fields = FIELD_GROUPS.get(subset, tf["fields"])
+    if subset == "major":
+        cards = [c for c in tf["cards"] if c["suit"] == "major"]
+    elif subset == "minor":
+        cards = [c for c in tf["cards"] if c["suit"] != "major"]
+    elif subset in SUITS:
+        cards = [c for c in tf["cards"] if c["suit"] == subset]
+    else:
+        cards = tf["cards"]
+    total = Counter()
+    for c in cards:
+        for field in fields:
+            total.update(c["fields"].get(field, {}))
+    return total
+
+def frequencies_hash(freqs: Counter) -> str:
+    payload = json.dumps(sorted(freqs.items()), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def make_wordcloud(freqs: Counter, out_path: Path):
+    wc = WordCloud(
+        width=1600,
+        height=1000,
+        background_color="white",
+        max_words=300,
+        random_state=42      # reproductible
+        # font_path="assets/DejaVuSans.ttf",  # ← décommente si accents mal rendus
+    ).generate_from_frequencies(freqs or {"∅": 1})
+    # écriture atomique : Dash peut servir l'image pendant qu'une relance la régénère
+    out_path = Path(out_path)
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    wc.to_image().save(tmp, format="PNG", optimize=True)
+    os.replace(tmp, out_path)
+
+def wordcloud_path(assets_dir: Path, lang: str, subset: str = "all") -> Path:
+    # wordcloud_fr.png pour le corpus complet, wordcloud_fr_major.png, etc.
+    suffix = "" if subset == "all" else f"_{subset}"
+    return Path(assets_dir) / f"wordcloud_{lang}{suffix}.png"
+
+def render_subset_wordcloud(tf: dict, subset: str, assets_dir: Path, cache_dir: Path) -> Path:
+    """
+    Rendu d'un wordcloud de sous-ensemble, une seule fois : le hash des fréquences rendues est
+    conservé dans `cache_dir` (un fichier par image) et l'image est réutilisée tant qu'il ne change pas.
+    Appelé par le pipeline uniquement (une étape par sous-ensemble) ; l'app ne fait que lire.
+    """
+    freqs = subset_frequencies(tf, subset)
+    digest = frequencies_hash(freqs)
+    out_path = wordcloud_path(assets_dir, tf["lang"], subset)
+    digest_path = Path(cache_dir) / f"{out_path.stem}.sha256"
+    try:
+        if out_path.exists() and digest_path.read_text(encoding="utf-8").strip() == digest:
+            return out_path
+    except OSError:
+        pass
+
+    make_wordcloud(freqs, out_path)
+    digest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = digest_path.with_name(digest_path.name + ".tmp")
+    tmp.write_text(digest, encoding="utf-8")
+    os.replace(tmp, digest_path)
+    return out_path
@@ -0,0 +1,444 @@
+# analysis/waite_index.py
+# Ingestion du livre de Waite (The Pictorial Key to the Tarot, 1910) : extraction page par page,
+# découpage en passages attribués aux cartes, index inversé persistant (terme -> passages).
+#
+# Mémoire bornée quelle que soit la taille du PDF : les passages, leurs positions et longueurs sont
+# écrits au fil de l'eau, les postings vidés sur disque par blocs triés puis fusionnés (SPIMI), le
+# lexique écrit terme par terme pendant la fusion. Seule la liste des passages par carte reste en
+# mémoire (elle va dans meta.json).
+
+import argparse
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+from array import array
+from pathlib import Path
+
+import numpy as np
+
+from analysis.corpus import card_key
+from analysis.pipeline import sha256_file
+
+HERE = Path(__file__).resolve().parent                   # analysis/
+ROOT = HERE.parent                                      # repo root
+
+PDF_PATH = ROOT / "data" / "PDF" / "346098499-The-Pictorial-Key-to-the-Tarot-a-E-waite.pdf"
+OUT_DIR = ROOT / "analysis" / "outputs" / "waite"
+INDEX_VERSION = 1                                       # à incrémenter si le format ou le découpage change
+
+# fichiers de l'index (meta.json écrit en dernier : sa présence signale un index complet)
+PASSAGES = "passages.jsonl"             # un passage JSON par ligne : id, page, section, card, text
+OFFSETS = "passage_offsets.npy"         # position (octets) de chaque passage dans passages.jsonl
+LENGTHS = "passage_lengths.npy"         # nombre de termes indexés par passage (BM25)
+POSTINGS = "postings.npy"               # (passage, tf) en uint32, regroupés par terme
+LEXICON = "lexicon.json"                # terme -> [début dans postings, nb de passages]
+META = "meta.json"
+INDEX_FILES = (PASSAGES, OFFSETS, LENGTHS, POSTINGS, LEXICON, META)
+
+PAGES_PER_READER = 32           # pypdf garde les objets résolus en cache : lecteur rouvert par tranche
+BLOCK_POSTINGS = 50_000         # postings en mémoire avant écriture d'un bloc trié
+MAX_PASSAGE_CHARS = 1500        # au-delà, coupure à la prochaine fin de phrase
+PARAGRAPH_LINE_CHARS = 75       # ligne courte terminée par une ponctuation : fin de paragraphe
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each either few for from further had has have
+having he her here hers herself him himself his how i if in into is it its itself just may me might more
+most much must my myself neither no nor not now of off on once one only or other our ours ourselves out
+over own same shall she should so some such than that the their theirs them themselves then there these
+they this those through thus to too under until up upon very was we were what when where which while who
+whom why will with would yet you your yours yourself yourselves
+""".split())
+WORD = re.compile(r"[a-z][a-z'\-]*[a-z]|[a-z]")
+
+# --- cartes : noms canoniques (colonne `card` des decks) et variantes employées par Waite ---
+MAJOR_ALIASES = {
+    "The Fool": ("fool",),
+    "The Magician": ("magician", "magus"),
+    "The High Priestess": ("high priestess", "female pontiff"),
+    "The Empress": ("empress",),
+    "The Emperor": ("emperor",),
+    "The Hierophant": ("hierophant", "high priest"),
+    "The Lovers": ("lovers",),
+    "The Chariot": ("chariot",),
+    "Strength": ("strength", "fortitude"),
+    "The Hermit": ("hermit",),
+    "Wheel of Fortune": ("wheel of fortune",),
+    "Justice": ("justice",),
+    "The Hanged Man": ("hanged man",),
+    "Death": ("death",),
+    "Temperance": ("temperance",),
+    "The Devil": ("devil",),
+    "The Tower": ("tower",),
+    "The Star": ("star",),
+    "The Moon": ("moon",),
+    "The Sun": ("sun",),
+    "Judgement": ("last judgment", "last judgement", "judgment", "judgement"),
+    "The World": ("world",),
+}
+ALIASES = sorted(((alias, card) for card, aliases in MAJOR_ALIASES.items() for alias in aliases),
+                 key=lambda item: -len(item[0]))
+SUITS = ("wands", "cups", "swords", "pentacles")
+RANKS = ("King", "Queen", "Knight", "Page", "Ten", "Nine", "Eight", "Seven", "Six", "Five", "Four",
+         "Three", "Two", "Ace")
+
+SECTION_LINE = re.compile(r"^(?:§|PART [IVX]+\b|CLASS [IVX]+\b|Preface$|The Contents$|Bibliography$)")
+PART_LINE = re.compile(r"^PART ([IVX]+)\b")
+ROMAN_LINE = re.compile(r"^(?:[IVXL]+|0)$")
+SUIT_LINE = re.compile(r"^(?:THE SUIT OF )?(WANDS|CUPS|SWORDS|PENTACLES)$")
+RANK_LINE = re.compile(rf"^({'|'.join(RANKS)})$")
+NUMBERED_MAJOR = re.compile(r"^(?:\d{1,2}|zero)\.\s+(.+)$", re.IGNORECASE)                 # "18. The Moon. ..."
+LESSER_ENTRY = re.compile(rf"^(?:(wands|cups|swords|pentacles)\.\s+)?({'|'.join(RANKS)})\.-", re.IGNORECASE)
+SENTENCE_END = re.compile(r"[.!?:;\"”')]$")
+
+
+def tokenize(text: str) -> list:
+    # anglais : minuscules, apostrophes typographiques, possessifs et mots vides retirés
+    text = text.replace("’", "'").lower()
+    return [t for t in (w.removesuffix("'s").strip("'-") for w in WORD.findall(text))
+            if len(t) > 1 and t not in STOPWORDS]
+
+
+def match_major(text: str):
+    """Carte majeure nommée en tête de `text` ("The Magus, Magician…" -> "The Magician"), sinon None."""
+    text = card_key(text)
+    for alias, card in ALIASES:
+        if text.startswith(alias) and not text[len(alias):len(alias) + 1].isalpha():
+            return card
+    return None
+
+
+# --- extraction ---
+def iter_pages(pdf_path, pages_per_reader=PAGES_PER_READER):
+    """(numéro de page à partir de 1, texte) page par page, sans charger le PDF entier en mémoire."""
+    from pypdf import PdfReader  # dépendance d'ingestion uniquement
+
+    # un objet fichier (et non un chemin) : pypdf lit alors à la demande au lieu de tout copier en mémoire
+    with open(pdf_path, "rb") as f:
+        n_pages = len(PdfReader(f).pages)
+        for start in range(0, n_pages, pages_per_reader):
+            reader = PdfReader(f)
+            for i in range(start, min(start + pages_per_reader, n_pages)):
+                yield i + 1, reader.pages[i].extract_text() or ""
+            del reader
+
+
+def iter_passages(pages):
+    """
+    Découpe le flux de pages en passages (paragraphes, éventuellement à cheval sur deux pages)
+    et les attribue à une carte d'après les en-têtes rencontrés : "XIII / Death" (partie II),
+    "THE SUIT OF CUPS / King", "18. The Moon." (parties I et III), "Cups. King.--" (partie III).
+    """
+    part, section, suit, card = None, "", None, None
+    pending_major = False       # numéro romain lu, titre de la carte attendu
+    buffer, start_page = [], None
+
+    def flush():
+        nonlocal buffer
+        text = re.sub(r"\s+", " ", " ".join(buffer)).strip()
+        text = re.sub(r"(\w)- (\w)", r"\1-\2", text)    # césures de fin de ligne
+        buffer = []
+        if len(tokenize(text)) >= 3:
+            return {"page": start_page, "section": section, "card": card, "text": text}
+        return None
+
+    for page_no, text in pages:
+        for raw in text.splitlines():
+            line = raw.strip()
+            if not line:
+                continue
+            passage = None
+
+            if SECTION_LINE.match(line):
+                passage = flush()
+                m = PART_LINE.match(line)
+                if m:
+                    part = m.group(1)
+                section, card, suit, pending_major = line, None, None, False
+                if passage:
+                    yield passage
+                continue
+
+            # en-têtes de cartes (lignes isolées)
+            if part == "II" and ROMAN_LINE.match(line):
+                passage, pending_major = flush(), True
+            elif pending_major and not buffer:
+                major = match_major(line)
+                if major:
+                    card, pending_major = major, False
+                continue                                 # "ZERO", titre de la carte
+            elif SUIT_LINE.match(line):
+                passage, suit, card = flush(), SUIT_LINE.match(line).group(1).title(), None
+            elif suit and RANK_LINE.match(line):
+                passage, card = flush(), f"{line} of {suit}"
+            else:
+                # entrées numérotées ou abrégées : nouveau passage attribué, le texte suit sur la ligne
+                m = NUMBERED_MAJOR.match(line)
+                major = match_major(m.group(1)) if m else None
+                lesser = LESSER_ENTRY.match(line) if part == "III" else None
+                if major or (lesser and (lesser.group(1) or suit)):
+                    passage = flush()
+                    if major:
+                        card = major
+                    else:
+                        suit = (lesser.group(1) or suit).title()
+                        card = f"{lesser.group(2).title()} of {suit}"
+                elif not buffer and len(line) < 60 and not SENTENCE_END.search(line):
+                    section_title = line                  # titre ou sous-titre isolé : non indexé
+                    if not card:
+                        section = f"{section} — {section_title}" if section else section_title
+                    continue
+                if passage:
+                    yield passage
+                if not buffer:
+                    start_page = page_no
+                buffer.append(line)
+                size = sum(len(l) for l in buffer)
+                if SENTENCE_END.search(line) and (len(line) < PARAGRAPH_LINE_CHARS or size > MAX_PASSAGE_CHARS):
+                    passage = flush()
+                    if passage:
+                        yield passage
+                continue
+
+            if passage:
+                yield passage
+
+    passage = flush() if buffer else None
+    if passage:
+        yield passage
+
+
+# --- index inversé ---
+def _write_block(postings: dict, directory: str, n: int) -> str:
+    path = os.path.join(directory, f"block_{n:05d}.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        for term in sorted(postings):
+            f.write(term + "\t" + " ".join(f"{pid}:{tf}" for pid, tf in postings[term]) + "\n")
+    return path
+
+
+def _read_block(path: str, n: int):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            term, _, items = line.rstrip("\n").partition("\t")
+            yield term, n, items
+
+
+def _raw_to_npy(raw_path: str, npy_path: str, dtype, count: int):
+    # tableau brut (array.tofile, ordre natif) -> .npy, recopié par pages via mmap
+    out = np.lib.format.open_memmap(npy_path, mode="w+", dtype=dtype, shape=(count,))
+    if count:
+        out[:] = np.memmap(raw_path, dtype=dtype, mode="r", shape=(count,))
+    out.flush()
+    del out
+
+
+def ingest(pdf_path=PDF_PATH, out_dir=OUT_DIR, force=False, block_postings=BLOCK_POSTINGS) -> dict:
+    """
+    Construit l'index de `pdf_path` dans `out_dir`. Sans `force`, rien n'est relu si le hash
+    du PDF (et la version du format) correspond à l'index existant. Retourne le contenu de meta.json.
+
+    Mémoire : au plus `block_postings` postings, plus les positions/longueurs des passages du bloc
+    courant ; seuls les identifiants des passages attribués à une carte sont gardés jusqu'au bout.
+    """
+    out_dir = Path(out_dir)
+    pdf_hash = sha256_file(pdf_path)
+    if not force:
+        meta = load_meta(out_dir)
+        if (meta and meta.get("pdf_sha256") == pdf_hash and meta.get("version") == INDEX_VERSION
+                and all((out_dir / name).exists() for name in INDEX_FILES)):
+            return {**meta, "status": "skipped"}
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cards = {}
+    n_pages = n_passages = total_length = 0
+
+    def pages():
+        nonlocal n_pages
+        for page_no, text in iter_pages(pdf_path):
+            n_pages = page_no
+            yield page_no, text
+
+    with tempfile.TemporaryDirectory(dir=out_dir) as tmp:
+        # 1. passages écrits au fil de l'eau ; postings vidés par blocs triés, positions et longueurs
+        #    des passages ajoutées aux fichiers bruts au même rythme
+        blocks, postings, in_memory = [], {}, 0
+        offsets_raw, lengths_raw = os.path.join(tmp, "offsets.raw"), os.path.join(tmp, "lengths.raw")
+        offsets, lengths = array("Q"), array("I")
+        with (open(os.path.join(tmp, PASSAGES), "wb") as f, open(offsets_raw, "wb") as f_offsets,
+              open(lengths_raw, "wb") as f_lengths):
+            for pid, passage in enumerate(iter_passages(pages())):
+                offsets.append(f.tell())
+                f.write(json.dumps({"id": pid, **passage}, ensure_ascii=False).encode("utf-8") + b"\n")
+                terms = tokenize(passage["text"])
+                lengths.append(len(terms))
+                n_passages += 1
+                total_length += len(terms)
+                if passage["card"]:
+                    cards.setdefault(passage["card"], []).append(pid)
+                counts = {}
+                for t in terms:
+                    counts[t] = counts.get(t, 0) + 1
+                for t, tf in counts.items():
+                    postings.setdefault(t, []).append((pid, tf))
+                in_memory += len(counts)
+                if in_memory >= block_postings:
+                    blocks.append(_write_block(postings, tmp, len(blocks)))
+                    postings, in_memory = {}, 0
+                    offsets.tofile(f_offsets)
+                    lengths.tofile(f_lengths)
+                    offsets, lengths = array("Q"), array("I")
+            offsets.tofile(f_offsets)
+            lengths.tofile(f_lengths)
+        if postings:
+            blocks.append(_write_block(postings, tmp, len(blocks)))
+        del postings, offsets, lengths
+
+        # 2. fusion des blocs (passages croissants d'un bloc au suivant) -> postings contigus par terme
+        total = 0
+        for path in blocks:
+            with open(path, encoding="utf-8") as f:
+                total += sum(line.count(":") for line in f)
+        matrix = np.lib.format.open_memmap(os.path.join(tmp, POSTINGS), mode="w+", dtype="<u4",
+                                           shape=(total, 2))
+        # termes sortis dans l'ordre de la fusion (= ordre trié) : lexique JSON écrit au fil de l'eau
+        n_terms, pos, current, start = 0, 0, None, 0
+        with open(os.path.join(tmp, LEXICON), "w", encoding="utf-8") as lexicon:
+
+            def emit(term, start, count):
+                nonlocal n_terms
+                key = json.dumps(term, ensure_ascii=False)
+                lexicon.write((", " if n_terms else "") + f"{key}: [{start}, {count}]")
+                n_terms += 1
+
+            lexicon.write("{")
+            for term, _, items in heapq.merge(*(_read_block(p, n) for n, p in enumerate(blocks))):
+                if term != current:
+                    if current is not None:
+                        emit(current, start, pos - start)
+                    current, start = term, pos
+                for item in items.split():
+                    pid, tf = item.split(":")
+                    matrix[pos] = (int(pid), int(tf))
+                    pos += 1
+            if current is not None:
+                emit(current, start, pos - start)
+            lexicon.write("}")
+        matrix.flush()
+        del matrix
+
+        _raw_to_npy(offsets_raw, os.path.join(tmp, OFFSETS), np.uint64, n_passages)
+        _raw_to_npy(lengths_raw, os.path.join(tmp, LENGTHS), np.uint32, n_passages)
+
+        meta = {
+            "version": INDEX_VERSION,
+            "source": str(Path(pdf_path).name),
+            "pdf_sha256": pdf_hash,
+            "pages": n_pages,
+            "passages": n_passages,
+            "terms": n_terms,
+            "postings": total,
+            "avg_length": round(total_length / n_passages, 4) if n_passages else 0.0,
+            "cards": cards,
+        }
+        for name in INDEX_FILES[:-1]:
+            os.replace(os.path.join(tmp, name), out_dir / name)
+    with open(out_dir / META, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return {**meta, "status": "built"}
+
+
+def load_meta(out_dir=OUT_DIR):
+    try:
+        with open(Path(out_dir) / META, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# --- interrogation ---
+class PassageIndex:
+    """
+    Index en lecture seule : lexique en mémoire, postings/offsets en mmap, passages lus à la demande.
+    Partagé entre requêtes (aucun état mutable après ouverture).
+    """
+
+    K1, B = 1.2, 0.75   # BM25
+
+    def __init__(self, out_dir=OUT_DIR):
+        out_dir = Path(out_dir)
+        meta = load_meta(out_dir)
+        if meta is None:
+            raise FileNotFoundError(f"Index Waite absent : {out_dir / META}")
+        self.meta = meta
+        self.path = out_dir / PASSAGES
+        self.offsets = np.load(out_dir / OFFSETS, mmap_mode="r")
+        self.lengths = np.load(out_dir / LENGTHS, mmap_mode="r")
+        self.postings = np.load(out_dir / POSTINGS, mmap_mode="r")
+        with open(out_dir / LEXICON, encoding="utf-8") as f:
+            self.lexicon = json.load(f)
+        self.cards = {card_key(card): ids for card, ids in meta.get("cards", {}).items()}
+        self.avg_length = meta.get("avg_length") or 1.0
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def passages(self, ids) -> list:
+        out = []
+        with open(self.path, "rb") as f:
+            for pid in ids:
+                f.seek(int(self.offsets[pid]))
+                out.append(json.loads(f.readline()))
+        return out
+
+    def card_passages(self, card: str) -> list:
+        """Passages attribués à une carte, dans l'ordre du livre."""
+        return self.passages(self.cards.get(card_key(card), ()))
+
+    def search(self, query: str, k: int = 10, card: str = None) -> list:
+        """Passages les plus pertinents (BM25) pour les termes de `query`, éventuellement limités à une carte."""
+        terms = set(tokenize(query))
+        n = len(self.offsets)
+        if not terms or not n:
+            return []
+        scores = np.zeros(n, dtype=np.float64)
+        norm = self.K1 * (1 - self.B + self.B * np.asarray(self.lengths, dtype=np.float64) / self.avg_length)
+        for term in terms:
+            entry = self.lexicon.get(term)
+            if entry is None:
+                continue
+            start, df = entry
+            block = self.postings[start:start + df]
+            pids, tf = block[:, 0].astype(np.intp), block[:, 1].astype(np.float64)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            scores[pids] += idf * tf * (self.K1 + 1) / (tf + norm[pids])
+        if card is not None:
+            mask = np.zeros(n, dtype=bool)
+            mask[self.cards.get(card_key(card), [])] = True
+            scores[~mask] = 0.0
+        hits = np.flatnonzero(scores)
+        if not len(hits):
+            return []
+        k = min(k, len(hits))
+        top = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [{**p, "score": round(float(scores[p["id"]]), 4)} for p in self.passages(top)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index des passages du livre de Waite (Pictorial Key)")
+    parser.add_argument("--pdf", type=Path, default=PDF_PATH)
+    parser.add_argument("--out", type=Path, default=OUT_DIR)
+    parser.add_argument("--force", action="store_true", help="réindexer même si le PDF n'a pas changé")
+    args = parser.parse_args(argv)
+    meta = ingest(args.pdf, args.out, force=args.force)
+    print(f"Index Waite ({meta['status']}) : {meta['passages']} passages, {meta['terms']} termes, "
+          f"{len(meta['cards'])} cartes -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
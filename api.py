@@ -0,0 +1,186 @@
+# api.py
+# API JSON en lecture seule sur le serveur Flask de l'app : liste des cartes, carte par nom,
+# voisins d'une carte dans le graphe symbolique, export complet du graphe.
+# Chaque réponse est sérialisée et compressée (gzip, brotli si installé) une seule fois par
+# instantané de données ; ETag fort tiré des hash des artefacts, 304 sur If-None-Match.
+
+import gzip
+import hashlib
+import json
+
+import flask
+import numpy as np
+
+from analysis.corpus import card_key
+
+try:
+    import brotli
+except ImportError:  # facultatif : gzip seulement
+    brotli = None
+
+MIN_COMPRESS_BYTES = 512          # en dessous, la compression ne rapporte rien
+CARD_SUMMARY = ("card", "name", "arcana", "suit", "number", "img")
+CACHE_CONTROL = "public, no-cache"  # revalidation à chaque fois : un 304 ne coûte presque rien
+
+
+class Resource:
+    """Corps JSON pré-sérialisé, ses variantes compressées et leur ETag commun (sans guillemets)."""
+
+    __slots__ = ("tag", "bodies")
+
+    def __init__(self, payload, tag):
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.tag = tag
+        self.bodies = {"identity": body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self.bodies["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.bodies["br"] = brotli.compress(body, quality=11)
+
+    def etag(self, encoding):
+        # variantes codées = représentations distinctes : un ETag fort chacune
+        return self.tag if encoding == "identity" else f"{self.tag}-{encoding}"
+
+
+def artifact_tag(data, sources, key):
+    """ETag d'une ressource : hash des artefacts dont elle dépend (cf. LanguageData.hashes) et de sa clé."""
+    h = hashlib.sha256()
+    for source in sources:
+        h.update(f"{source}:{data.hashes.get(source)}|".encode("utf-8"))
+    h.update(key.encode("utf-8"))
+    return h.hexdigest()[:24]
+
+
+def negotiate(accept_encoding, available):
+    """Meilleur codage accepté parmi `available` (br > gzip > identity), q-values respectées."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.lower()] = q
+    for encoding in ("br", "gzip"):
+        if encoding in available and accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return "identity"
+
+
+def _matches(if_none_match, resource):
+    if not if_none_match:
+        return False
+    tags = {t.strip().removeprefix("W/").strip('"') for t in if_none_match.split(",")}
+    return "*" in tags or any(resource.etag(e) in tags for e in resource.bodies)
+
+
+def send(resource):
+    encoding = negotiate(flask.request.headers.get("Accept-Encoding"), resource.bodies)
+    headers = {
+        "ETag": f'"{resource.etag(encoding)}"',
+        "Cache-Control": CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if _matches(flask.request.headers.get("If-None-Match"), resource):
+        return flask.Response(status=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return flask.Response(resource.bodies[encoding], mimetype="application/json", headers=headers)
+
+
+def error(status, message):
+    return flask.Response(json.dumps({"error": message}, ensure_ascii=False), status=status,
+                          mimetype="application/json")
+
+
+# --- contenus (un par instantané de données) ---
+def card_payload(card):
+    payload = {}
+    for name in card.__slots__:
+        if name != "index":
+            value = getattr(card, name)
+            payload[name] = list(value) if isinstance(value, tuple) else value
+    return payload
+
+
+def cards_resource(data):
+    payload = {"lang": data.lang, "count": len(data.cards),
+               "cards": [{name: getattr(c, name) for name in CARD_SUMMARY} for c in data.cards]}
+    return Resource(payload, artifact_tag(data, ("data", "images"), "cards"))
+
+
+def card_resource(data, card):
+    return Resource({"lang": data.lang, **card_payload(card)},
+                    artifact_tag(data, ("data", "images"), f"card:{card.card}"))
+
+
+def neighbours_resource(data, card):
+    graph, metrics = data.graph, data.graph_metrics
+    i = graph.index.get(card.card)
+    neighbours = []
+    if i is not None:
+        touching = (graph.src == i) | (graph.dst == i)
+        others = np.where(graph.src[touching] == i, graph.dst[touching], graph.src[touching])
+        for j, w in zip(others.tolist(), graph.weight[touching].tolist()):
+            entry = {"card": graph.nodes[j], "weight": w}
+            if metrics is not None:
+                entry["community"] = int(metrics.community[j])
+            neighbours.append(entry)
+    neighbours.sort(key=lambda n: (-n["weight"], n["card"]))
+    payload = {"lang": data.lang, "card": card.card, "neighbours": neighbours}
+    if metrics is not None and i is not None:
+        payload.update(community=int(metrics.community[i]), degree=float(metrics.degree[i]),
+                       betweenness=float(metrics.betweenness[i]))
+    return Resource(payload, artifact_tag(data, ("graph", "graph_nodes", "graph_metrics"), f"neighbours:{card.card}"))
+
+
+def graph_resource(data):
+    # même schéma que l'export node-link (python -m analysis.graph_artifact)
+    return Resource(data.graph.to_node_link(), artifact_tag(data, ("graph", "graph_nodes"), "graph"))
+
+
+def register_api(server, get_data, languages, prefix="/api"):
+    """
+    Routes GET (HEAD inclus) : {prefix}/<lang>/cards, /cards/<nom>, /cards/<nom>/neighbours, /graph.
+    `get_data(LANG)` renvoie l'instantané LanguageData de la langue (FR, EN…).
+    """
+    languages = {lang.lower(): lang for lang in languages}
+
+    def snapshot(lang):
+        if lang.lower() not in languages:
+            flask.abort(error(404, f"Langue inconnue : {lang}"))
+        return get_data(languages[lang.lower()])
+
+    def find_card(data, name):
+        card = data.cards.get(name)
+        if card is None:
+            # nom tolérant : casse, espaces, article ("wheel of fortune" == "The Wheel of Fortune")
+            keys = data.derived("api:card_keys", lambda d: {card_key(c.card): c for c in d.cards})
+            card = keys.get(card_key(name))
+        if card is None:
+            flask.abort(error(404, f"Carte inconnue : {name}"))
+        return card
+
+    def cards_view(lang):
+        return send(snapshot(lang).derived("api:cards", cards_resource))
+
+    def card_view(lang, name):
+        data = snapshot(lang)
+        card = find_card(data, name)
+        return send(data.derived(f"api:card:{card.card}", lambda d: card_resource(d, card)))
+
+    def neighbours_view(lang, name):
+        data = snapshot(lang)
+        card = find_card(data, name)
+        return send(data.derived(f"api:neighbours:{card.card}", lambda d: neighbours_resource(d, card)))
+
+    def graph_view(lang):
+        return send(snapshot(lang).derived("api:graph", graph_resource))
+
+    server.add_url_rule(f"{prefix}/<lang>/cards", "tarot_api_cards", cards_view)
+    server.add_url_rule(f"{prefix}/<lang>/cards/<name>", "tarot_api_card", card_view)
+    server.add_url_rule(f"{prefix}/<lang>/cards/<name>/neighbours", "tarot_api_neighbours", neighbours_view)
+    server.add_url_rule(f"{prefix}/<lang>/graph", "tarot_api_graph", graph_view)
@@ -1,12 +1,25 @@
 # app.py
-from dash import Dash, html, dcc, Input, Output
+# Le chemin de service n'importe que le nécessaire : plotly.express (construction de figures),
+# networkx (layout de secours), pandas, wordcloud, sentence-transformers… sont importés à la
+# demande, dans les fonctions qui s'en servent. Voir gunicorn.conf.py pour le préchargement.
+import time
+_BOOT = {"t0": time.perf_counter()}
+
+from dash import Dash, html, dcc, Input, Output, State, ClientsideFunction, Patch
+from flask import send_from_directory
 from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
-import plotly.express as px
-import pandas as pd
-import json
-import networkx as nx
+import numpy as np
 import os
+import threading
+
+import api
+from api import register_api
+from data_store import DataStore, file_signature
+from metrics import CallbackMetrics, instrument_callbacks, register_metrics_endpoint
+from semantic_search import ModelMismatch, SemanticIndex, encode_query
+
+_BOOT["imports"] = time.perf_counter() - _BOOT["t0"]
 
 # === CONFIGURATION DE BASE ===
 external_stylesheets = [dbc.themes.ZEPHYR]
@@ -15,18 +28,99 @@ server = app.server
 app.title = "Tarot SemantikosLab 🔮"
 
 # === CHEMINS DES DONNÉES ===
-DATA_PATH_FR = "data/Tarot_Deck_cleaned/tarot_description_FR.xlsx"
-DATA_PATH_EN = "data/Tarot_Deck_cleaned/tarot_description_EN.xlsx"
-GRAPH_PATH_FR = "analysis/outputs/tarot_graph_fr.json"
-GRAPH_PATH_EN = "analysis/outputs/tarot_graph_en.json"
+# Corpus unifié (deck Excel + fiches Kaggle) produit par analysis/run_analysis.py
+DATA_PATH_FR = "analysis/outputs/corpus_fr.json"
+DATA_PATH_EN = "analysis/outputs/corpus_en.json"
+# Graphe compact (arêtes indexées + positions du layout) produit par analysis/run_analysis.py ;
+# le node-link JSON (tarot_graph_*.json) reste l'export d'interopérabilité
+GRAPH_PATH_FR = "analysis/outputs/tarot_graph_fr.npz"
+GRAPH_PATH_EN = "analysis/outputs/tarot_graph_en.npz"
+GRAPH_NODES_FR = "analysis/outputs/tarot_graph_fr.nodes.json"   # table des nœuds du .npz
+GRAPH_NODES_EN = "analysis/outputs/tarot_graph_en.nodes.json"
+# Centralités, communautés et table des plus courts chemins (même ordre de nœuds que le graphe)
+GRAPH_METRICS_FR = "analysis/outputs/tarot_graph_fr.metrics.npz"
+GRAPH_METRICS_EN = "analysis/outputs/tarot_graph_en.metrics.npz"
+# Embeddings (float32, ouverts en mmap) produits par analysis/run_analysis.py
+EMB_PATH_FR = "analysis/outputs/embeddings_fr.npy"
+EMB_PATH_EN = "analysis/outputs/embeddings_en.npy"
 IMAGES_DIR = "assets/Cards"  # pour les images de cartes
-# Wordclouds générés par analysis/run_analysis.py
-WC_FR = "/assets/wordcloud_fr.png"
-WC_EN = "/assets/wordcloud_en.png"
+# Dérivés (WebP/JPEG, noms hashés) générés par analysis/build_images.py, servis sur /img/
+IMAGES_DERIVED_DIR = "static/cards"
+IMAGES_MANIFEST = "static/cards/manifest.json"
+# Wordclouds générés par analysis/run_analysis.py (corpus complet + sous-ensembles)
+ASSETS_DIR = "assets"
+WC_CACHE_DIR = "analysis/outputs/wordclouds"
+# Passages du livre de Waite (1910) et index inversé, produits par analysis/waite_index.py
+WAITE_DIR = "analysis/outputs/waite"
+WAITE_META = "analysis/outputs/waite/meta.json"
+WC_SUBSETS = {
+    "all": ("Corpus complet", "Full corpus"),
+    "major": ("Arcanes majeurs", "Major arcana"),
+    "minor": ("Arcanes mineurs", "Minor arcana"),
+    "cups": ("Coupes", "Cups"),
+    "wands": ("Bâtons", "Wands"),
+    "swords": ("Épées", "Swords"),
+    "pentacles": ("Deniers", "Pentacles"),
+    "upright": ("À l’endroit", "Upright"),
+    "reversed": ("À l’envers", "Reversed"),
+}
 
 # === INITIALISATION DES DONNÉES ===
-df = pd.DataFrame()
-G = nx.Graph()
+# Chargées une seule fois au démarrage, partagées (en lecture seule) par tous les callbacks
+store = DataStore({
+    "FR": {"data": DATA_PATH_FR, "graph": GRAPH_PATH_FR, "graph_nodes": GRAPH_NODES_FR,
+           "graph_metrics": GRAPH_METRICS_FR, "embeddings": EMB_PATH_FR, "images": IMAGES_MANIFEST},
+    "EN": {"data": DATA_PATH_EN, "graph": GRAPH_PATH_EN, "graph_nodes": GRAPH_NODES_EN,
+           "graph_metrics": GRAPH_METRICS_EN, "embeddings": EMB_PATH_EN, "images": IMAGES_MANIFEST},
+}).preload()
+_BOOT["data"] = time.perf_counter() - _BOOT["t0"] - _BOOT["imports"]
+
+def get_data(lang):
+    return store.get(lang if lang in ("FR", "EN") else "FR")
+
+# Index Waite commun aux deux langues (texte anglais), rouvert seulement si meta.json change
+_waite = {"signature": None, "index": None}
+_waite_lock = threading.Lock()
+
+def get_waite_index():
+    signature = file_signature(WAITE_META)
+    if signature != _waite["signature"]:
+        with _waite_lock:
+            if signature != _waite["signature"]:
+                from analysis.waite_index import PassageIndex
+                try:
+                    _waite["index"] = PassageIndex(WAITE_DIR) if signature else None
+                except (OSError, ValueError) as e:
+                    print(f"Erreur de chargement de l'index Waite : {e}")
+                    _waite["index"] = None
+                _waite["signature"] = signature
+    return _waite["index"]
+
+# === IMAGES DES CARTES ===
+@server.route("/img/<path:filename>")
+def serve_card_image(filename):
+    # noms de fichiers hashés : le contenu d'une URL ne change jamais, cache navigateur d'un an
+    response = send_from_directory(os.path.abspath(IMAGES_DERIVED_DIR), filename, max_age=31536000)
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+def card_picture(img_filename, images, style=None):
+    # <picture> WebP + repli JPEG, taille choisie par le navigateur ; image d'origine si pas de dérivés
+    entry = images.get("cards", {}).get(img_filename)
+    if entry is None:
+        return html.Img(src=f"/assets/Cards/{img_filename}", className="fade-in", style=style)
+    srcset = {
+        fmt: ", ".join(f"/img/{entry[size][fmt]} {entry[size]['width']}w" for size in ("thumb", "display"))
+        for fmt in ("webp", "jpeg")
+    }
+    sizes = "(max-width: 768px) 45vw, 300px"
+    display = entry["display"]
+    return html.Picture([
+        html.Source(srcSet=srcset["webp"], sizes=sizes, type="image/webp"),
+        html.Img(src=f"/img/{display['jpeg']}", srcSet=srcset["jpeg"], sizes=sizes,
+                 width=display["width"], height=display["height"], className="fade-in",
+                 style={**(style or {}), "height": "auto"}),
+    ])
 
 # === BARRE DE NAVIGATION MULTILINGUE ===
 def make_navbar(lang="FR"):
@@ -104,7 +198,7 @@ def make_home_page(lang="FR"):
     ])
 
 # === PAGES ===
-def make_cards_page(df, lang="FR"):
+def make_cards_page(cards, lang="FR"):
     label = "Sélectionner une carte :" if lang == "FR" else "Select a card:"
     return dbc.Container([
         html.H3("Explorateur de cartes" if lang == "FR" else "Tarot Cards Explorer",
@@ -114,8 +208,8 @@ def make_cards_page(df, lang="FR"):
                 html.Label(label, className="fw-bold fade-in"),
                 dcc.Dropdown(
                     id="card-dropdown",
-                    options=[{"label": n, "value": n} for n in df["card"].unique()],
-                    value=df["card"].iloc[0] if not df.empty else None,
+                    options=list(cards.options),
+                    value=cards.first().card if cards else None,
                     clearable=False,
                     style={"width": "100%"}
                 ),
@@ -125,10 +219,37 @@ def make_cards_page(df, lang="FR"):
                          style={"backgroundColor": "rgba(255,255,255,0.95)",
                                 "borderRadius": "10px", "minHeight": "250px"})
             ], md=8),
-        ], className="mt-4")
+        ], className="mt-4"),
+        make_waite_section(lang),
     ])
 
-def make_semantic_page(df, lang="FR"):
+def make_waite_section(lang="FR"):
+    # Recherche par mots-clés dans le texte de Waite (anglais), limitée ou non à la carte choisie
+    fr = lang == "FR"
+    return dbc.Row([
+        html.H4("Texte source : Waite (1910)" if fr else "Source text: Waite (1910)",
+                className="mt-5 mb-3 fw-bold fade-in"),
+        dbc.Col([
+            html.Label("Mots-clés (en anglais) :" if fr else "Keywords:", className="fade-in"),
+            dcc.Input(id="waite-query", type="text", debounce=True, className="form-control",
+                      placeholder="ex. lightning, harvest…" if fr else "e.g. lightning, harvest…"),
+            dcc.Checklist(id="waite-scope", className="mt-2 fade-in",
+                          options=[{"label": " Carte choisie uniquement" if fr else " Chosen card only",
+                                    "value": "card"}], value=[]),
+        ], md=4),
+        dbc.Col([html.Div(id="waite-results", className="fade-in")], md=8),
+    ], className="mb-5")
+
+def waite_passage(passage, show_card=True):
+    meta = f"p. {passage['page']}"
+    if show_card and passage.get("card"):
+        meta = f"{passage['card']} · {meta}"
+    return html.Blockquote([
+        html.P(passage["text"], className="mb-1"),
+        html.Footer(meta, className="blockquote-footer mt-1"),
+    ], className="blockquote fs-6 border-start ps-3 mb-3")
+
+def make_semantic_page(cards, lang="FR"):
     title = "Analyse sémantique des cartes" if lang == "FR" else "Semantic Analysis of Cards"
     label_card = "Choisir une carte :" if lang == "FR" else "Choose a card:"
     label_len = "Filtrer par longueur minimale :" if lang == "FR" else "Filter by minimum length:"
@@ -139,29 +260,98 @@ def make_semantic_page(df, lang="FR"):
                 html.Label(label_card, className="fade-in"),
                 dcc.Dropdown(
                     id="card-select",
-                    options=[{"label": c, "value": c} for c in df["card"].unique()],
-                    value=df["card"].iloc[0] if not df.empty else None
+                    options=list(cards.options),
+                    value=cards.first().card if cards else None
                 ),
                 html.Br(),
                 html.Label(label_len, className="fade-in"),
                 dcc.Slider(0, 500, 10, value=100, id="len-slider")
             ], md=3),
             dbc.Col([dcc.Graph(id="semantic-graph", className="fade-in")], md=9)
-        ])
+        ]),
+        # données du nuage de points, envoyées une fois : filtrage et surlignage côté navigateur
+        dcc.Store(id="semantic-data", data=semantic_scatter_data(cards)),
+        make_search_section(lang),
     ])
 
-graph_page = dbc.Container([
-    html.H3("Graphe symbolique / Symbolic Graph", className="text-center mt-4 mb-4 fw-bold fade-in"),
-    dcc.Graph(id="network-graph", className="fade-in"),
-])
+def semantic_scatter_data(cards):
+    # le thème est résolu ici : le navigateur ne connaît pas les templates Plotly par leur nom
+    import plotly.io as pio
+
+    return {
+        "names": cards.names.tolist(),
+        "lengths": cards.description_lengths.tolist(),
+        "layout": {
+            "template": pio.templates["plotly_dark"].to_plotly_json(),
+            "xaxis": {"title": {"text": "x"}},
+            "yaxis": {"title": {"text": "y"}},
+            "legend": {"title": {"text": "selected"}, "tracegrouporder": "reversed"},
+        },
+    }
+
+def make_search_section(lang="FR"):
+    # Plus proches voisins sémantiques : carte sélectionnée ci-dessus ou texte libre
+    fr = lang == "FR"
+    return dbc.Row([
+        html.H4("Recherche sémantique" if fr else "Semantic search", className="mt-5 mb-3 fw-bold fade-in"),
+        dbc.Col([
+            html.Label("Texte libre (sinon : carte choisie) :" if fr else "Free text (otherwise: chosen card):",
+                       className="fade-in"),
+            dcc.Input(id="semantic-query", type="text", debounce=True, className="form-control",
+                      placeholder="ex. renouveau, courage…" if fr else "e.g. renewal, courage…"),
+            html.Br(),
+            html.Label("Langue des résultats :" if fr else "Results language:", className="fade-in"),
+            dcc.Dropdown(id="search-lang", options=[{"label": "Français", "value": "FR"},
+                                                     {"label": "English", "value": "EN"}],
+                         value=lang, clearable=False),
+            html.Br(),
+            html.Label("Nombre de voisins :" if fr else "Number of neighbours:", className="fade-in"),
+            dcc.Slider(1, 20, 1, value=8, id="topk-slider", marks=None,
+                       tooltip={"placement": "bottom"}),
+        ], md=3),
+        dbc.Col([dcc.Graph(id="search-results", className="fade-in")], md=9),
+    ])
+
+def make_graph_page(data, lang="FR"):
+    fr = lang == "FR"
+    options = sorted(data.graph.nodes)
+    return dbc.Container([
+        html.H3("Graphe symbolique / Symbolic Graph", className="text-center mt-4 mb-4 fw-bold fade-in"),
+        # figure incluse dans la page (mise en cache avec elle) ; le chemin est ensuite ajouté par Patch
+        dcc.Graph(id="network-graph", className="fade-in",
+                  figure=data.derived("graph_figure", build_graph_figure)),
+        dbc.Row([
+            html.H4("Chemin entre deux cartes" if fr else "Path between two cards",
+                    className="mt-4 mb-3 fw-bold fade-in"),
+            dbc.Col([
+                html.Label("Départ :" if fr else "From:", className="fade-in"),
+                dcc.Dropdown(id="path-source", options=options, value=options[0] if options else None),
+                html.Br(),
+                html.Label("Arrivée :" if fr else "To:", className="fade-in"),
+                dcc.Dropdown(id="path-target", options=options, value=options[-1] if options else None),
+            ], md=4),
+            dbc.Col([html.Div(id="path-result", className="fade-in")], md=8),
+        ], className="mb-5"),
+    ])
+
+def wordcloud_src(lang, subset="all"):
+    # ?v= hash des fréquences rendues (écrit par le pipeline) : une image régénérée change d'URL
+    name = f"wordcloud_{lang.lower()}" + ("" if subset == "all" else f"_{subset}")
+    try:
+        with open(os.path.join(WC_CACHE_DIR, f"{name}.sha256"), encoding="utf-8") as f:
+            return f"/assets/{name}.png?v={f.read().strip()[:12]}"
+    except OSError:
+        return f"/assets/{name}.png"
 
 def wordcloud_card(lang="FR"):
-    src = WC_EN if lang == "EN" else WC_FR
     title = "Wordcloud (English corpus)" if lang == "EN" else "Nuage de mots (corpus français)"
+    i = 1 if lang == "EN" else 0
     return dbc.Card(
         dbc.CardBody([
             html.H5(title, className="mb-3 fw-bold"),
-            html.Img(src=src, alt=title,
+            dcc.Dropdown(id="wordcloud-subset", value="all", clearable=False, className="mb-3",
+                         options=[{"label": labels[i], "value": key} for key, labels in WC_SUBSETS.items()]),
+            html.Img(id="wordcloud-img", src=wordcloud_src(lang), alt=title,
                      style={"maxWidth": "100%", "borderRadius": "10px",
                             "boxShadow": "0 2px 6px rgba(0,0,0,0.15)"})
         ]),
@@ -169,27 +359,31 @@ def wordcloud_card(lang="FR"):
         style={"backgroundColor": "rgba(255,255,255,0.92)", "borderRadius": "14px"}
     )
 
-def make_stats_page(df, lang="FR"):
+def make_stats_page(cards, lang="FR"):
     title = "Statistiques globales" if lang == "FR" else "Global Statistics"
     desc = "Distribution de la longueur des descriptions :" if lang == "FR" else "Distribution of description lengths:"
 
-    # Longueurs propres
-    if df.empty or "description" not in df.columns:
-        desc_len = pd.Series([], dtype=int)
-    else:
-        desc_len = df["description"].fillna("").astype(str).str.len()
+    import plotly.express as px
 
-    hist_fig = px.histogram(
-        x=desc_len,
-        nbins=30,
+    # Histogramme déjà agrégé (30 classes) : seuls les effectifs partent vers le navigateur
+    counts, edges = np.histogram(cards.description_lengths, bins=30)
+    hist_fig = px.bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
         labels={"x": "Description length"},
         color_discrete_sequence=["#a29bfe"]
     )
+    hist_fig.update_traces(
+        width=np.diff(edges),
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        hovertemplate="%{customdata[0]:.0f}–%{customdata[1]:.0f} : %{y}<extra></extra>",
+    )
     hist_fig.update_layout(
         template="plotly_dark",
         autosize=True,             # laisse Plotly gérer la largeur
         height=420,                # ✅ hauteur fixe
         margin=dict(l=40, r=20, t=50, b=40),
+        bargap=0,
         xaxis_title=None,
         yaxis_title=None
     )
@@ -200,7 +394,7 @@ def make_stats_page(df, lang="FR"):
             dbc.Col([
                 html.P(desc, className="mb-3 fade-in"),
                 dcc.Graph(
-                    figure=hist_fig,
+                    figure=hist_fig.to_dict(),   # dict : pas de revalidation Plotly à chaque envoi
                     className="fade-in",
                     config={"responsive": True},
                     style={
@@ -220,74 +414,227 @@ def make_stats_page(df, lang="FR"):
 # === CALLBACKS ===
 @app.callback(
     Output("card-info", "children"),
-    Input("card-dropdown", "value")
+    Input("card-dropdown", "value"),
+    State("language-store", "data")
 )
-def update_card_info(selected_card):
-    if df.empty or not selected_card:
+def update_card_info(selected_card, lang):
+    data = get_data(lang)
+    card = data.cards.get(selected_card) if selected_card else None
+    if card is None:
         return html.P("Aucune donnée disponible / No data available.", className="text-muted fade-in")
 
-    card = df[df["card"] == selected_card].iloc[0]
-    img_filename = str(card.get("img", "")).strip()
-    img_src = f"/assets/Cards/{img_filename}" if img_filename else None
+    img_filename = card.img
 
     return dbc.Row([
         dbc.Col([
-            html.Img(src=img_src, className="fade-in",
-                     style={"maxWidth": "100%", "borderRadius": "10px",
-                            "boxShadow": "0 2px 6px rgba(0,0,0,0.2)"})
+            card_picture(img_filename, data.images,
+                         style={"maxWidth": "100%", "borderRadius": "10px",
+                                "boxShadow": "0 2px 6px rgba(0,0,0,0.2)"})
             if img_filename else html.P("Image not found.", className="text-muted fade-in")
         ], md=4),
         dbc.Col([
-            html.H4(card["card"], className="fw-bold mb-3 fade-in"),
-            html.P(card["description"], style={"fontStyle": "italic"}),
+            html.H4(card.card, className="fw-bold mb-3 fade-in"),
+            html.P(card.description, style={"fontStyle": "italic"}),
             html.Hr(),
-            html.P(f"Keywords: {card.get('keywords_general','')}"),
-            html.P(f"Upright: {card.get('keywords_upright','')}"),
-            html.P(f"Reversed: {card.get('keywords_reversed','')}")
+            html.P(f"Keywords: {'; '.join(card.keywords_general)}"),
+            html.P(f"Upright: {'; '.join(card.keywords_upright)}"),
+            html.P(f"Reversed: {'; '.join(card.keywords_reversed)}"),
+            make_kaggle_details(card),
+            make_waite_details(card, lang),
         ], md=8)
     ])
 
+def make_kaggle_details(card):
+    # fiche Kaggle jointe dans le corpus unifié (en anglais)
+    rows = [("Archetype", card.archetype), ("Fortune telling", "; ".join(card.fortune_telling)),
+            ("Light", "; ".join(card.light)), ("Shadow", "; ".join(card.shadow))]
+    return html.Div([html.P(f"{label}: {value}", className="mb-1 small") for label, value in rows if value],
+                    className="mt-2 text-muted")
+
+def make_waite_details(card, lang):
+    index = get_waite_index()
+    passages = index.card_passages(card.card) if index is not None else []
+    if not passages:
+        return html.Div()
+    summary = "Texte source (Waite, 1910)" if lang == "FR" else "Source text (Waite, 1910)"
+    return html.Details([
+        html.Summary(f"{summary} — {len(passages)} passage(s)", className="fw-bold mb-2"),
+        *(waite_passage(p, show_card=False) for p in passages),
+    ], className="mt-3")
+
 @app.callback(
+    Output("waite-results", "children"),
+    Input("waite-query", "value"),
+    Input("waite-scope", "value"),
+    Input("card-dropdown", "value"),
+    State("language-store", "data")
+)
+def update_waite_search(query, scope, selected_card, lang):
+    query = (query or "").strip()
+    if not query:
+        return html.P("Saisir un ou plusieurs mots-clés." if lang == "FR" else "Enter one or more keywords.",
+                      className="text-muted")
+    index = get_waite_index()
+    if index is None:
+        return html.P("Index Waite indisponible / Waite index not available.", className="text-muted")
+    card = selected_card if scope and "card" in scope else None
+    results = index.search(query, k=8, card=card)
+    if not results:
+        return html.P("Aucun passage trouvé." if lang == "FR" else "No passage found.", className="text-muted")
+    return [waite_passage(p) for p in results]
+
+# Nuage de points de la page sémantique : redessiné dans le navigateur (assets/figures.js)
+app.clientside_callback(
+    ClientsideFunction(namespace="tarot", function_name="semanticScatter"),
     Output("semantic-graph", "figure"),
     Input("card-select", "value"),
-    Input("len-slider", "value")
+    Input("len-slider", "value"),
+    State("semantic-data", "data")
 )
-def update_semantic_graph(selected_card, min_len):
-    if df.empty:
-        return {}
-    subset = df[df["description"].str.len() > min_len]
-    fig = px.scatter(
-        subset,
-        x=range(len(subset)),
-        y=subset["description"].str.len(),
-        hover_name=subset["card"],
-        color=subset["card"] == selected_card,
-        color_discrete_sequence=["#a29bfe", "#ffeaa7"]
-    )
-    fig.update_layout(template="plotly_dark", title=f"Analyse : {selected_card}")
-    return fig
 
-@app.callback(Output("network-graph", "figure"), Input("network-graph", "id"))
-def display_graph(_):
-    if G.number_of_nodes() == 0:
+def node_positions(data):
+    # positions précalculées (incluses dans l'artefact compact), sinon calcul unique ici
+    graph = data.graph
+    if graph.positions is not None:
+        return graph.positions
+    import networkx as nx
+
+    layout = nx.spring_layout(graph.to_networkx(), seed=42)
+    return np.array([layout[node] for node in graph.nodes], dtype=np.float32).reshape(-1, 2)
+
+def build_graph_figure(data):
+    # Construit une seule fois par instantané de données (cf. LanguageData.derived)
+    graph = data.graph
+    if graph.number_of_nodes() == 0:
         return {}
-    pos = nx.spring_layout(G, seed=42)
-    edge_x, edge_y, node_x, node_y = [], [], [], []
-    for edge in G.edges():
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-        edge_x += [x0, x1, None]
-        edge_y += [y0, y1, None]
-    for node in G.nodes():
-        x, y = pos[node]
-        node_x.append(x)
-        node_y.append(y)
-    fig = px.scatter(x=node_x, y=node_y, text=list(G.nodes()), color_discrete_sequence=["#70a8ff"])
-    fig.add_scatter(x=edge_x, y=edge_y, mode="lines", line=dict(color="rgba(112,168,255,0.3)", width=1))
-    fig.update_traces(textposition="top center")
+    import plotly.express as px
+
+    pos = data.derived("graph_positions", node_positions)
+    # segments d'arêtes séparés par des trous (NaN), en un seul tableau (float32 : moitié moins d'octets)
+    segments = np.full((graph.number_of_edges(), 3, 2), np.nan, dtype=np.float32)
+    segments[:, 0] = pos[graph.src]
+    segments[:, 1] = pos[graph.dst]
+    fig = px.scatter(x=pos[:, 0], y=pos[:, 1], text=list(graph.nodes), color_discrete_sequence=["#70a8ff"])
+    metrics = data.graph_metrics
+    if metrics is not None:
+        # communautés -> couleur, intermédiarité -> taille (valeurs précalculées par run_analysis.py)
+        palette = px.colors.qualitative.Pastel
+        span = float(metrics.betweenness.max()) or 1.0
+        fig.update_traces(
+            marker=dict(color=[palette[c % len(palette)] for c in metrics.community.tolist()],
+                        size=8 + 22 * metrics.betweenness / span),
+            customdata=np.column_stack([metrics.community, metrics.degree, metrics.betweenness]),
+            hovertemplate="<b>%{text}</b><br>communauté / community %{customdata[0]:.0f}"
+                          "<br>degré / degree %{customdata[1]:.3f}"
+                          "<br>intermédiarité / betweenness %{customdata[2]:.3f}<extra></extra>",
+        )
+    fig.add_scatter(x=segments[:, :, 0].ravel(), y=segments[:, :, 1].ravel(), mode="lines",
+                    line=dict(color="rgba(112,168,255,0.3)", width=1), hoverinfo="skip")
+    # trace du chemin (data[2]), vide ici : update_graph_path n'envoie que ses coordonnées
+    fig.add_scatter(x=[], y=[], mode="lines+markers", hoverinfo="skip",
+                    line=dict(color="#ffeaa7", width=3), marker=dict(color="#ffeaa7", size=12))
+    fig.update_traces(textposition="top center", selector=dict(mode="markers+text"))
     fig.update_layout(template="plotly_dark", showlegend=False)
+    return fig.to_dict()
+
+@app.callback(
+    Output("path-result", "children"),
+    Output("network-graph", "figure"),
+    Input("path-source", "value"),
+    Input("path-target", "value"),
+    State("language-store", "data")
+)
+def update_graph_path(source, target, lang):
+    # une lecture de la table next_hop par saut : aucun parcours de graphe à la requête ;
+    # seule la trace du chemin de la figure est mise à jour (Patch)
+    data = get_data(lang)
+    fr = lang != "EN"
+    metrics, index = data.graph_metrics, data.graph.index
+    # graphe vide : build_graph_figure renvoie {}, sans trace de chemin (data[2]) à mettre à jour
+    if data.graph.number_of_nodes() == 0 or source not in index or target not in index:
+        raise PreventUpdate
+    path = metrics.path(index[source], index[target]) if metrics is not None else []
+    highlight = Patch()
+    pos = data.derived("graph_positions", node_positions)[path]
+    highlight["data"][2]["x"] = pos[:, 0].tolist()
+    highlight["data"][2]["y"] = pos[:, 1].tolist()
+    if metrics is None:
+        return html.P("Métriques du graphe indisponibles" if fr else "Graph metrics not available",
+                      className="text-muted"), highlight
+    if not path:
+        return html.P("Aucun chemin entre ces cartes" if fr else "No path between these cards",
+                      className="text-muted"), highlight
+    steps = len(path) - 1
+    return html.Div([
+        html.P(f"{steps} saut(s)" if fr else f"{steps} hop(s)", className="fw-bold mb-2"),
+        html.Ol([html.Li(data.graph.nodes[i]) for i in path]),
+    ]), highlight
+
+def build_semantic_index(data):
+    if data.embeddings is None:
+        return None
+    return SemanticIndex(data.embeddings, data.embedding_cards, data.embedding_model)
+
+@app.callback(
+    Output("search-results", "figure"),
+    Input("card-select", "value"),
+    Input("semantic-query", "value"),
+    Input("search-lang", "value"),
+    Input("topk-slider", "value"),
+    State("language-store", "data")
+)
+def update_semantic_search(selected_card, query, target_lang, k, lang):
+    source = get_data(lang).derived("semantic_index", build_semantic_index)
+    target = get_data(target_lang).derived("semantic_index", build_semantic_index)
+    if source is None or target is None:
+        return {"layout": {"template": "plotly_dark", "title": "Embeddings indisponibles / Embeddings not available"}}
+
+    query = (query or "").strip()
+    try:
+        if query:
+            try:
+                vector = encode_query(query)
+            except Exception as e:
+                print(f"Erreur d'encodage de la requête : {e}")
+                return {"layout": {"template": "plotly_dark", "title": "Encodeur indisponible / Encoder not available"}}
+            results, title = target.search(vector, k), f"« {query} »"
+        else:
+            vector = source.card_vector(selected_card)
+            if vector is None:
+                raise PreventUpdate
+            results = target.search(vector, k, exclude_card=selected_card, model=source.model)
+            title = selected_card
+    except ModelMismatch as e:
+        # embeddings d'un autre modèle (index non régénéré) : pas de scores trompeurs
+        print(f"Recherche sémantique refusée : {e}")
+        return {"layout": {"template": "plotly_dark",
+                           "title": "Embeddings à régénérer / Embeddings must be rebuilt"}}
+
+    import plotly.express as px
+
+    cards = [c for c, _ in results][::-1]
+    scores = [round(score, 4) for _, score in results][::-1]
+    fig = px.bar(x=scores, y=cards, orientation="h", color_discrete_sequence=["#a29bfe"],
+                 labels={"x": "cosine", "y": ""})
+    fig.update_layout(template="plotly_dark", title=title, height=max(300, 32 * len(cards) + 100))
     return fig
 
+@app.callback(
+    Output("wordcloud-img", "src"),
+    Input("wordcloud-subset", "value"),
+    State("language-store", "data")
+)
+def update_wordcloud(subset, lang):
+    lang = lang if lang in ("FR", "EN") else "FR"
+    if subset not in WC_SUBSETS:
+        raise PreventUpdate
+    src = wordcloud_src(lang, subset)
+    if not os.path.exists(src.lstrip("/").partition("?")[0]):
+        # images rendues par le pipeline (python -m analysis.run_analysis) : rien n'est écrit ici
+        print(f"Wordcloud {lang}/{subset} absent : relancer l'analyse")
+        return wordcloud_src(lang)
+    return src
+
 # === CHOIX DE LANGUE ===
 @app.callback(
     Output("language-store", "data"),
@@ -303,6 +650,16 @@ def set_language(fr_click, en_click):
     raise PreventUpdate  # ne rien faire si aucun clic
 
 # === ROUTAGE DES PAGES ===
+# Une page ne dépend que de sa langue et des données de cet instantané : elle est mise en cache
+# dans LanguageData.derived (une entrée par page, abandonnée avec l'instantané au rechargement).
+PAGES = {
+    "/": lambda data: make_home_page(data.lang),
+    "/semantic": lambda data: make_semantic_page(data.cards, data.lang),
+    "/graph": lambda data: make_graph_page(data, data.lang),
+    "/stats": lambda data: make_stats_page(data.cards, data.lang),
+    "/cards": lambda data: make_cards_page(data.cards, data.lang),
+}
+
 @app.callback(
     Output("page-content", "children"),
     Output("navbar", "children"),
@@ -310,41 +667,27 @@ def set_language(fr_click, en_click):
     Input("language-store", "data")
 )
 def display_page(pathname, lang):
-    global df, G
-
     # attendre que le store soit prêt
     if lang not in ["FR", "EN"]:
         raise PreventUpdate
 
-    # Charger le bon DataFrame selon la langue
-    try:
-        df = pd.read_excel(DATA_PATH_EN if lang == "EN" else DATA_PATH_FR)
-    except Exception as e:
-        print(f"Erreur de chargement Excel : {e}")
-        df = pd.DataFrame()
+    # Mises en page construites une fois par (page, langue, version des données)
+    data = get_data(lang)
+    page = pathname if pathname in PAGES else "/"
+    return data.derived(f"page:{page}", PAGES[page]), data.derived("navbar", lambda d: make_navbar(d.lang))
 
-    # Charger le bon graphe selon la langue
-    graph_path = GRAPH_PATH_EN if lang == "EN" else GRAPH_PATH_FR
-    try:
-        with open(graph_path, encoding="utf-8") as f:
-            graph_data = json.load(f)
-            G = nx.node_link_graph(graph_data)
-    except Exception as e:
-        print(f"Erreur de chargement du graphe {graph_path} : {e}")
-        G = nx.Graph()
-
-    navbar = make_navbar(lang)
-
-    if pathname == "/semantic":
-        return make_semantic_page(df, lang), navbar
-    elif pathname == "/graph":
-        return graph_page, navbar
-    elif pathname == "/stats":
-        return make_stats_page(df, lang), navbar
-    elif pathname == "/cards":
-        return make_cards_page(df, lang), navbar
-    else:
-        return make_home_page(lang), navbar
+# === INSTRUMENTATION ===
+# Durée, taille de réponse et cache par callback et par langue, lisibles sur /metrics (local uniquement).
+# TAROT_SLOW_CALLBACK_MS=200 journalise les callbacks plus lents que 200 ms.
+# À garder après la déclaration de tous les callbacks.
+metrics = CallbackMetrics(slow_ms=float(os.environ["TAROT_SLOW_CALLBACK_MS"])
+                          if os.environ.get("TAROT_SLOW_CALLBACK_MS") else None)
+instrument_callbacks(app, metrics)
+register_metrics_endpoint(server, metrics)
+
+# === API JSON ===
+# Lecture seule pour d'autres services : /api/<fr|en>/cards, /cards/<nom>, /cards/<nom>/neighbours, /graph
+register_api(server, get_data, store.languages())
 
 # === LAYOUT GLOBAL ===
 app.layout = html.Div([
@@ -354,6 +697,30 @@ app.layout = html.Div([
     html.Div(id="page-content", children=make_home_page("FR"))
 ])
 
+# === PRÉCHAUFFAGE ===
+def warm_up():
+    """
+    Construit d'avance ce que les premières requêtes calculeraient : pages et figures de chaque langue,
+    index sémantiques, index Waite. Appelé une fois dans le maître gunicorn (gunicorn.conf.py) :
+    les workers forkés partagent ensuite ces objets en copie sur écriture. Retourne sa durée.
+    """
+    t0 = time.perf_counter()
+    for lang in store.languages():
+        data = get_data(lang)
+        for page, builder in PAGES.items():
+            data.derived(f"page:{page}", builder)
+        data.derived("navbar", lambda d: make_navbar(d.lang))
+        data.derived("semantic_index", build_semantic_index)
+        data.derived("api:cards", api.cards_resource)
+        data.derived("api:graph", api.graph_resource)
+    get_waite_index()
+    return time.perf_counter() - t0
+
+_BOOT["total"] = time.perf_counter() - _BOOT["t0"]
+print(f"[démarrage] app importée en {_BOOT['total']:.2f} s "
+      f"(imports {_BOOT['imports']:.2f} s, données {_BOOT['data']:.2f} s)")
+
 # === LANCEMENT ===
 if __name__ == "__main__":
-    app.run_server(host="0.0.0.0", port=8051, debug=False)
+    print(f"[démarrage] préchauffage : {warm_up():.2f} s")
+    app.run(host="0.0.0.0", port=8051, debug=False)
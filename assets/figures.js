@@ -0,0 +1,38 @@
+// assets/figures.js
+// Callbacks exécutés dans le navigateur (chargés automatiquement par Dash depuis assets/).
+// Les données de la page sémantique arrivent une fois avec la page (dcc.Store "semantic-data") :
+// curseur et choix de carte redessinent le nuage de points sans aller-retour serveur.
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    tarot: {
+        semanticScatter: function (selected, minLen, data) {
+            if (!data || !data.names.length) {
+                return {};
+            }
+            // même rendu que l'ancienne figure px.scatter : abscisses renumérotées après filtrage,
+            // carte choisie dans une trace à part (couleur distincte)
+            var groups = [
+                {name: "False", color: "#a29bfe", x: [], y: [], text: []},
+                {name: "True", color: "#ffeaa7", x: [], y: [], text: []}
+            ];
+            var k = 0;
+            for (var i = 0; i < data.names.length; i++) {
+                if (data.lengths[i] > minLen) {
+                    var g = groups[data.names[i] === selected ? 1 : 0];
+                    g.x.push(k++);
+                    g.y.push(data.lengths[i]);
+                    g.text.push(data.names[i]);
+                }
+            }
+            var traces = groups.filter(function (g) { return g.x.length; }).map(function (g) {
+                return {
+                    type: "scatter", mode: "markers", name: g.name, legendgroup: g.name, showlegend: true,
+                    x: g.x, y: g.y, hovertext: g.text, marker: {color: g.color, symbol: "circle"},
+                    hovertemplate: "<b>%{hovertext}</b><br><br>selected=" + g.name + "<br>x=%{x}<br>y=%{y}<extra></extra>"
+                };
+            });
+            var layout = Object.assign({}, data.layout, {title: {text: "Analyse : " + selected}});
+            return {data: traces, layout: layout};
+        }
+    }
+});
@@ -0,0 +1,388 @@
+# benchmarks/run_benchmarks.py
+# Banc de performance : pipeline d'analyse (78 cartes + corpus synthétiques) et callbacks Dash.
+# Chaque mesure tourne dans un processus neuf : temps mur, pic RSS et allocations (tracemalloc).
+#
+#   python benchmarks/run_benchmarks.py                       # tout, tailles par défaut
+#   python benchmarks/run_benchmarks.py --only build_graph --sizes 78,1000
+#   python benchmarks/run_benchmarks.py --compare benchmarks/results/base.json
+#   python benchmarks/run_benchmarks.py --encoder hashing     # hors ligne : encodeur factice, sans modèle
+#
+# Les résultats (JSON) vont dans benchmarks/results/ : à comparer entre branches avant un déploiement.
+
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+RESULTS_DIR = HERE / "results"
+
+DEFAULT_SIZES = (78, 1000, 10000, 100000)
+
+# --- corpus ---
+def real_deck(lang="EN"):
+    import pandas as pd
+    return pd.read_excel(ROOT / "data" / "Tarot_Deck_cleaned" / f"tarot_description_{lang}.xlsx")
+
+def synthetic_deck(n, lang="EN", seed=42):
+    """n descriptions tirées du vocabulaire réel (loi de Zipf), mêmes colonnes que le deck Excel."""
+    import numpy as np
+    import pandas as pd
+
+    deck = real_deck(lang)
+    if n == len(deck):
+        return deck
+    rng = np.random.default_rng(seed)
+    vocab = sorted({w for text in deck["description"].astype(str) for w in text.split()})
+    weights = 1.0 / np.arange(1, len(vocab) + 1)
+    weights /= weights.sum()
+    lengths = rng.integers(10, 30, size=n)
+    words = rng.choice(len(vocab), size=int(lengths.sum()), p=weights)
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    suits = ("Cups", "Wands", "Swords", "Pentacles")
+    rows = {col: deck[col].to_numpy()[np.arange(n) % len(deck)] for col in deck.columns}
+    rows["card"] = [f"Card {i} of {suits[i % 4]}" if i % 3 else f"Arcanum {i}" for i in range(n)]
+    rows["description"] = [" ".join(vocab[w] for w in words[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+    return pd.DataFrame(rows)
+
+# --- encodeur ---
+class HashingEncoder:
+    """
+    Encodeur factice (sac de mots haché, lignes normalisées), même interface que SentenceTransformer.encode :
+    mesure le pipeline d'embeddings et la recherche sans télécharger ni exécuter le modèle.
+    """
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def encode(self, texts, **kwargs):
+        import hashlib
+
+        import numpy as np
+
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, int.from_bytes(hashlib.md5(word.encode()).digest()[:4], "little") % self.dim] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+def bench_encoder():
+    # --encoder, transmis aux processus de mesure par l'environnement ; None : vrai modèle (cache HF)
+    return HashingEncoder() if os.environ.get("TAROT_BENCH_ENCODER") == "hashing" else None
+
+# --- benchmarks : setup(size, tmp) -> callable ; le setup n'est pas chronométré ---
+def _analysis_path():
+    # paquet analysis importé depuis la racine du dépôt, comme par l'app
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+
+def setup_build_graph(size, tmp):
+    _analysis_path()
+    from analysis.semantic_utils import build_graph
+    from analysis.text_frequencies import build_term_frequencies, card_terms
+    df = synthetic_deck(size)
+    tokens = card_terms(build_term_frequencies(df, "en"))
+    return lambda: build_graph(df, threshold=1, top_k=5, tokens=tokens)
+
+def setup_term_frequencies(size, tmp):
+    _analysis_path()
+    from analysis.text_frequencies import build_term_frequencies
+    df = synthetic_deck(size)
+    return lambda: build_term_frequencies(df, "en")
+
+def setup_compute_embeddings(size, tmp, encoder=None):
+    _analysis_path()
+    from analysis.semantic_utils import compute_embeddings
+    df = synthetic_deck(size)
+    out = Path(tmp) / "embeddings.npy"
+    encoder = encoder or bench_encoder()
+
+    def run():
+        if out.exists():
+            out.unlink()  # encodage complet à chaque répétition (pas de cache)
+        return compute_embeddings(df, out, model=encoder)
+    return run
+
+def setup_make_wordcloud(size, tmp):
+    _analysis_path()
+    from analysis.text_frequencies import build_term_frequencies, make_wordcloud, subset_frequencies
+    freqs = subset_frequencies(build_term_frequencies(synthetic_deck(size), "en"))
+    return lambda: make_wordcloud(freqs, Path(tmp) / "wordcloud.png")
+
+def setup_process_language(size, tmp):
+    _analysis_path()
+    from analysis import run_analysis
+    tmp = Path(tmp)
+    xlsx = tmp / "deck.xlsx"
+    synthetic_deck(size).to_excel(xlsx, index=False)
+    paths = {
+        "xlsx": xlsx, "corpus": tmp / "corpus.json", "terms": tmp / "terms.json", "graph": tmp / "graph.json",
+        "layout": tmp / "layout.json", "graph_npz": tmp / "graph.npz", "graph_metrics": tmp / "graph.metrics.npz",
+        "stats": tmp / "stats.json", "embeddings": tmp / "embeddings.npy", "wordcloud": tmp / "wordcloud_en.png",
+        "assets_dir": tmp, "wordcloud_cache": tmp / "wordclouds",
+    }
+
+    def run():
+        # sans le cache des wordclouds : chaque répétition refait tout le travail
+        shutil.rmtree(paths["wordcloud_cache"], ignore_errors=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return run_analysis.process_language("EN", force=True, paths=paths)
+    return run
+
+def setup_simulate_spreads(size, tmp):
+    # taille = nombre de tirages (croix celtique, artefacts EN réels)
+    _analysis_path()
+    from analysis.spreads import load_simulator
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulator = load_simulator("en")
+    return lambda: simulator.simulate(size, "celtic_cross", seed=42)
+
+def _app():
+    # l'app utilise des chemins relatifs à la racine du dépôt
+    os.chdir(ROOT)
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    import app
+    return app
+
+DISPLAY_PAGES = ["/", "/cards", "/semantic", "/graph", "/stats"]
+
+def setup_display_page(size, tmp):
+    # construction à froid : valeurs dérivées des instantanés (pages, figure du graphe…) vidées à chaque
+    # répétition, sinon seule la lecture du cache serait chronométrée
+    app = _app()
+    snapshots = [app.get_data(lang) for lang in ("FR", "EN")]
+
+    def run():
+        for data in snapshots:
+            with data._lock:
+                data._derived.clear()
+        return [app.display_page(p, data.lang) for data in snapshots for p in DISPLAY_PAGES]
+    return run
+
+def setup_display_page_cached(size, tmp):
+    # navigation courante : pages déjà construites pour l'instantané
+    app = _app()
+    for lang in ("FR", "EN"):
+        for p in DISPLAY_PAGES:
+            app.display_page(p, lang)
+    return lambda: [app.display_page(p, lang) for lang in ("FR", "EN") for p in DISPLAY_PAGES]
+
+def setup_update_graph_path(size, tmp):
+    app = _app()
+    nodes = {lang: list(app.get_data(lang).graph.nodes) for lang in ("FR", "EN")}
+    return lambda: [app.update_graph_path(a, b, lang) for lang in ("FR", "EN")
+                    for a, b in zip(nodes[lang], reversed(nodes[lang]))]
+
+def setup_update_semantic_search(size, tmp, encoder=None):
+    # recherche carte -> cartes (même langue et langue croisée), puis requêtes libres : après l'échauffement,
+    # celles-ci viennent du cache LRU d'encode_query, comme des requêtes répétées
+    app = _app()
+    encoder = encoder or bench_encoder()
+    langs = ("FR", "EN")
+    names = {lang: [c.card for c in app.get_data(lang).cards] for lang in langs}
+    if encoder is not None:
+        import semantic_search
+        from analysis.semantic_utils import EMBEDDING_MODEL
+
+        semantic_search._encoders[EMBEDDING_MODEL] = encoder
+        for lang in langs:
+            data = app.get_data(lang)
+            texts = [" . ".join([c.description, *c.keywords_general, *c.keywords_upright, *c.keywords_reversed])
+                     for c in data.cards]
+            index = semantic_search.SemanticIndex(encoder.encode(texts), names[lang], EMBEDDING_MODEL)
+            with data._lock:
+                data._derived["semantic_index"] = index
+    elif any(app.get_data(lang).embeddings is None for lang in langs):
+        raise RuntimeError("embeddings absents : python -m analysis.run_analysis, ou --encoder hashing")
+    queries = ("new beginnings", "loss and grief", "amour et harmonie", "victoire")
+    # une carte sur huit : le coût par appel est dominé par la figure plotly, pas par le nombre de cartes
+    return lambda: ([app.update_semantic_search(n, None, target, 8, lang)
+                     for lang in langs for target in langs for n in names[lang][::8]]
+                    + [app.update_semantic_search(None, q, target, 8, "FR") for q in queries for target in langs])
+
+def setup_update_card_info(size, tmp):
+    app = _app()
+    names = {lang: [c.card for c in app.get_data(lang).cards] for lang in ("FR", "EN")}
+    return lambda: [app.update_card_info(n, lang) for lang in ("FR", "EN") for n in names[lang]]
+
+# nom -> (setup, tailles admises, répétitions par défaut)
+# build_graph / embeddings / process_language : coût quadratique ou encodeur -> tailles plafonnées par défaut
+BENCHMARKS = {
+    "term_frequencies": (setup_term_frequencies, None, 3),
+    "build_graph": (setup_build_graph, 10000, 3),
+    "compute_embeddings": (setup_compute_embeddings, 1000, 1),
+    "make_wordcloud": (setup_make_wordcloud, None, 1),
+    "process_language": (setup_process_language, 1000, 1),
+    "simulate_spreads": (setup_simulate_spreads, None, 3),
+    "callback.display_page": (setup_display_page, 78, 5),
+    "callback.display_page_cached": (setup_display_page_cached, 78, 5),
+    "callback.update_graph_path": (setup_update_graph_path, 78, 5),
+    "callback.update_semantic_search": (setup_update_semantic_search, 78, 3),
+    "callback.update_card_info": (setup_update_card_info, 78, 5),
+}
+
+def maxrss_mb():
+    # ru_maxrss : Ko sous Linux, octets sous macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def measure(name, size, repeat):
+    """Exécuté dans un processus neuf : le pic RSS ne concerne que ce benchmark."""
+    setup = BENCHMARKS[name][0]
+    with tempfile.TemporaryDirectory() as tmp:
+        func = setup(size, tmp)
+        setup_rss = maxrss_mb()
+        func()  # échauffement (imports tardifs, caches de premier appel)
+        first_rss = maxrss_mb()
+
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - t0)
+
+        # passe séparée sous tracemalloc (il ralentit l'exécution : pas de chronométrage ici)
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        func()
+        after = tracemalloc.take_snapshot()
+        _, alloc_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        diff = after.compare_to(before, "filename")
+
+    return {
+        "name": name,
+        "size": size,
+        "repeat": repeat,
+        "wall_s": {
+            "min": min(times),
+            "median": statistics.median(times),
+            "mean": statistics.fmean(times),
+        },
+        "setup_rss_mb": round(setup_rss, 1),
+        "peak_rss_mb": round(max(first_rss, maxrss_mb()), 1),
+        "alloc_peak_mb": round(alloc_peak / (1024 * 1024), 2),
+        "alloc_blocks_retained": sum(d.count_diff for d in diff),
+        "alloc_mb_retained": round(sum(d.size_diff for d in diff) / (1024 * 1024), 3),
+    }
+
+def _child(queue, name, size, repeat):
+    try:
+        queue.put(measure(name, size, repeat))
+    except Exception as e:
+        queue.put({"name": name, "size": size, "error": repr(e)})
+
+def run_isolated(name, size, repeat, timeout):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(queue, name, size, repeat))
+    proc.start()
+    try:
+        result = queue.get(timeout=timeout)
+    except Exception:
+        result = {"name": name, "size": size, "error": f"timeout ({timeout}s)"}
+    proc.join(5)
+    if proc.is_alive():
+        proc.terminate()
+    return result
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path, threshold):
+    """Compare les médianes à une exécution de référence ; retourne la liste des régressions."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["name"], r["size"]): r for r in json.load(f)["results"] if "wall_s" in r}
+    regressions = []
+    for r in results:
+        base = baseline.get((r["name"], r["size"]))
+        if base is None or "wall_s" not in r:
+            continue
+        ratio = r["wall_s"]["median"] / max(base["wall_s"]["median"], 1e-9)
+        flag = "⚠️" if ratio > threshold else "  "
+        print(f"{flag} {r['name']:<32} n={r['size']:<7} {base['wall_s']['median']:.4f}s -> "
+              f"{r['wall_s']['median']:.4f}s (x{ratio:.2f})")
+        if ratio > threshold:
+            regressions.append(r)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks du pipeline d'analyse et des callbacks Dash")
+    parser.add_argument("--only", action="append", help="motif(s) de noms de benchmarks (fnmatch)")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="tailles de corpus, séparées par des virgules")
+    parser.add_argument("--repeat", type=int, default=None, help="répétitions chronométrées (défaut : par benchmark)")
+    parser.add_argument("--no-limits", action="store_true", help="ignorer les tailles maximales par benchmark")
+    parser.add_argument("--offline", action="store_true",
+                        help="HF_HUB_OFFLINE=1 : échec immédiat si le modèle d'embeddings n'est pas en cache")
+    parser.add_argument("--encoder", choices=("model", "hashing"), default="model",
+                        help="encodeur des benchmarks d'embeddings : vrai modèle, ou factice hors ligne (hashing)")
+    parser.add_argument("--timeout", type=float, default=1800, help="délai maximal par mesure (s)")
+    parser.add_argument("--out", type=Path, default=None, help="fichier JSON de sortie")
+    parser.add_argument("--compare", type=Path, default=None, help="résultats de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=1.2, help="ratio de régression toléré (médiane)")
+    args = parser.parse_args(argv)
+
+    if args.offline:
+        os.environ["HF_HUB_OFFLINE"] = "1"
+    os.environ["TAROT_BENCH_ENCODER"] = args.encoder
+    sizes = sorted({int(s) for s in args.sizes.split(",") if s.strip()})
+    names = [n for n in BENCHMARKS if not args.only or any(fnmatch.fnmatch(n, p) for p in args.only)]
+
+    results = []
+    for name in names:
+        _, max_size, default_repeat = BENCHMARKS[name]
+        for size in sizes:
+            if max_size is not None and size > max_size and not args.no_limits:
+                continue
+            result = run_isolated(name, size, args.repeat or default_repeat, args.timeout)
+            results.append(result)
+            if "error" in result:
+                print(f"❌ {name:<32} n={size:<7} {result['error']}")
+            else:
+                print(f"✅ {name:<32} n={size:<7} median {result['wall_s']['median']:.4f}s  "
+                      f"peak RSS {result['peak_rss_mb']} Mo  alloc peak {result['alloc_peak_mb']} Mo")
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    out = args.out or RESULTS_DIR / f"bench_{report['meta']['revision'] or 'local'}_{int(time.time())}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print("Résultats :", out)
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+# cards.py
+# Collection de cartes compacte et indexée, construite une fois par langue :
+# les callbacks y accèdent en O(1) sans repasser par pandas.
+
+import numpy as np
+
+KEYWORD_FIELDS = ("keywords_general", "keywords_upright", "keywords_reversed")
+
+
+def clean_text(value):
+    # cellules Excel vides (NaN) -> chaîne vide
+    return value.strip() if isinstance(value, str) else ""
+
+
+def split_keywords(value):
+    return tuple(k.strip() for k in clean_text(value).split(";") if k.strip())
+
+
+def text_list(value):
+    # champs Kaggle : listes de phrases (absentes pour certaines cartes)
+    return tuple(clean_text(v) for v in value if clean_text(v)) if isinstance(value, list) else ()
+
+
+class Card:
+    """Une carte (valeurs en lecture seule par convention : l'objet est partagé entre requêtes)."""
+
+    __slots__ = ("index", "card", "name", "arcana", "description", "upright_meaning", "reversed_meaning",
+                 "keywords_general", "keywords_upright", "keywords_reversed", "img",
+                 "suit", "number", "archetype", "fortune_telling", "light", "shadow")
+
+    def __init__(self, index, card, name, arcana, description, upright_meaning, reversed_meaning,
+                 keywords_general, keywords_upright, keywords_reversed, img,
+                 suit="", number="", archetype="", fortune_telling=(), light=(), shadow=()):
+        self.index = index
+        self.card = card                  # nom anglais : identifiant commun FR/EN
+        self.name = name                  # nom dans la langue du deck
+        self.arcana = arcana
+        self.description = description
+        self.upright_meaning = upright_meaning
+        self.reversed_meaning = reversed_meaning
+        self.keywords_general = keywords_general
+        self.keywords_upright = keywords_upright
+        self.keywords_reversed = keywords_reversed
+        self.img = img
+        # fiche Kaggle (corpus unifié, en anglais)
+        self.suit = suit
+        self.number = number
+        self.archetype = archetype
+        self.fortune_telling = fortune_telling
+        self.light = light
+        self.shadow = shadow
+
+    def __repr__(self):
+        return f"Card({self.card!r})"
+
+
+class CardCollection:
+    """Cartes d'une langue, avec index par nom et par image, longueurs et options de dropdown précalculées."""
+
+    __slots__ = ("cards", "by_name", "by_img", "names", "description_lengths", "options")
+
+    def __init__(self, cards):
+        self.cards = tuple(cards)
+        self.by_name = {c.card: c for c in self.cards}
+        self.by_img = {c.img: c for c in self.cards if c.img}
+        self.names = np.array([c.card for c in self.cards], dtype=object)
+        self.description_lengths = np.fromiter((len(c.description) for c in self.cards),
+                                               dtype=np.int32, count=len(self.cards))
+        self.description_lengths.setflags(write=False)
+        self.options = tuple({"label": c.card, "value": c.card} for c in self.cards)
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        # corpus en colonnes (analysis/corpus.py) : pas de DataFrame intermédiaire
+        columns = corpus.get("columns", {}) if corpus else {}
+        if "card" not in columns:
+            return cls([])
+        names = list(columns)
+        return cls.from_records(dict(zip(names, values)) for values in zip(*columns.values()))
+
+    @classmethod
+    def from_records(cls, records):
+        cards = []
+        seen = set()
+        for i, row in enumerate(records):
+            card = clean_text(row.get("card"))
+            if not card or card in seen:  # comme df["card"].unique() : première occurrence
+                continue
+            seen.add(card)
+            cards.append(Card(
+                index=i,
+                card=card,
+                name=clean_text(row.get("carte")) or card,
+                arcana=clean_text(row.get("arcana", row.get("arcane"))),
+                description=clean_text(row.get("description")),
+                upright_meaning=clean_text(row.get("upright_meaning")),
+                reversed_meaning=clean_text(row.get("reversed_meaning")),
+                keywords_general=split_keywords(row.get("keywords_general")),
+                keywords_upright=split_keywords(row.get("keywords_upright")),
+                keywords_reversed=split_keywords(row.get("keywords_reversed")),
+                img=clean_text(row.get("img")),
+                suit=clean_text(row.get("suit")),
+                number=clean_text(row.get("number")),
+                archetype=clean_text(row.get("archetype")),
+                fortune_telling=text_list(row.get("fortune_telling")),
+                light=text_list(row.get("light")),
+                shadow=text_list(row.get("shadow")),
+            ))
+        return cls(cards)
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __iter__(self):
+        return iter(self.cards)
+
+    def __bool__(self):
+        return bool(self.cards)
+
+    def get(self, name):
+        return self.by_name.get(name)
+
+    def get_by_img(self, img):
+        # nom de fichier image de l'Excel (colonne `img`)
+        return self.by_img.get(img)
+
+    def first(self):
+        return self.cards[0] if self.cards else None
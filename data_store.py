@@ -0,0 +1,206 @@
+# data_store.py
+# Magasin de données préchargé, en lecture seule, indexé par langue (FR/EN).
+# Les fichiers sources ne sont relus que si leur empreinte (mtime/taille puis hash) change.
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from analysis.corpus import load_corpus
+from analysis.graph_artifact import GraphArtifact, GraphMetrics, graph_hash
+from analysis.pipeline import sha256_file
+from cards import CardCollection
+from metrics import cache_event
+
+
+def file_signature(path):
+    """Signature bon marché d'un fichier : (mtime_ns, taille), ou None s'il est absent."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def file_hash(path):
+    """Hash SHA-256 du contenu d'un fichier, ou None s'il est absent ou illisible."""
+    try:
+        return sha256_file(path)
+    except OSError:
+        return None
+
+
+def load_cards(path):
+    """Cartes d'un corpus unifié (analysis/corpus.py), JSON en colonnes : ni pandas ni openpyxl."""
+    try:
+        return CardCollection.from_corpus(load_corpus(path))
+    except Exception as e:
+        print(f"Erreur de chargement du corpus {path} : {e}")
+        return CardCollection([])
+
+
+def load_graph(path):
+    """
+    Graphe compact (.npz + table des nœuds, layout inclus).
+    Aucun graphe NetworkX n'est construit ici : voir GraphArtifact.to_networkx().
+    """
+    try:
+        return GraphArtifact.load(path)
+    except Exception as e:
+        print(f"Erreur de chargement du graphe {path} : {e}")
+        return GraphArtifact.empty()
+
+
+def load_graph_metrics(path, graph, graph_hash):
+    """Métriques précalculées du graphe, ignorées si elles ont été calculées sur un autre graphe."""
+    try:
+        metrics = GraphMetrics.load(path)
+    except (OSError, ValueError, KeyError):
+        return None
+    if graph_hash is None or metrics.graph_hash != graph_hash or len(metrics.degree) != graph.number_of_nodes():
+        return None
+    return metrics
+
+
+def load_json(path):
+    """Artefact JSON facultatif (ex. manifest des images) : dict vide s'il est absent ou illisible."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_embeddings(path):
+    """
+    Matrice d'embeddings (float32, lignes normalisées) ouverte en mmap, avec la liste des cartes
+    de son index et le nom du modèle qui l'a produite. Aucun modèle n'est chargé : les vecteurs
+    sont produits par run_analysis.py.
+    """
+    index_path = os.path.splitext(path)[0] + ".json"
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+        matrix = np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None, [], None
+    cards = [row["card"] for row in index.get("rows", [])]
+    if len(cards) != len(matrix):
+        print(f"Index d'embeddings incohérent : {index_path}")
+        return None, [], None
+    return matrix, cards, index.get("model")
+
+
+class LanguageData:
+    """Instantané des données d'une langue. À traiter comme immuable : il est partagé entre les requêtes."""
+
+    __slots__ = ("lang", "cards", "graph", "graph_metrics", "embeddings", "embedding_cards", "embedding_model",
+                 "images", "hashes", "_derived", "_lock")
+
+    def __init__(self, lang, cards, graph, hashes, embeddings=None, embedding_cards=(), images=None,
+                 graph_metrics=None, embedding_model=None):
+        self.lang = lang
+        self.cards = cards
+        self.graph = graph              # GraphArtifact (positions du layout incluses si disponibles)
+        self.graph_metrics = graph_metrics  # GraphMetrics alignées sur graph.nodes, ou None
+        self.embeddings = embeddings
+        self.embedding_cards = list(embedding_cards)
+        self.embedding_model = embedding_model  # champ "model" de l'index JSON
+        self.images = images or {}
+        self.hashes = hashes            # empreinte de chaque source : clé des ETag de l'API (api.py)
+        self._derived = {}
+        self._lock = threading.RLock()  # réentrant : un builder peut lire une autre valeur dérivée
+
+    def derived(self, key, builder):
+        """
+        Valeur dérivée (layout, figure…) calculée une seule fois pour cet instantané.
+        Un rechargement crée un nouvel instantané : le cache est donc invalidé avec lui.
+        """
+        try:
+            value = self._derived[key]
+        except KeyError:
+            pass
+        else:
+            cache_event(hit=True)
+            return value
+        with self._lock:
+            hit = key in self._derived
+            if not hit:
+                self._derived[key] = builder(self)
+            cache_event(hit)
+            return self._derived[key]
+
+
+class DataStore:
+    """
+    Données de toutes les langues, chargées une fois au démarrage.
+
+    `get(lang)` ne fait aucune lecture de fichier : au plus un `os.stat` toutes les
+    `check_interval` secondes pour détecter une régénération des sources. Un rechargement
+    construit un nouvel instantané puis remplace la référence d'un seul coup, si bien
+    que les requêtes concurrentes voient toujours un état cohérent.
+    """
+
+    def __init__(self, sources, check_interval=5.0):
+        # sources : {"FR": {"data": chemin_corpus, "graph": chemin_npz,
+        #                   "graph_nodes": table_des_nœuds_du_npz, "graph_metrics": chemin_npz, "embeddings": chemin_npy,
+        #                   "images": chemin_manifest_images}, ...}
+        self.sources = sources
+        self.check_interval = check_interval
+        self._snapshots = {}
+        self._signatures = {}
+        self._last_check = {}
+        self._lock = threading.Lock()
+
+    def languages(self):
+        return list(self.sources)
+
+    def preload(self):
+        for lang in self.sources:
+            self.get(lang)
+        return self
+
+    def get(self, lang):
+        snapshot = self._snapshots.get(lang)
+        now = time.monotonic()
+        if snapshot is not None and now - self._last_check.get(lang, 0.0) < self.check_interval:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshots.get(lang)
+            if snapshot is None or now - self._last_check.get(lang, 0.0) >= self.check_interval:
+                snapshot = self._refresh(lang, snapshot)
+                self._last_check[lang] = time.monotonic()
+        return snapshot
+
+    def _refresh(self, lang, snapshot):
+        paths = self.sources[lang]
+        signatures = {key: file_signature(path) for key, path in paths.items()}
+        if snapshot is not None and signatures == self._signatures.get(lang):
+            return snapshot
+
+        hashes = {key: file_hash(path) for key, path in paths.items()}
+        self._signatures[lang] = signatures
+        if snapshot is not None and hashes == snapshot.hashes:
+            return snapshot  # simple "touch" : contenu identique
+
+        embeddings, embedding_cards, embedding_model = (load_embeddings(paths["embeddings"]) if "embeddings" in paths
+                                                        else (None, [], None))
+        graph = load_graph(paths["graph"])
+        snapshot = LanguageData(
+            lang,
+            cards=load_cards(paths["data"]),
+            graph=graph,
+            hashes=hashes,
+            embeddings=embeddings,
+            embedding_cards=embedding_cards,
+            embedding_model=embedding_model,
+            images=load_json(paths["images"]) if "images" in paths else None,
+            graph_metrics=(load_graph_metrics(paths["graph_metrics"], graph,
+                                              graph_hash(hashes["graph"], hashes.get("graph_nodes")))
+                           if "graph_metrics" in paths else None),
+        )
+        self._snapshots[lang] = snapshot
+        return snapshot
@@ -0,0 +1,26 @@
+# gunicorn.conf.py
+# Lu automatiquement par `gunicorn app:server` depuis la racine du dépôt.
+# L'app (données de cartes, graphes, embeddings en mmap) est chargée une seule fois dans le
+# maître puis préchauffée ; les workers forkés partagent ces pages mémoire en copie sur écriture.
+
+import gc
+import os
+import time
+
+wsgi_app = "app:server"
+bind = os.environ.get("TAROT_BIND", "127.0.0.1:8051")
+preload_app = True
+
+
+def when_ready(server):
+    # maître, app déjà importée (preload_app), avant le fork des premiers workers
+    import app
+
+    t0 = time.perf_counter()
+    warm = app.warm_up()
+    # objets de démarrage hors du suivi du GC : ses passes ne réécrivent plus les pages partagées
+    gc.collect()
+    gc.freeze()
+    server.log.info("Tarot : préchauffage %.2f s, %d objets gelés (total %.2f s)",
+                    warm, gc.get_freeze_count(), time.perf_counter() - t0)
+
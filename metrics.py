@@ -0,0 +1,209 @@
+# metrics.py
+# Instrumentation des callbacks Dash, en mémoire : durée, taille de la réponse sérialisée,
+# succès du cache — histogrammes par callback et par langue, exposés sur /metrics.
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+
+import flask
+from dash.exceptions import PreventUpdate
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)      # secondes
+SIZE_BUCKETS = (1 << 10, 4 << 10, 16 << 10, 64 << 10, 256 << 10, 1 << 20, 4 << 20)    # octets
+
+# état du cache pendant l'exécution d'un callback : None (aucun accès), "hit" ou "miss"
+_cache_state = contextvars.ContextVar("tarot_cache_state", default=None)
+
+
+def cache_event(hit):
+    """Signale un accès à un cache (ex. LanguageData.derived) ; un seul miss suffit à classer l'appel en miss."""
+    if not hit:
+        _cache_state.set("miss")
+    elif _cache_state.get() is None:
+        _cache_state.set("hit")
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # dernier compartiment : +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        i = 0
+        while i < len(self.bounds) and value > self.bounds[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self):
+        running = 0
+        for bound, n in zip((*self.bounds, float("inf")), self.counts):
+            running += n
+            yield bound, running
+
+
+class CallbackSeries:
+    __slots__ = ("latency", "size", "cache", "errors", "prevented")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.cache = {"hit": 0, "miss": 0, "none": 0}
+        self.errors = 0
+        self.prevented = 0
+
+
+class CallbackMetrics:
+    """Agrégats par (callback, langue), protégés par un verrou (workers à threads)."""
+
+    def __init__(self, slow_ms=None):
+        self.slow_ms = slow_ms
+        self.started = time.time()
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, callback, lang, seconds, size=None, cache=None, outcome="ok"):
+        with self._lock:
+            series = self._series.get((callback, lang))
+            if series is None:
+                series = self._series[(callback, lang)] = CallbackSeries()
+            series.latency.observe(seconds)
+            if size is not None:
+                series.size.observe(size)
+            series.cache[cache or "none"] += 1
+            if outcome == "error":
+                series.errors += 1
+            elif outcome == "prevented":
+                series.prevented += 1
+        if self.slow_ms is not None and seconds * 1000 >= self.slow_ms:
+            print(f"[lent] callback {callback} ({lang}) : {seconds * 1000:.1f} ms, "
+                  f"{size if size is not None else '?'} octets, cache {cache or '-'}")
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "callbacks": [
+                    {
+                        "callback": callback,
+                        "lang": lang,
+                        "count": s.latency.count,
+                        "latency_seconds_sum": round(s.latency.total, 6),
+                        "latency_buckets": dict(zip(map(str, (*LATENCY_BUCKETS, "+Inf")), s.latency.counts)),
+                        "response_bytes_sum": int(s.size.total),
+                        "response_bytes_buckets": dict(zip(map(str, (*SIZE_BUCKETS, "+Inf")), s.size.counts)),
+                        "cache": dict(s.cache),
+                        "errors": s.errors,
+                        "prevented": s.prevented,
+                    }
+                    for (callback, lang), s in sorted(self._series.items())
+                ],
+            }
+
+    def render_prometheus(self):
+        """Format texte Prometheus (histogrammes cumulés)."""
+        lines = [
+            "# HELP tarot_callback_duration_seconds Durée des callbacks Dash (sérialisation comprise).",
+            "# TYPE tarot_callback_duration_seconds histogram",
+        ]
+        size_lines = [
+            "# HELP tarot_callback_response_bytes Taille de la réponse JSON des callbacks.",
+            "# TYPE tarot_callback_response_bytes histogram",
+        ]
+        cache_lines = [
+            "# HELP tarot_callback_cache_total Appels de callbacks par état du cache.",
+            "# TYPE tarot_callback_cache_total counter",
+        ]
+        error_lines = [
+            "# HELP tarot_callback_errors_total Callbacks terminés par une exception.",
+            "# TYPE tarot_callback_errors_total counter",
+        ]
+        with self._lock:
+            for (callback, lang), s in sorted(self._series.items()):
+                labels = f'callback="{callback}",lang="{lang}"'
+                for name, hist, out in (("tarot_callback_duration_seconds", s.latency, lines),
+                                        ("tarot_callback_response_bytes", s.size, size_lines)):
+                    for bound, n in hist.cumulative():
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        out.append(f'{name}_bucket{{{labels},le="{le}"}} {n}')
+                    out.append(f"{name}_sum{{{labels}}} {hist.total}")
+                    out.append(f"{name}_count{{{labels}}} {hist.count}")
+                for state, n in s.cache.items():
+                    cache_lines.append(f'tarot_callback_cache_total{{{labels},state="{state}"}} {n}')
+                error_lines.append(f"tarot_callback_errors_total{{{labels}}} {s.errors}")
+        return "\n".join(lines + size_lines + cache_lines + error_lines) + "\n"
+
+
+def _request_lang(context, default="-"):
+    # la langue vient du store Dash, transmis en Input ou en State selon le callback ;
+    # contexte passé en argument (Dash 3) ou porté par flask.g (Dash 2)
+    context = flask.g if context is None else context
+    for item in (*getattr(context, "inputs_list", ()), *getattr(context, "states_list", ())):
+        if isinstance(item, dict) and item.get("id") == "language-store":
+            return item.get("value") or default
+    return default
+
+
+def _wrap(func, name, metrics):
+    @functools.wraps(func)
+    def instrumented(*args, **kwargs):
+        token = _cache_state.set(None)
+        t0 = time.perf_counter()
+        outcome, size = "ok", None
+        try:
+            response = func(*args, **kwargs)
+            # la fonction enregistrée par Dash retourne déjà la réponse JSON sérialisée
+            if isinstance(response, (str, bytes)):
+                size = len(response.encode("utf-8") if isinstance(response, str) else response)
+            return response
+        except PreventUpdate:
+            outcome = "prevented"
+            raise
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            metrics.observe(name, _request_lang(kwargs.get("callback_context")), time.perf_counter() - t0, size, _cache_state.get(), outcome)
+            _cache_state.reset(token)
+    return instrumented
+
+
+def instrument_callbacks(app, metrics):
+    """Enveloppe chaque callback serveur déjà enregistré (à appeler après leur déclaration)."""
+    for entry in app.callback_map.values():
+        func = entry.get("callback")
+        if func is None or getattr(func, "_tarot_instrumented", False):
+            continue
+        name = getattr(getattr(func, "__wrapped__", func), "__name__", "callback")
+        wrapped = _wrap(func, name, metrics)
+        wrapped._tarot_instrumented = True
+        entry["callback"] = wrapped
+
+
+def _is_local_request():
+    # derrière Nginx, les requêtes publiques arrivent aussi de 127.0.0.1 : on refuse tout ce qui est relayé
+    forwarded = flask.request.headers.get("X-Forwarded-For") or flask.request.headers.get("X-Real-IP")
+    return not forwarded and flask.request.remote_addr in ("127.0.0.1", "::1")
+
+
+def register_metrics_endpoint(server, metrics, path="/metrics"):
+    """Expose les métriques (texte Prometheus, ou JSON avec ?format=json), en local uniquement par défaut."""
+    public = os.environ.get("TAROT_METRICS_PUBLIC") == "1"
+
+    def metrics_view():
+        if not public and not _is_local_request():
+            flask.abort(403)
+        if flask.request.args.get("format") == "json":
+            return flask.Response(json.dumps(metrics.snapshot(), indent=2), mimetype="application/json")
+        return flask.Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+    server.add_url_rule(path, "tarot_metrics", metrics_view)
@@ -0,0 +1,116 @@
+# semantic_search.py
+# Recherche des plus proches voisins sémantiques sur les embeddings des cartes.
+# Les matrices (lignes normalisées) viennent de analysis/run_analysis.py : la similarité
+# cosinus se réduit à un produit scalaire, calculé pour toutes les cartes d'un coup.
+
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+from analysis.semantic_utils import EMBEDDING_MODEL
+
+QUERY_CACHE_SIZE = 512
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def top_k(matrix, queries, k, exclude=None):
+    """
+    Top-k pour un lot de requêtes en une seule multiplication matricielle.
+
+    `queries` : (m, d) vecteurs normalisés ; `exclude` : indices de lignes à écarter par requête
+    (ex. la carte interrogée elle-même), ou None. Retourne (indices, scores), chacun de forme (m, k).
+    """
+    queries = np.atleast_2d(queries)
+    scores = queries @ np.asarray(matrix).T                      # (m, n)
+    if exclude is not None:
+        rows = np.arange(len(queries))
+        valid = np.asarray(exclude) >= 0
+        scores[rows[valid], np.asarray(exclude)[valid]] = -np.inf
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.empty((len(queries), 0))
+        return empty.astype(np.int64), empty
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]        # k meilleurs, non triés
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1)
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+class ModelMismatch(ValueError):
+    """Vecteurs de requête et index produits par des modèles différents : scores sans signification."""
+
+
+class SemanticIndex:
+    """Index en lecture seule d'une langue : matrice d'embeddings, noms de cartes et modèle qui les a produits."""
+
+    __slots__ = ("matrix", "cards", "positions", "model")
+
+    def __init__(self, matrix, cards, model=EMBEDDING_MODEL):
+        self.matrix = matrix
+        self.cards = list(cards)
+        self.positions = {card: i for i, card in enumerate(self.cards)}
+        self.model = model
+
+    def __len__(self):
+        return len(self.cards)
+
+    def card_vector(self, card):
+        i = self.positions.get(card)
+        return None if i is None else np.asarray(self.matrix[i], dtype=np.float32)
+
+    def search(self, vector, k=5, exclude_card=None, model=EMBEDDING_MODEL):
+        """Liste [(carte, score)] des k plus proches voisins d'un vecteur produit par `model`."""
+        return self.search_batch([vector], k, [exclude_card], model)[0]
+
+    def search_batch(self, vectors, k=5, exclude_cards=None, model=EMBEDDING_MODEL):
+        """Plusieurs requêtes en une seule multiplication ; pour les traitements hors ligne."""
+        if model != self.model:
+            raise ModelMismatch(f"Index construit avec {self.model!r}, requête encodée avec {model!r}")
+        exclude = None
+        if exclude_cards is not None:
+            exclude = [self.positions.get(c, -1) for c in exclude_cards]
+        indices, scores = top_k(self.matrix, normalize(vectors), k, exclude)
+        return [
+            [(self.cards[i], float(s)) for i, s in zip(row_i, row_s) if np.isfinite(s)]
+            for row_i, row_s in zip(indices.tolist(), scores)
+        ]
+
+
+_encoders = {}
+_encoder_lock = threading.Lock()
+
+
+def get_encoder(model_name=EMBEDDING_MODEL):
+    # import tardif : torch / sentence-transformers ne sont chargés qu'à la première requête libre ;
+    # verrou : deux callbacks simultanés ne chargent pas le modèle deux fois
+    encoder = _encoders.get(model_name)
+    if encoder is None:
+        with _encoder_lock:
+            encoder = _encoders.get(model_name)
+            if encoder is None:
+                from sentence_transformers import SentenceTransformer
+                encoder = _encoders[model_name] = SentenceTransformer(model_name, device="cpu")
+    return encoder
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def encode_query(text, model_name=EMBEDDING_MODEL):
+    """Embedding normalisé d'un texte libre ; les requêtes répétées ne repassent pas par l'encodeur."""
+    vector = get_encoder(model_name).encode([text], convert_to_numpy=True, normalize_embeddings=True)[0]
+    vector = np.asarray(vector, dtype=np.float32)
+    vector.setflags(write=False)  # partagé via le cache : lecture seule
+    return vector
+
+
+def encode_queries(texts, model_name=EMBEDDING_MODEL, batch_size=64):
+    """Encodage par lots pour le mode batch (hors cache LRU)."""
+    vectors = get_encoder(model_name).encode(
+        list(texts), batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False
+    )
+    return np.asarray(vectors, dtype=np.float32)
@@ -0,0 +1,9 @@
+# tests/conftest.py
+# Racine du dépôt importable (paquet analysis, app, api…) quel que soit le dossier de lancement de pytest.
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
@@ -0,0 +1,74 @@
+# tests/test_api.py
+# API JSON : ETag fort par variante de codage, 304 sur If-None-Match, négociation gzip/brotli.
+
+import gzip
+import json
+from pathlib import Path
+
+import flask
+import pytest
+
+from api import brotli, negotiate, register_api
+from data_store import DataStore
+
+OUTPUTS = Path(__file__).resolve().parent.parent / "analysis" / "outputs"
+
+
+@pytest.fixture(scope="module")
+def client():
+    store = DataStore({
+        "EN": {"data": OUTPUTS / "corpus_en.json", "graph": OUTPUTS / "tarot_graph_en.npz",
+               "graph_nodes": OUTPUTS / "tarot_graph_en.nodes.json",
+               "graph_metrics": OUTPUTS / "tarot_graph_en.metrics.npz"},
+    }).preload()
+    server = flask.Flask(__name__)
+    register_api(server, store.get, store.languages())
+    return server.test_client()
+
+
+def test_etag_and_conditional_get(client):
+    first = client.get("/api/en/cards", headers={"Accept-Encoding": "identity"})
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert etag.startswith('"') and not etag.startswith('W/')
+    assert json.loads(first.data)["count"] == 78
+
+    again = client.get("/api/en/cards", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert again.status_code == 304 and again.data == b""
+    assert again.headers["ETag"] == etag
+
+    stale = client.get("/api/en/cards", headers={"Accept-Encoding": "identity", "If-None-Match": '"other"'})
+    assert stale.status_code == 200
+
+
+def test_encoded_variants_have_their_own_etag(client):
+    plain = client.get("/api/en/graph", headers={"Accept-Encoding": "identity"})
+    gz = client.get("/api/en/graph", headers={"Accept-Encoding": "gzip"})
+    assert gz.headers["Content-Encoding"] == "gzip" and gz.headers["Vary"] == "Accept-Encoding"
+    assert gz.headers["ETag"] != plain.headers["ETag"]
+    assert gzip.decompress(gz.data) == plain.data
+    # le tag d'une variante valide la ressource quel que soit le codage demandé ensuite
+    revalidated = client.get("/api/en/graph",
+                             headers={"Accept-Encoding": "identity", "If-None-Match": gz.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+
+def test_etag_follows_artifacts(client):
+    card = client.get("/api/en/cards/the%20fool")
+    neighbours = client.get("/api/en/cards/The%20Fool/neighbours")
+    assert card.status_code == neighbours.status_code == 200
+    assert card.headers["ETag"] != neighbours.headers["ETag"]
+    assert client.get("/api/en/cards/Nope").status_code == 404
+    assert client.get("/api/xx/cards").status_code == 404
+
+
+@pytest.mark.parametrize("header,expected", [
+    (None, "identity"),
+    ("gzip, deflate", "gzip"),
+    ("gzip;q=0, br;q=0", "identity"),
+    ("*", "br" if brotli is not None else "gzip"),
+    ("br;q=0.5, gzip", "br" if brotli is not None else "gzip"),
+])
+def test_negotiate(header, expected):
+    available = {"identity": b"", "gzip": b"", **({"br": b""} if brotli is not None else {})}
+    assert negotiate(header, available) == expected
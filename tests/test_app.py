@@ -0,0 +1,29 @@
+# tests/test_app.py
+# Surlignage du plus court chemin : le Patch vise la trace data[2] de la figure mise en cache.
+
+import pytest
+from dash.exceptions import PreventUpdate
+
+import app
+from analysis.graph_artifact import GraphArtifact
+from cards import CardCollection
+from data_store import LanguageData
+
+
+def test_path_patch_targets_the_path_trace():
+    data = app.get_data("EN")
+    figure = app.build_graph_figure(data)
+    assert len(figure["data"]) == 3 and figure["data"][2]["mode"] == "lines+markers"
+
+    _, patch = app.update_graph_path("The Fool", "The Sun", "EN")
+    operations = patch.to_plotly_json()["operations"]
+    assert [op["location"] for op in operations] == [["data", 2, "x"], ["data", 2, "y"]]
+    assert len(operations[0]["params"]["value"]) >= 2
+
+
+def test_empty_graph_prevents_the_update(monkeypatch):
+    empty = LanguageData("EN", CardCollection([]), GraphArtifact.empty(), hashes={})
+    monkeypatch.setattr(app, "get_data", lambda lang: empty)
+    assert app.build_graph_figure(empty) == {}
+    with pytest.raises(PreventUpdate):
+        app.update_graph_path("The Fool", "The Sun", "EN")
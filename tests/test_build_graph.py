@@ -0,0 +1,76 @@
+# tests/test_build_graph.py
+# build_graph vectorisé (matrice creuse) comparé à la double boucle d'origine sur les mêmes textes.
+
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.semantic_utils import build_graph
+
+
+def reference_edges(texts, threshold, metric="overlap"):
+    # version naïve O(n²) : une comparaison d'ensembles par paire
+    edges = {}
+    sets = [set(t.split()) for t in texts]
+    for i, j in itertools.combinations(range(len(texts)), 2):
+        common = len(sets[i] & sets[j])
+        w = common if metric == "overlap" else common / len(sets[i] | sets[j]) if common else 0.0
+        if common and w >= threshold:
+            edges[(i, j)] = w
+    return edges
+
+
+def kth_weight(edges, node, k):
+    # k-ième plus fort poids des arêtes de `node` (0 s'il en a moins de k)
+    weights = sorted((w for e, w in edges.items() if node in e), reverse=True)
+    return weights[k - 1] if len(weights) >= k else 0.0
+
+
+def deck(n=40, seed=0):
+    rng = np.random.default_rng(seed)
+    vocab = [f"w{i}" for i in range(60)]
+    texts = [" ".join(rng.choice(vocab, size=rng.integers(3, 15))) for _ in range(n)]
+    return pd.DataFrame({"card": [f"Card {i}" for i in range(n)], "description": texts})
+
+
+def graph_edges(graph, cards):
+    index = {c: i for i, c in enumerate(cards)}
+    return {tuple(sorted((index[l["source"]], index[l["target"]]))): l["weight"] for l in graph["links"]}
+
+
+@pytest.mark.parametrize("metric,threshold", [("overlap", 1), ("overlap", 3), ("jaccard", 0.2)])
+def test_matches_pairwise_reference(metric, threshold):
+    df = deck()
+    graph = build_graph(df, metric=metric, threshold=threshold)
+    expected = reference_edges(df["description"].tolist(), threshold, metric)
+    got = graph_edges(graph, df["card"].tolist())
+    assert got.keys() == expected.keys()
+    assert all(got[e] == pytest.approx(expected[e], abs=1e-6) for e in expected)
+    assert [n["id"] for n in graph["nodes"]] == df["card"].tolist()
+
+
+def test_top_k_keeps_strongest_edges_per_node():
+    # indépendant de l'ordre entre ex æquo : chaque nœud garde min(k, degré) arêtes parmi ses plus fortes,
+    # et une arête écartée n'est plus forte que le k-ième voisin d'aucune de ses extrémités
+    k = 3
+    df = deck(seed=1)
+    edges = reference_edges(df["description"].tolist(), 1)
+    kept = graph_edges(build_graph(df, threshold=1, top_k=k), df["card"].tolist())
+    assert kept.keys() <= edges.keys()
+    for node in range(len(df)):
+        degree = sum(node in e for e in edges)
+        assert sum(node in e for e in kept) >= min(k, degree)
+    for (i, j), w in edges.items():
+        if (i, j) in kept:
+            assert w >= min(kth_weight(edges, i, k), kth_weight(edges, j, k))
+        else:
+            assert w <= kth_weight(edges, i, k) and w <= kth_weight(edges, j, k)
+
+
+def test_tokens_override_raw_text():
+    df = pd.DataFrame({"card": ["A", "B", "C"], "description": ["x y z", "x y z", "q"]})
+    tokens = [["sun", "moon"], ["star"], ["sun", "moon"]]
+    graph = build_graph(df, threshold=2, tokens=tokens)
+    assert graph_edges(graph, ["A", "B", "C"]) == {(0, 2): 2.0}
@@ -0,0 +1,58 @@
+# tests/test_corpus.py
+# Jointure deck Excel <-> fiches Kaggle : clé tolérante, cartes sans fiche, nom Kaggle comme identifiant.
+
+import json
+
+import pandas as pd
+
+from analysis.corpus import build_corpus, card_key, load_corpus, save_corpus
+from analysis.pipeline import sha256_file
+
+KAGGLE = {"cards": [
+    {"name": "Wheel of Fortune", "suit": "Trump", "number": "10", "keywords": ["cycles"],
+     "meanings": {"light": ["chance"], "shadow": ["malchance"]}},
+    {"name": "The Fool", "suit": "Trump", "number": "0", "fortune_telling": ["un voyage"]},
+    {"name": "Ace of Cups", "suit": "Cups", "number": "1"},
+]}
+
+
+def write_sources(tmp_path):
+    deck = tmp_path / "deck.xlsx"
+    pd.DataFrame({
+        "card": ["The Wheel of Fortune", "the  fool ", "Le Bateleur"],
+        "carte": ["La Roue de Fortune", "Le Mat", "Le Bateleur"],
+        "description": ["roue", "mat", None],
+    }).to_excel(deck, index=False)
+    kaggle = tmp_path / "tarot-images.json"
+    kaggle.write_text(json.dumps(KAGGLE), encoding="utf-8")
+    return deck, kaggle
+
+
+def test_card_key_ignores_article_case_and_spaces():
+    assert card_key("The Wheel of Fortune") == card_key("wheel  of fortune ") == "wheel of fortune"
+    assert card_key("Theodore") == "theodore"
+
+
+def test_join_renames_cards_and_lists_unmatched(tmp_path):
+    deck, kaggle = write_sources(tmp_path)
+    corpus = build_corpus(deck, "fr", kaggle)
+    columns = corpus["columns"]
+
+    assert corpus["rows"] == 3
+    assert corpus["unmatched"] == ["Le Bateleur"]
+    # le nom Kaggle remplace celui du deck : même identifiant en FR et en EN
+    assert columns["card"] == ["Wheel of Fortune", "The Fool", "Le Bateleur"]
+    assert columns["carte"] == ["La Roue de Fortune", "Le Mat", "Le Bateleur"]
+    assert columns["description"] == ["roue", "mat", None]
+    assert columns["suit"] == ["Trump", "Trump", None]
+    assert columns["kaggle_keywords"] == [["cycles"], None, None]
+    assert columns["fortune_telling"] == [None, ["un voyage"], None]
+    assert columns["light"] == [["chance"], None, None]
+    assert corpus["sources"]["kaggle"] == {"path": "tarot-images.json", "sha256": sha256_file(kaggle)}
+
+
+def test_corpus_round_trip(tmp_path):
+    deck, kaggle = write_sources(tmp_path)
+    corpus = build_corpus(deck, "en", kaggle)
+    save_corpus(corpus, tmp_path / "corpus.json")
+    assert load_corpus(tmp_path / "corpus.json") == corpus
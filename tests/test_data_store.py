@@ -0,0 +1,97 @@
+# tests/test_data_store.py
+# Rechargement du magasin de données : un "touch" garde l'instantané, un nouveau contenu le remplace,
+# et les lectures concurrentes voient toujours un instantané complet.
+
+import os
+import threading
+
+import pytest
+
+from analysis.corpus import save_corpus
+from analysis.graph_artifact import GraphArtifact
+from data_store import DataStore, file_hash
+
+NODE_LINK = {"nodes": [{"id": "The Fool"}, {"id": "The Sun"}],
+             "links": [{"source": "The Fool", "target": "The Sun", "weight": 1.0}]}
+
+
+def write_corpus(path, cards):
+    save_corpus({"columns": {"card": list(cards), "description": [f"{c}." for c in cards]}}, path)
+
+
+@pytest.fixture
+def sources(tmp_path):
+    write_corpus(tmp_path / "corpus.json", ["The Fool", "The Sun"])
+    GraphArtifact.from_node_link(NODE_LINK).save(tmp_path / "graph.npz")
+    return {"FR": {"data": tmp_path / "corpus.json", "graph": tmp_path / "graph.npz",
+                   "graph_nodes": tmp_path / "graph.nodes.json"}}
+
+
+def test_file_hash_of_missing_file_is_none(tmp_path):
+    assert file_hash(tmp_path / "absent.json") is None
+
+
+def test_touch_keeps_the_snapshot(sources):
+    store = DataStore(sources, check_interval=0)
+    first = store.get("FR")
+    assert [c.card for c in first.cards] == ["The Fool", "The Sun"]
+    assert first.graph.number_of_edges() == 1
+
+    path = sources["FR"]["data"]
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert store.get("FR") is first
+
+
+def test_content_change_swaps_the_snapshot(sources):
+    store = DataStore(sources, check_interval=0)
+    first = store.get("FR")
+    first.derived("answer", lambda data: 42)
+
+    write_corpus(sources["FR"]["data"], ["The Fool", "The Sun", "The Moon"])
+    second = store.get("FR")
+    assert second is not first
+    assert [c.card for c in second.cards] == ["The Fool", "The Sun", "The Moon"]
+    assert second.hashes["data"] != first.hashes["data"] and second.hashes["graph"] == first.hashes["graph"]
+    assert second.derived("answer", lambda data: 43) == 43      # cache dérivé invalidé avec l'instantané
+    assert [c.card for c in first.cards] == ["The Fool", "The Sun"]   # l'ancien reste intact
+
+
+def test_check_interval_defers_the_reload(sources):
+    store = DataStore(sources, check_interval=3600)
+    first = store.get("FR")
+    write_corpus(sources["FR"]["data"], ["The Moon"])
+    assert store.get("FR") is first
+
+
+def test_concurrent_get_during_reloads(sources):
+    store = DataStore(sources, check_interval=0)
+    path = sources["FR"]["data"]
+    decks = (("The Fool", "The Sun"), ("The Fool", "The Sun", "The Moon"))
+    seen, errors = set(), []
+
+    def reader():
+        try:
+            for _ in range(200):
+                seen.add(tuple(c.card for c in store.get("FR").cards))
+        except Exception as e:       # toute exception fait échouer le test
+            errors.append(e)
+
+    def writer():
+        tmp = path.with_suffix(".tmp")
+        mtime = os.stat(path).st_mtime_ns
+        for k in range(1, 21):
+            # remplacement atomique, chaque version avec sa propre date : une régénération réelle
+            write_corpus(tmp, decks[k % 2])
+            os.utime(tmp, ns=(mtime + k * 10**9, mtime + k * 10**9))
+            os.replace(tmp, path)
+
+    threads = [threading.Thread(target=reader) for _ in range(8)] + [threading.Thread(target=writer)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert seen <= set(decks)
+    assert tuple(c.card for c in store.get("FR").cards) == decks[0]
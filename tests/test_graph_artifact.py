@@ -0,0 +1,68 @@
+# tests/test_graph_artifact.py
+# Aller-retour du graphe compact (.npz + table des nœuds) et des métriques, octets reproductibles.
+
+import json
+import time
+
+import numpy as np
+
+from analysis.graph_artifact import GraphArtifact, GraphMetrics, graph_file_hash, nodes_table_path, write_graph_metrics
+
+NODE_LINK = {
+    "directed": False, "multigraph": False, "graph": {},
+    "nodes": [{"id": "The Fool", "meaning": "départ"}, {"id": "The Magician", "meaning": "volonté"},
+              {"id": "The Sun", "meaning": "joie"}, {"id": "The Moon", "meaning": "illusion"}],
+    "links": [{"source": "The Fool", "target": "The Magician", "weight": 2.0},
+              {"source": "The Magician", "target": "The Sun", "weight": 1.5},
+              {"source": "The Sun", "target": "The Moon", "weight": 3.0}],
+}
+POSITIONS = {"The Fool": [0.0, 1.0], "The Magician": [0.5, -0.25], "The Sun": [-1.0, 0.0], "The Moon": [0.25, 0.75]}
+
+
+def test_npz_round_trip(tmp_path):
+    graph = GraphArtifact.from_node_link(NODE_LINK, POSITIONS)
+    path = tmp_path / "graph.npz"
+    graph.save(path)
+    assert nodes_table_path(path).exists()
+
+    loaded = GraphArtifact.load(path)
+    assert loaded.nodes == graph.nodes
+    assert loaded.node_attrs == graph.node_attrs
+    np.testing.assert_array_equal(loaded.src, graph.src)
+    np.testing.assert_array_equal(loaded.dst, graph.dst)
+    np.testing.assert_array_equal(loaded.weight, graph.weight)
+    np.testing.assert_allclose(loaded.positions, graph.positions)
+    assert loaded.to_node_link() == graph.to_node_link()
+    meanings = {n["id"]: n["meaning"] for n in loaded.to_node_link()["nodes"]}
+    assert meanings == {n["id"]: n["meaning"] for n in NODE_LINK["nodes"]}
+
+
+def test_save_is_byte_reproducible(tmp_path):
+    graph = GraphArtifact.from_node_link(NODE_LINK, POSITIONS)
+    graph.save(tmp_path / "a.npz")
+    time.sleep(2.1)  # les dates zip ont une résolution de 2 s
+    graph.save(tmp_path / "b.npz")
+    assert (tmp_path / "a.npz").read_bytes() == (tmp_path / "b.npz").read_bytes()
+
+
+def test_metrics_round_trip_and_hash(tmp_path):
+    path = tmp_path / "graph.npz"
+    GraphArtifact.from_node_link(NODE_LINK).save(path)
+    write_graph_metrics(path, tmp_path / "graph.metrics.npz")
+    metrics = GraphMetrics.load(tmp_path / "graph.metrics.npz")
+    assert metrics.graph_hash == graph_file_hash(path)
+    assert metrics.path(0, 3) == [0, 1, 2, 3]  # chaîne Fool - Magician - Sun - Moon
+
+    # la table des nœuds fait partie de l'empreinte : renommer un nœud invalide les métriques
+    table = json.loads(nodes_table_path(path).read_text(encoding="utf-8"))
+    table["columns"]["id"][3] = "The Star"
+    nodes_table_path(path).write_text(json.dumps(table), encoding="utf-8")
+    assert graph_file_hash(path) != metrics.graph_hash
+
+
+def test_load_without_positions(tmp_path):
+    path = tmp_path / "graph.npz"
+    GraphArtifact.from_node_link(NODE_LINK).save(path)
+    loaded = GraphArtifact.load(path)
+    assert loaded.positions is None
+    assert loaded.number_of_edges() == 3
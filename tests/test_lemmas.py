@@ -0,0 +1,75 @@
+# tests/test_lemmas.py
+# Cache de lemmes : seuls les textes nouveaux passent dans spaCy, le modèle n'est chargé qu'au besoin.
+
+from types import SimpleNamespace
+
+import pytest
+
+from analysis import lemmas
+
+MODEL = "fake_core_sm@1.0"
+
+
+class FakeNLP:
+    """Remplace un pipeline spaCy : chaque mot devient un NOUN dont le lemme est le mot lui-même."""
+
+    def __init__(self):
+        self.seen = []
+
+    def pipe(self, texts, batch_size=64, n_process=1):
+        for text in texts:
+            self.seen.append(text)
+            yield [SimpleNamespace(lemma_=w, pos_="NOUN", is_alpha=w.isalpha()) for w in text.split()]
+
+
+@pytest.fixture
+def fake_nlp(monkeypatch):
+    loads = []
+
+    def load_nlp(model_key):
+        loads.append(model_key)
+        return nlp
+
+    nlp = FakeNLP()
+    nlp.loads = loads
+    monkeypatch.setattr(lemmas, "load_nlp", load_nlp)
+    return nlp
+
+
+def test_only_new_texts_are_lemmatized(tmp_path, fake_nlp):
+    cache = tmp_path / "lemmas.json"
+    lemmatize = lemmas.Lemmatizer("fr", MODEL, cache, stopwords={"le"})
+
+    assert lemmatize(["Le Soleil brille", "la Lune", "Le Soleil brille"]) == [["soleil", "brille"], ["la", "lune"],
+                                                                               ["soleil", "brille"]]
+    assert sorted(fake_nlp.seen) == ["Le Soleil brille", "la Lune"]      # doublon analysé une fois
+    assert lemmatize.stats == {"model": MODEL, "lemmatized": 2, "reused": 0}
+
+    fake_nlp.seen.clear()
+    assert lemmatize(["la Lune", "une Étoile 42"]) == [["la", "lune"], ["une", "étoile"]]
+    assert fake_nlp.seen == ["une Étoile 42"]
+    assert lemmatize.stats == {"model": MODEL, "lemmatized": 1, "reused": 1}
+
+
+def test_fully_cached_run_does_not_load_the_model(tmp_path, fake_nlp):
+    cache = tmp_path / "lemmas.json"
+    lemmas.Lemmatizer("fr", MODEL, cache)(["la Lune"])
+    assert fake_nlp.loads == [MODEL]
+
+    assert lemmas.Lemmatizer("fr", MODEL, cache)(["la Lune", None]) == [["la", "lune"], []]
+    assert fake_nlp.loads == [MODEL, MODEL]      # le texte vide n'était pas encore en cache
+    assert lemmas.Lemmatizer("fr", MODEL, cache)(["la Lune", ""]) == [["la", "lune"], []]
+    assert fake_nlp.loads == [MODEL, MODEL]
+
+
+def test_cache_is_invalidated_by_another_model(tmp_path, fake_nlp):
+    cache = tmp_path / "lemmas.json"
+    lemmas.Lemmatizer("fr", MODEL, cache)(["la Lune"])
+    other = lemmas.Lemmatizer("fr", "fake_core_sm@2.0", cache)
+    other(["la Lune"])
+    assert other.stats["lemmatized"] == 1
+
+
+def test_missing_model_fails(tmp_path):
+    with pytest.raises(RuntimeError, match="Aucun modèle spaCy"):
+        lemmas.Lemmatizer("fr", None, tmp_path / "lemmas.json")(["texte"])
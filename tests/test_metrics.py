@@ -0,0 +1,101 @@
+# tests/test_metrics.py
+# Instrumentation des callbacks : compartiments des histogrammes, format Prometheus, issue des appels
+# et restriction de /metrics aux requêtes locales.
+
+import json
+from types import SimpleNamespace
+
+import flask
+import pytest
+from dash.exceptions import PreventUpdate
+
+from metrics import LATENCY_BUCKETS, CallbackMetrics, Histogram, _wrap, cache_event, register_metrics_endpoint
+
+
+def test_histogram_buckets_are_upper_inclusive():
+    hist = Histogram((1, 10))
+    for value in (0, 1, 1.5, 10, 11, 1000):
+        hist.observe(value)
+    assert hist.counts == [2, 2, 2]          # ]-inf, 1], ]1, 10], ]10, +inf[
+    assert list(hist.cumulative()) == [(1, 2), (10, 4), (float("inf"), 6)]
+    assert hist.count == 6 and hist.total == 1023.5
+
+
+def test_render_prometheus():
+    metrics = CallbackMetrics()
+    metrics.observe("update_card", "fr", 0.02, size=2048, cache="hit")
+    metrics.observe("update_card", "fr", 3.0, size=100, outcome="error")
+    text = metrics.render_prometheus()
+    labels = 'callback="update_card",lang="fr"'
+
+    assert "# TYPE tarot_callback_duration_seconds histogram" in text.splitlines()
+    assert f'tarot_callback_duration_seconds_bucket{{{labels},le="0.01"}} 0' in text
+    assert f'tarot_callback_duration_seconds_bucket{{{labels},le="0.025"}} 1' in text
+    assert f'tarot_callback_duration_seconds_bucket{{{labels},le="2.5"}} 1' in text
+    assert f'tarot_callback_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert f"tarot_callback_duration_seconds_count{{{labels}}} 2" in text
+    assert f"tarot_callback_response_bytes_sum{{{labels}}} 2148.0" in text
+    assert f'tarot_callback_cache_total{{{labels},state="hit"}} 1' in text
+    assert f'tarot_callback_cache_total{{{labels},state="none"}} 1' in text
+    assert f"tarot_callback_errors_total{{{labels}}} 1" in text
+    buckets = [line for line in text.splitlines() if line.startswith("tarot_callback_duration_seconds_bucket")]
+    assert len(buckets) == len(LATENCY_BUCKETS) + 1
+
+
+def test_wrapped_callback_outcomes():
+    metrics = CallbackMetrics()
+    # contexte Dash 3 : la langue est lue dans le store transmis en State
+    context = SimpleNamespace(inputs_list=[], states_list=[{"id": "language-store", "value": "en"}])
+
+    def ok(**kwargs):
+        cache_event(hit=False)
+        return '{"response": {}}'
+
+    def prevented(**kwargs):
+        raise PreventUpdate
+
+    def broken(**kwargs):
+        raise ValueError("boom")
+
+    assert _wrap(ok, "ok", metrics)(callback_context=context) == '{"response": {}}'
+    for func in (prevented, broken):
+        with pytest.raises((PreventUpdate, ValueError)):
+            _wrap(func, func.__name__, metrics)(callback_context=context)
+
+    series = {s["callback"]: s for s in metrics.snapshot()["callbacks"]}
+    assert {s["lang"] for s in series.values()} == {"en"}
+    assert series["ok"]["cache"]["miss"] == 1 and series["ok"]["response_bytes_sum"] == 16
+    assert (series["prevented"]["prevented"], series["prevented"]["errors"]) == (1, 0)
+    assert (series["broken"]["prevented"], series["broken"]["errors"]) == (0, 1)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.delenv("TAROT_METRICS_PUBLIC", raising=False)
+    metrics = CallbackMetrics()
+    metrics.observe("update_card", "en", 0.1)
+    server = flask.Flask(__name__)
+    register_metrics_endpoint(server, metrics)
+    return server.test_client()
+
+
+def test_metrics_endpoint_is_local_only(client):
+    local = client.get("/metrics")
+    assert local.status_code == 200 and local.mimetype == "text/plain"
+    assert "tarot_callback_duration_seconds_count" in local.get_data(as_text=True)
+
+    snapshot = json.loads(client.get("/metrics?format=json").data)
+    assert snapshot["callbacks"][0]["callback"] == "update_card"
+
+    assert client.get("/metrics", environ_base={"REMOTE_ADDR": "203.0.113.7"}).status_code == 403
+    # relayée par le proxy local : refusée malgré l'adresse 127.0.0.1
+    assert client.get("/metrics", headers={"X-Forwarded-For": "203.0.113.7"}).status_code == 403
+    assert client.get("/metrics", headers={"X-Real-IP": "203.0.113.7"}).status_code == 403
+
+
+def test_metrics_endpoint_can_be_public(monkeypatch):
+    monkeypatch.setenv("TAROT_METRICS_PUBLIC", "1")
+    server = flask.Flask(__name__)
+    register_metrics_endpoint(server, CallbackMetrics())
+    response = server.test_client().get("/metrics", environ_base={"REMOTE_ADDR": "203.0.113.7"})
+    assert response.status_code == 200
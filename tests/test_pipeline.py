@@ -0,0 +1,118 @@
+# tests/test_pipeline.py
+# Saut des étapes par clé (hash des entrées + paramètres), propagation des échecs, dossiers en entrée.
+
+from pathlib import Path
+
+import pytest
+
+from analysis.pipeline import Stage, run_pipeline, stage_key
+
+
+def upper(src, dst, suffix=""):
+    Path(dst).write_text(Path(src).read_text(encoding="utf-8").upper() + suffix, encoding="utf-8")
+
+
+def concat(srcs, dst):
+    Path(dst).write_text("".join(Path(s).read_text(encoding="utf-8") for s in srcs), encoding="utf-8")
+
+
+def broken(dst):
+    raise RuntimeError("boom")
+
+
+def dag(tmp, suffix=""):
+    a, b, c = tmp / "a.txt", tmp / "b.txt", tmp / "c.txt"
+    return [
+        Stage("upper", upper, {"src": a, "dst": b, "suffix": suffix}, inputs=[a], outputs=[b],
+              params={"suffix": suffix}),
+        Stage("concat", concat, {"srcs": [a, b], "dst": c}, inputs=[a, b], outputs=[c], deps=["upper"]),
+    ]
+
+
+def run(stages, previous=None, **kwargs):
+    return run_pipeline(stages, previous, root=stages[0].inputs[0].parent, jobs=1, log=lambda *a: None, **kwargs)
+
+
+def statuses(records):
+    return {name: r["status"] for name, r in records.items()}
+
+
+@pytest.fixture
+def tmp(tmp_path):
+    (tmp_path / "a.txt").write_text("tarot", encoding="utf-8")
+    return tmp_path
+
+
+def test_unchanged_inputs_are_skipped(tmp):
+    first = run(dag(tmp))
+    assert statuses(first) == {"upper": "built", "concat": "built"}
+    assert (tmp / "c.txt").read_text(encoding="utf-8") == "tarotTAROT"
+    second = run(dag(tmp), first)
+    assert statuses(second) == {"upper": "skipped", "concat": "skipped"}
+    assert second["upper"]["key"] == first["upper"]["key"]
+
+
+def test_changed_input_rebuilds_downstream(tmp):
+    first = run(dag(tmp))
+    (tmp / "a.txt").write_text("lame", encoding="utf-8")
+    second = run(dag(tmp), first)
+    assert statuses(second) == {"upper": "built", "concat": "built"}
+    assert (tmp / "c.txt").read_text(encoding="utf-8") == "lameLAME"
+
+
+def test_unchanged_intermediate_output_skips_downstream(tmp):
+    # même contenu régénéré (touch) : la clé de l'étape aval ne change pas
+    first = run(dag(tmp))
+    second = run(dag(tmp), first)
+    (tmp / "b.txt").write_text("TAROT", encoding="utf-8")
+    assert statuses(run(dag(tmp), second)) == {"upper": "skipped", "concat": "skipped"}
+
+
+def test_params_missing_output_and_force(tmp):
+    first = run(dag(tmp))
+    assert statuses(run(dag(tmp, suffix="!"), first))["upper"] == "built"
+    first = run(dag(tmp))
+    (tmp / "c.txt").unlink()
+    assert statuses(run(dag(tmp), first)) == {"upper": "skipped", "concat": "built"}
+    assert statuses(run(dag(tmp), first, force=True)) == {"upper": "built", "concat": "built"}
+
+
+def test_failures_propagate_and_are_retried(tmp):
+    out = tmp / "x.txt"
+    stages = [Stage("broken", broken, {"dst": out}, inputs=[tmp / "a.txt"], outputs=[out]),
+              Stage("after", concat, {"srcs": [out], "dst": tmp / "y.txt"}, inputs=[tmp / "a.txt"],
+                    outputs=[tmp / "y.txt"], deps=["broken"])]
+    first = run(stages)
+    assert statuses(first) == {"broken": "failed", "after": "failed"}
+    assert "boom" in first["broken"]["error"]
+    assert statuses(run(stages, first))["broken"] == "failed"  # un échec n'est jamais sauté
+
+
+def test_missing_input_fails_the_stage_not_the_run(tmp):
+    stages = dag(tmp)
+    stages.append(Stage("orphan", upper, {"src": tmp / "missing.txt", "dst": tmp / "z.txt"},
+                        inputs=[tmp / "missing.txt"], outputs=[tmp / "z.txt"]))
+    stages.append(Stage("after_orphan", concat, {"srcs": [tmp / "z.txt"], "dst": tmp / "w.txt"},
+                        inputs=[tmp / "z.txt"], outputs=[tmp / "w.txt"], deps=["orphan"]))
+    records = run(stages)
+    assert statuses(records) == {"upper": "built", "concat": "built", "orphan": "failed", "after_orphan": "failed"}
+    assert "missing.txt" in records["orphan"]["error"]
+    assert records["after_orphan"]["error"] == "dépendance en échec"
+
+
+def test_directory_inputs_are_hashed_by_content(tmp):
+    folder = tmp / "images"
+    folder.mkdir()
+    (folder / "fool.png").write_bytes(b"\x89PNG fool")
+    stage = Stage("dir", concat, {}, inputs=[folder], outputs=[])
+    key, _ = stage_key(stage, tmp)
+    (folder / "moon.png").write_bytes(b"\x89PNG moon")
+    assert stage_key(stage, tmp)[0] != key
+    (folder / "moon.png").unlink()
+    assert stage_key(stage, tmp)[0] == key
+
+
+def test_parallel_run_matches_sequential(tmp):
+    records = run_pipeline(dag(tmp), root=tmp, jobs=2, log=lambda *a: None)
+    assert statuses(records) == {"upper": "built", "concat": "built"}
+    assert (tmp / "c.txt").read_text(encoding="utf-8") == "tarotTAROT"
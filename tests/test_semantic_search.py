@@ -0,0 +1,74 @@
+# tests/test_semantic_search.py
+# Chaîne embeddings -> recherche : compute_embeddings (encodeur factice, déterministe) écrit la matrice
+# et son index, load_embeddings les relit en mmap, SemanticIndex.search retrouve la carte attendue.
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.semantic_utils import EMBEDDING_MODEL, compute_embeddings
+from data_store import load_embeddings
+from semantic_search import ModelMismatch, SemanticIndex, normalize
+
+DIM = 64
+
+
+class HashingEncoder:
+    """Sac de mots haché dans DIM dimensions : même interface que SentenceTransformer.encode."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, **kwargs):
+        self.calls += 1
+        vectors = np.zeros((len(texts), DIM), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().replace(".", " ").split():
+                vectors[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % DIM] += 1.0
+        return normalize(vectors)
+
+
+class NoEncoder:
+    def encode(self, *args, **kwargs):
+        raise AssertionError("tous les textes auraient dû venir du cache")
+
+
+DECK = pd.DataFrame({
+    "card": ["The Moon", "The Sun", "The Tower", "Ace of Cups"],
+    "description": ["dog wolf crayfish pool night", "child horse sunflowers day", "lightning crown falling fire",
+                    "cup overflowing water dove"],
+    "keywords_general": ["illusion", "joy", "upheaval", "love"],
+})
+
+
+@pytest.fixture
+def embeddings(tmp_path):
+    path = tmp_path / "embeddings_en.npy"
+    stats = compute_embeddings(DECK, path, model=HashingEncoder())
+    assert stats["encoded"] == len(DECK) and stats["embedding_dim"] == DIM
+    return path
+
+
+def test_known_query_finds_its_card(embeddings):
+    matrix, cards, model = load_embeddings(embeddings)
+    assert isinstance(matrix, np.memmap) and cards == DECK["card"].tolist() and model == EMBEDDING_MODEL
+    index = SemanticIndex(matrix, cards, model)
+    query = HashingEncoder().encode(["a wolf and a dog howl at night"])[0]
+    results = index.search(query, k=2)
+    assert results[0][0] == "The Moon" and results[0][1] > results[1][1]
+    neighbours = index.search(index.card_vector("The Sun"), k=3, exclude_card="The Sun")
+    assert "The Sun" not in [card for card, _ in neighbours] and len(neighbours) == 3
+
+
+def test_unchanged_texts_are_not_reencoded(embeddings):
+    stats = compute_embeddings(DECK, embeddings, model=NoEncoder())
+    assert (stats["encoded"], stats["reused"]) == (0, len(DECK))
+
+
+def test_search_refuses_another_model(embeddings):
+    matrix, cards, _ = load_embeddings(embeddings)
+    index = SemanticIndex(matrix, cards, "some/other-model")
+    with pytest.raises(ModelMismatch):
+        index.search(np.ones(DIM, dtype=np.float32))
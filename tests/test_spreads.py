@@ -0,0 +1,78 @@
+# tests/test_spreads.py
+# Simulation de tirages : reproductibilité (graine, blocs), totaux des agrégats, réalignement du graphe.
+
+from math import comb
+
+import numpy as np
+import pytest
+
+from analysis.graph_artifact import GraphArtifact
+from analysis.spreads import SPREADS, SpreadSimulator, sample_spreads
+
+CARDS = [f"card-{i}" for i in range(22)]
+SUITS = ["Trump"] * 6 + ["cups"] * 4 + ["wands"] * 4 + ["swords"] * 4 + ["pentacles"] * 4
+
+
+def simulator():
+    return SpreadSimulator(CARDS, SUITS)
+
+
+def test_sample_spreads_draws_without_replacement():
+    cards = sample_spreads(np.random.default_rng(0), 500, len(CARDS), 10)
+    assert cards.shape == (500, 10)
+    assert all(len(set(row)) == 10 for row in cards.tolist())
+    with pytest.raises(ValueError):
+        sample_spreads(np.random.default_rng(0), 1, 3, 4)
+
+
+def test_same_seed_and_chunk_size_give_the_same_draws():
+    sim = simulator()
+    a = sim.simulate(1000, "celtic_cross", seed=7, chunk_size=128)
+    b = sim.simulate(1000, "celtic_cross", seed=7, chunk_size=128)
+    assert np.array_equal(a.card_counts, b.card_counts)
+    assert np.array_equal(a.pair_counts, b.pair_counts)
+    assert sim.read(300, "three", seed=7, chunk_size=64) == sim.read(300, "three", seed=7, chunk_size=64)
+    assert sim.read(300, "three", seed=7, chunk_size=64) != sim.read(300, "three", seed=8, chunk_size=64)
+
+
+def test_read_draw_and_simulate_share_the_same_blocks():
+    sim = simulator()
+    cards, reversed_ = sim.draw(250, "horseshoe", seed=3, chunk_size=100)
+    readings = sim.read(250, "horseshoe", seed=3, chunk_size=100)
+    assert [[c["card"] for c in r["cards"]] for r in readings] == [[CARDS[c] for c in row] for row in cards.tolist()]
+    assert [[c["reversed"] for c in r["cards"]] for r in readings] == reversed_.tolist()
+
+    stats = sim.simulate(250, "horseshoe", seed=3, chunk_size=100)
+    assert np.array_equal(stats.card_counts, np.bincount(cards.ravel(), minlength=len(CARDS)))
+    assert np.array_equal(stats.reversed_counts, np.bincount(cards[reversed_], minlength=len(CARDS)))
+
+
+@pytest.mark.parametrize("spread", sorted(SPREADS))
+def test_count_totals(spread):
+    n, size = 777, SPREADS[spread]
+    stats = simulator().simulate(n, spread, seed=1, chunk_size=100)
+    assert stats.spreads == n
+    assert stats.card_counts.sum() == n * size
+    assert (stats.position_counts.sum(axis=1) == n).all()
+    assert np.array_equal(stats.position_counts.sum(axis=0), stats.card_counts)
+    assert stats.pair_counts.sum() == n * comb(size, 2)
+    assert stats.suit_totals.sum() == n * size
+    assert stats.major_hist.sum() == n
+
+    report = stats.to_dict(CARDS)
+    assert sum(sum(c["positions"]) for c in report["cards"].values()) == n * size
+
+
+def test_from_artifacts_realigns_graph_and_embeddings():
+    # ordre du graphe différent de la collection, et un nœud absent du corpus
+    graph = GraphArtifact(["c", "ghost", "a", "b"], src=[0, 1, 2], dst=[2, 2, 3], weight=[2.0, 5.0, 1.5])
+    embeddings = np.eye(3, dtype=np.float32)[[2, 0, 1]]          # lignes dans l'ordre c, a, b
+    sim = SpreadSimulator.from_artifacts(["a", "b", "c"], graph=graph,
+                                         embeddings=embeddings, embedding_cards=["c", "a", "b"])
+    assert sim.adjacency.tolist() == [[0.0, 1.5, 2.0], [1.5, 0.0, 0.0], [2.0, 0.0, 0.0]]
+    assert np.allclose(sim.similarity, np.eye(3))
+
+    # embeddings incomplets : pas de similarité plutôt qu'un mauvais alignement
+    partial = SpreadSimulator.from_artifacts(["a", "b", "c"], graph=graph,
+                                             embeddings=embeddings[:2], embedding_cards=["c", "a"])
+    assert partial.similarity is None
@@ -0,0 +1,75 @@
+# tests/test_waite_index.py
+# Classement BM25 de l'index Waite : petit index construit par ingest() (découpage remplacé par des
+# passages fixes) et comparé à un BM25 calculé naïvement ; puis requêtes sur l'index livré.
+
+import math
+
+import pytest
+
+from analysis import waite_index
+from analysis.waite_index import PassageIndex, tokenize
+
+PASSAGES = [
+    ("The Tower", "A tower struck by lightning, the crown falls and two figures fall from the tower."),
+    ("The Moon", "The moon shines on a path between two towers; a dog and a wolf howl, a crayfish crawls."),
+    ("The Star", "A great star and seven lesser stars above a kneeling woman pouring water."),
+    (None, "Lightning is the flash of divine fire, a sudden illumination."),
+    ("The Sun", "The sun shines on a child riding a white horse."),
+    ("The Moon", "The moon again: dog, wolf and crayfish, the path of the animal nature."),
+]
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    out = tmp_path_factory.mktemp("waite")
+    pdf = out / "book.pdf"
+    pdf.write_bytes(b"%PDF stand-in")  # seul son hash est lu : l'extraction est remplacée ci-dessous
+
+    def fake_passages(pages):
+        for page, (card, text) in enumerate(PASSAGES, start=1):
+            yield {"page": page, "section": "test", "card": card, "text": text}
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(waite_index, "iter_pages", lambda path: iter(()))
+        mp.setattr(waite_index, "iter_passages", fake_passages)
+        meta = waite_index.ingest(pdf, out, force=True, block_postings=8)  # plusieurs blocs SPIMI
+    assert meta["passages"] == len(PASSAGES)
+    return PassageIndex(out)
+
+
+def naive_bm25(query, k1=PassageIndex.K1, b=PassageIndex.B):
+    docs = [tokenize(text) for _, text in PASSAGES]
+    n, avg = len(docs), sum(map(len, docs)) / len(docs)
+    scores = [0.0] * n
+    for term in set(tokenize(query)):
+        df = sum(term in d for d in docs)
+        if not df:
+            continue
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        for i, d in enumerate(docs):
+            tf = d.count(term)
+            scores[i] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(d) / avg))
+    return scores
+
+
+@pytest.mark.parametrize("query", ["lightning tower", "moon dog wolf crayfish", "star water", "shines"])
+def test_scores_match_naive_bm25(index, query):
+    expected = naive_bm25(query)
+    hits = index.search(query, k=len(PASSAGES))
+    assert [h["id"] for h in hits] == sorted((i for i, s in enumerate(expected) if s > 0),
+                                             key=lambda i: (-expected[i], i))
+    assert all(h["score"] == pytest.approx(expected[h["id"]], abs=1e-3) for h in hits)
+
+
+def test_ranking_and_card_filter(index):
+    assert index.search("lightning tower", k=1)[0]["card"] == "The Tower"
+    assert {h["id"] for h in index.search("moon", card="moon")} == {1, 5}
+    assert all(h["card"] == "The Moon" for h in index.search("path", card="The Moon"))
+    assert index.search("unicorn") == [] and index.search("the and of") == []
+    assert [p["id"] for p in index.card_passages("the moon")] == [1, 5]
+
+
+def test_shipped_index_ranks_card_passages_first():
+    index = PassageIndex()
+    assert index.search("lightning tower", k=1)[0]["card"] == "The Tower"
+    assert {h["card"] for h in index.search("dog wolf crayfish", k=3)} == {"The Moon"}